@@ -0,0 +1,100 @@
+"""
+Apportionment with alliances (apparentements, list combinations, surplus-vote agreements)
+"""
+
+import numpy as np
+
+from apportionment.batch import compute_batch
+from apportionment.methods import TiesException, apply_threshold, compute
+
+
+def alliances(
+    votes,
+    groups,
+    seats,
+    method="dhondt",
+    submethod=None,
+    fractions=False,
+    threshold=None,
+    tiesallowed=True,
+    return_groups=False,
+):
+    """Apportions seats to alliances of parties and then to the parties of each alliance.
+
+    `groups[i]` is the alliance of party i (any hashable label; None: the party runs alone).
+    The seats are apportioned to the alliances (and parties running alone) by their combined
+    votes with `method`, and the seats of each alliance to its parties with `submethod`
+    (default: `method`); e.g., D'Hondt on both levels for surplus-vote agreements in Israel
+    and list combinations in Switzerland. The threshold applies to the individual parties.
+
+    The sub-apportionments of all alliances are computed in one vectorized pass with
+    compute_batch() (alliances of the same size form one matrix); with fractions=True, they
+    are computed with compute() one by one. Returns the list of seats of the parties and,
+    with return_groups=True, a dict {alliance: seats} as second value.
+    """
+    if submethod is None:
+        submethod = method
+    if len(groups) != len(votes):
+        raise ValueError("groups has to contain the alliance of each party")
+    votes = np.array(apply_threshold(list(votes), threshold), dtype=object if fractions else None)
+    codes, labels = _group_codes(groups)
+
+    # upper apportionment (alliances)
+    alliance_votes = np.zeros(len(labels), dtype=votes.dtype)
+    np.add.at(alliance_votes, codes, votes)
+    upper = compute(method, alliance_votes.tolist(), seats, fractions=fractions, as_result=True)
+    alliance_seats = np.array(upper.tolist(), dtype=int)
+    tie = bool(upper.ties)
+
+    # lower apportionments: one matrix (alliances x parties) per alliance size, for the
+    # alliances with seats (e.g., alliances without votes after the threshold have none)
+    sizes = np.bincount(codes, minlength=len(labels))
+    order = np.argsort(codes, kind="stable")
+    position = np.empty(len(codes), dtype=int)
+    position[order] = np.arange(len(codes)) - (np.cumsum(sizes) - sizes)[codes[order]]
+    row = np.zeros(len(labels), dtype=int)
+    representatives = np.zeros(len(codes), dtype=int)
+    with_seats = alliance_seats > 0
+    for size in np.unique(sizes[with_seats]).tolist():
+        same_size = np.nonzero((sizes == size) & with_seats)[0]
+        row[same_size] = np.arange(len(same_size))
+        parties = np.nonzero((sizes[codes] == size) & with_seats[codes])[0]
+        cells = row[codes[parties]], position[parties]
+        matrix = np.zeros((len(same_size), size), dtype=votes.dtype)
+        matrix[cells] = votes[parties]
+        if fractions:
+            results = [
+                compute(submethod, row_votes, s, fractions=True, as_result=True)
+                for row_votes, s in zip(matrix.tolist(), alliance_seats[same_size].tolist())
+            ]
+            result = np.array([r.tolist() for r in results], dtype=int).reshape(matrix.shape)
+            tie = tie or any(r.ties for r in results)
+        else:
+            result, ties = compute_batch(submethod, matrix, alliance_seats[same_size])
+            tie = tie or bool(ties.any())
+        representatives[parties] = result[cells]
+
+    if tie and not tiesallowed:
+        raise TiesException("Tie occurred")
+    if return_groups:
+        seats_of = {
+            label: int(s) for label, s in zip(labels, alliance_seats.tolist()) if label is not None
+        }
+        return representatives.tolist(), seats_of
+    return representatives.tolist()
+
+
+def _group_codes(groups):
+    """Alliance indices of the parties and the alliance labels (None for parties alone)."""
+    index = {}
+    codes = []
+    labels = []
+    for group in groups:
+        if group is None or group not in index:
+            if group is not None:
+                index[group] = len(labels)
+            codes.append(len(labels))
+            labels.append(group)
+        else:
+            codes.append(index[group])
+    return np.array(codes, dtype=int), labels
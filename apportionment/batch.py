@@ -0,0 +1,306 @@
+"""
+Vectorized apportionment of many elections at once
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from apportionment.methods import (
+    _DIVISOR_RULES,
+    _DIVISOR_SHAPE,
+    _as_python,
+    _check_total,
+    _divisor_order,
+    _divisor_values,
+    _integer_votes,
+    _quota_order,
+    _quota_violations,
+    apply_threshold,
+)
+from apportionment.thresholds import threshold_mask
+
+QuotaViolations = namedtuple("QuotaViolations", ["within", "elections", "parties", "upper"])
+
+
+def compute_batch(method, votes, seats, threshold=None):
+    """Computes the apportionments of many elections in one vectorized computation.
+
+    `votes` is a two-dimensional array (elections x parties) and `seats` contains the number
+    of seats of each election (or is a single number for all elections). Row e of the result
+    is identical to compute(method, votes[e], seats[e], threshold=threshold).
+
+    Ties are broken as in compute() but never raise a TiesException. Instead, a boolean array
+    is returned as second value that indicates for each election whether a tie occurred.
+    With the largest remainder method, elections without votes (e.g., if no party passes the
+    threshold), for which compute() raises a ValueError, receive no seats and are reported in
+    this array as well (if they have seats).
+    """
+    votes = np.asarray(votes)
+    if votes.ndim != 2:
+        raise ValueError("votes has to be a two-dimensional array (elections x parties)")
+    seats = np.broadcast_to(np.asarray(seats, dtype=int), votes.shape[:1])
+    filtered_votes = apply_threshold_batch(votes, threshold)
+    if method == "quota":
+        return _quota_batch(filtered_votes, seats)
+    elif method in ["lrm", "hamilton", "largest_remainder"]:
+        return _largest_remainder_batch(filtered_votes, seats)
+    elif method in _DIVISOR_RULES:
+        return _divisor_batch(filtered_votes, seats, _DIVISOR_RULES[method])
+    else:
+        raise NotImplementedError("apportionment method " + method + " not known")
+
+
+def compute_sweep(method, votes, max_seats, fractions=False, threshold=None):
+    """Computes the apportionments of one election for all house sizes 1, 2, ..., max_seats.
+
+    Returns an array with max_seats rows; row h - 1 is identical to
+    compute(method, votes, h, fractions=fractions, threshold=threshold).
+
+    Divisor methods and the quota method are house-monotone, so all rows are read off a single
+    sequence of seat awards. The largest remainder method is not house-monotone; its rows are
+    computed in vectorized chunks of house sizes.
+    """
+    votes = np.array(apply_threshold(votes, threshold))
+    parties = len(votes)
+    result = np.zeros((max_seats, parties), dtype=int)
+    if method == "quota":
+        order, _ = _quota_order(votes, max_seats, fractions, None, False)
+        result[:] = _prefix_counts(order, parties)[1:]
+    elif method in ["lrm", "hamilton", "largest_remainder"]:
+        # (as in compute())
+        _check_total(sum(_as_python(v) for v in votes), max_seats)
+        if fractions:
+            votes = _integer_votes(votes, lambda largest: largest * max(max_seats, parties))
+        chunk = max(1, 2**20 // max(parties, 1))
+        for start in range(0, max_seats, chunk):
+            houses = np.arange(start + 1, min(start + chunk, max_seats) + 1)
+            result[start : start + len(houses)] = _largest_remainder_batch(
+                np.broadcast_to(votes, (len(houses), parties)), houses, fractions
+            )[0]
+    elif method in _DIVISOR_RULES:
+        rule = _DIVISOR_RULES[method]
+        base = np.zeros(parties, dtype=int)
+        first = 1
+        if rule in ["huntington", "adams", "dean"]:
+            houses = np.arange(1, min(max_seats + 1, parties))
+            result[: len(houses)] = _fewer_seats_than_parties(
+                np.broadcast_to(votes, (len(houses), parties)), houses
+            )[0]
+            base = np.int_(votes > 0)
+            first = parties
+        if max_seats >= first:
+            k = max_seats - np.sum(base)
+            order = _divisor_order(votes, k, rule, fractions) if k > 0 else []
+            prefix = _prefix_counts(order, parties)
+            result[first - 1 :] = base + prefix[first - np.sum(base) :]
+    else:
+        raise NotImplementedError("apportionment method " + method + " not known")
+    return result
+
+
+def within_quota_batch(votes, representatives):
+    """Row-wise within_quota() for many apportionments (exact integer comparisons).
+
+    `representatives` is a two-dimensional array (apportionments x parties) and `votes` either
+    has the same shape or is a single vote vector for all rows (e.g., for simulated or
+    enumerated apportionments of one election). Returns a QuotaViolations tuple: `within`
+    indicates for each row whether every party receives its lower or upper quota; each
+    violation is listed with its row (`elections`), its party and whether the `upper` (True)
+    or the lower quota (False) is violated.
+    """
+    representatives = np.asarray(representatives)
+    if representatives.ndim != 2:
+        raise ValueError("representatives has to be a two-dimensional array")
+    upper, lower = _quota_violations(votes, representatives)
+    elections, parties = np.nonzero(upper | lower)
+    return QuotaViolations(
+        ~(upper.any(axis=1) | lower.any(axis=1)), elections, parties, upper[elections, parties]
+    )
+
+
+def _prefix_counts(order, parties):
+    """Row h contains the number of seats of each party among the first h seats in order."""
+    counts = np.zeros((len(order) + 1, parties), dtype=int)
+    counts[np.arange(1, len(order) + 1), order] = 1
+    return np.cumsum(counts, axis=0, out=counts)
+
+
+def apply_threshold_batch(votes, threshold):
+    """Row-wise apply_threshold(): sets vote counts to 0 if threshold is not met.
+
+    `threshold` is a share of the votes of each row or a rule of apportionment.thresholds.
+    """
+    if threshold is None:
+        return votes
+    return np.where(threshold_mask(votes, threshold), votes, 0)
+
+
+def _first_eligible(eligible, available):
+    """Awards one seat each to the first `available[e]` eligible parties (in order) of row e."""
+    return eligible & (np.cumsum(eligible, axis=1) <= available[:, None])
+
+
+def _award_above(values, cutoff, available):
+    """Row-wise: a seat for each value larger than cutoff, the remaining `available` seats go
+    to the first values equal to cutoff. Returns the awarded seats and whether a tie occurred."""
+    above = values > cutoff[:, None]
+    tied = values == cutoff[:, None]
+    contested = available - above.sum(axis=1)
+    return above | _first_eligible(tied, contested), tied.sum(axis=1) > contested
+
+
+def _largest_remainder_batch(votes, seats, fractions=False):
+    total = votes.sum(axis=1, keepdims=True)
+    # elections without votes receive no seats (their quotas are undefined)
+    empty = total[:, 0] == 0
+    unapportioned = empty & (seats > 0)
+    if np.any(empty):
+        total = np.where(empty[:, None], 1, total)
+        seats = np.where(empty, 0, seats)
+    if fractions:
+        # exact quotas votes * seats / total, as integers with the common denominator total
+        quotas = votes * seats[:, None]
+        representatives = (quotas // total).astype(int)
+        remainders = quotas % total
+    else:
+        quotas = (votes.astype(float) * seats[:, None]) / total
+        representatives = np.int_(np.trunc(quotas))
+        remainders = quotas - representatives
+    available = seats - representatives.sum(axis=1)
+    rows = np.nonzero(available > 0)[0]
+    cutoff = np.sort(remainders[rows], axis=1)[np.arange(len(rows)), -available[rows]]
+    ties = np.zeros(len(votes), dtype=bool)
+    awarded, ties[rows] = _award_above(remainders[rows], cutoff, available[rows])
+    representatives[rows] += awarded
+    return representatives, ties | unapportioned
+
+
+def _quota_batch(votes, seats):
+    # (products of int32 or int64 arrays could overflow)
+    votes = votes.astype(float)
+    representatives = np.zeros(votes.shape, dtype=int)
+    ties = np.zeros(len(votes), dtype=bool)
+    total = votes.sum(axis=1, keepdims=True)
+    # (without votes, all parties are tied in every round)
+    total = np.where(total == 0, 1, total)
+    for house in range(int(seats.max(initial=0))):
+        rows = np.nonzero(seats > house)[0]
+        quotas = votes[rows] / (representatives[rows] + 1)
+        # check if upper quota is violated
+        upperquota = np.trunc(np.ceil(votes[rows] * (house + 1) / total[rows]))
+        quotas = np.where(representatives[rows] >= upperquota, 0, quotas)
+        maxquotas = quotas == quotas.max(axis=1, keepdims=True)
+        ties[rows] |= np.count_nonzero(maxquotas, axis=1) > 1
+        representatives[rows, np.argmax(maxquotas, axis=1)] += 1
+    return representatives, ties
+
+
+def _divisor_batch(votes, seats, rule):
+    elections, parties = votes.shape
+    representatives = np.zeros(votes.shape, dtype=int)
+    ties = np.zeros(elections, dtype=bool)
+    if rule in ["huntington", "adams", "dean"]:
+        few = np.nonzero(seats < parties)[0]
+        representatives[few], ties[few] = _fewer_seats_than_parties(votes[few], seats[few])
+        other = np.nonzero(seats >= parties)[0]
+        representatives[other] = votes[other] > 0
+
+    available = seats - representatives.sum(axis=1)
+    rows = np.nonzero(available > 0)[0]
+    if len(rows) > 0:
+        counts, tied = _divisor_cutoff_batch(votes[rows], available[rows], seats[rows], rule)
+        available[rows] -= counts.sum(axis=1)
+        representatives[rows] += counts + _first_eligible(tied, available[rows])
+        ties[rows] = tied.sum(axis=1) > available[rows]
+    return representatives, ties
+
+
+def _fewer_seats_than_parties(votes, seats):
+    """Row-wise methods.__divzero_fewerseatsthanparties(): the strongest parties get a seat."""
+    sorted_votes = -np.sort(-votes, axis=1)
+    mincount = sorted_votes[np.arange(len(votes)), np.maximum(seats - 1, 0)]
+    # without seats, nobody is tied
+    mincount = np.where(seats > 0, mincount, np.inf)
+    return _award_above(votes, mincount, seats)
+
+
+def _count_above_batch(votes, x, length, rule, guess):
+    """Row-wise version of methods._count_above(); x and length are given per row."""
+    shape = votes.shape
+    votes = votes.ravel()
+    x = np.repeat(x, shape[1])
+    length = np.repeat(length, shape[1])
+    counts = np.clip(guess.ravel(), 0, length).astype(int)
+    active = np.nonzero(counts < length)[0]
+    while len(active) > 0:
+        active = active[votes[active] / _divisor_values(rule, counts[active]) > x[active]]
+        counts[active] += 1
+        active = active[counts[active] < length[active]]
+    active = np.nonzero(counts > 0)[0]
+    while len(active) > 0:
+        active = active[votes[active] / _divisor_values(rule, counts[active] - 1) <= x[active]]
+        counts[active] -= 1
+        active = active[counts[active] > 0]
+    return counts.reshape(shape)
+
+
+def _divisor_cutoff_batch(votes, k, length, rule):
+    """Row-wise version of methods._divisor_cutoff() (float arithmetic only).
+
+    Returns the number of weights per party that are strictly larger than the cutoff weight of
+    each row and a boolean array of parties that have a weight equal to this cutoff.
+    """
+    a, b = _DIVISOR_SHAPE[rule]
+    float_votes = votes.astype(float)
+    total = float_votes.sum(axis=1)
+    positive = np.count_nonzero(votes > 0, axis=1)
+    # rows without votes: all weights are 0 and all parties are tied
+    x = np.where(positive > 0, total, 1.0) / (a * (k + positive * (b - 0.5)))
+
+    def estimate(x):
+        return np.ceil(np.clip(float_votes / (a * x[:, None]) - b, -1, length[:, None]))
+
+    # jump start: the standard divisor (votes/seats), corrected for the rounding offset
+    offset = positive * (b - 0.5)
+    counts = _count_above_batch(votes, x, length, rule, estimate(x))
+    for _ in range(8):
+        m = counts.sum(axis=1)
+        far = (np.abs(m - k) > positive) & (positive > 0)
+        if not np.any(far):
+            break
+        x = np.where(far, x * np.maximum(m + offset, 0.5) / (k + offset), x)
+        counts = _count_above_batch(
+            votes, x, length, rule, np.where(far[:, None], estimate(x), counts)
+        )
+
+    # remaining corrections, one seat at a time (for all rows simultaneously)
+    minweight = np.zeros(len(votes))
+    surplus = counts.sum(axis=1) - k
+    while True:
+        r = np.nonzero((surplus > 0) & (positive > 0))[0]
+        if len(r) == 0:
+            break
+        last = votes[r] / _divisor_values(rule, np.maximum(counts[r] - 1, 0))
+        last = np.where(counts[r] > 0, last, np.inf)
+        counts[r, np.argmin(last, axis=1)] -= 1
+        surplus[r] -= 1
+    r = np.nonzero((surplus == 0) & (positive > 0))[0]
+    last = votes[r] / _divisor_values(rule, np.maximum(counts[r] - 1, 0))
+    minweight[r] = np.where(counts[r] > 0, last, np.inf).min(axis=1)
+    while True:
+        r = np.nonzero((surplus < 0) & (positive > 0))[0]
+        if len(r) == 0:
+            break
+        following = votes[r] / _divisor_values(rule, counts[r])
+        following = np.where(counts[r] < length[r, None], following, -np.inf)
+        best = np.argmax(following, axis=1)
+        minweight[r] = following[np.arange(len(r)), best]
+        counts[r, best] += 1
+        surplus[r] += 1
+
+    counts = _count_above_batch(votes, minweight, length, rule, counts)
+    tied = (counts < length[:, None]) & (
+        votes / _divisor_values(rule, counts) == minweight[:, None]
+    )
+    return counts, tied
@@ -0,0 +1,284 @@
+"""
+Biproportional apportionment (double proportionality over districts and parties)
+"""
+
+import numpy as np
+
+from apportionment.methods import _DIVISOR_RULES, _divisor_values, TiesException
+
+# rounds of alternating scaling before switching to tie-and-transfer
+_SCALING_ROUNDS = 5
+# relative tolerance for quotients that lie on a rounding boundary (tied cells)
+_TIE_TOLERANCE = 1e-10
+
+
+def biproportional(
+    votes,
+    district_seats,
+    party_seats,
+    method="saintelague",
+    tiesallowed=True,
+    return_divisors=False,
+):
+    """Apportions seats to the cells of a (districts x parties) vote matrix.
+
+    Each district receives district_seats[i] seats and each party receives party_seats[j] seats
+    (the upper apportionment, e.g., computed with compute() from the party vote totals). The seats
+    of cell (i, j) are votes[i][j] / (D_i * P_j) rounded with the given divisor method, for some
+    district divisors D_i and party divisors P_j.
+
+    The divisors are found with a few rounds of alternating scaling (the districts and the
+    parties are fitted in turn, each with a vectorized one-dimensional divisor method), followed
+    by the tie-and-transfer algorithm, which moves the remaining excess seats of districts along
+    paths of tied cells and rescales the divisors when no such path exists.
+
+    `votes` may be a dense matrix (nested lists or array), a scipy.sparse matrix, or a dict
+    {(district, party): votes}. Only cells with positive votes are stored, so parties that run
+    in few districts are cheap. For dense input, a list of lists is returned; for sparse input,
+    a dict {(district, party): seats} of all cells with at least one seat. With
+    return_divisors=True, the arrays of district divisors and party divisors are returned as
+    second and third value.
+    """
+    rule = _DIVISOR_RULES.get(method)
+    if rule not in ["dhondt", "saintelague", "modified_saintelague"]:
+        raise NotImplementedError(
+            "biproportional apportionment not implemented for method " + str(method)
+        )
+    district_seats = np.asarray(district_seats, dtype=int)
+    party_seats = np.asarray(party_seats, dtype=int)
+    if np.sum(district_seats) != np.sum(party_seats):
+        raise ValueError("district seats and party seats have different totals")
+    rows, cols, values, sparse = _cells(votes, (len(district_seats), len(party_seats)))
+
+    # quotients = values / (district_divisors[rows] * party_divisors[cols])
+    quotients = values.astype(float)
+    district_divisors = np.ones(len(district_seats))
+    party_divisors = np.ones(len(party_seats))
+    for scaling_round in range(_SCALING_ROUNDS + 1):
+        if scaling_round > 0:
+            _, divisors = _fit(quotients, rows, district_seats, rule)
+            quotients = quotients / divisors[rows]
+            district_divisors *= divisors
+        seats, divisors = _fit(quotients, cols, party_seats, rule)
+        quotients = quotients / divisors[cols]
+        party_divisors *= divisors
+        flaws = np.bincount(rows, seats, len(district_seats)).astype(int) - district_seats
+        if not np.any(flaws):
+            break
+    else:
+        _tie_and_transfer(
+            rows, cols, quotients, seats, flaws, district_divisors, party_divisors, rule
+        )
+
+    increase, decrease = _tied_cells(quotients, seats, rule)
+    if not tiesallowed and _has_cycle(rows, cols + len(district_seats), increase, decrease):
+        # seats can be moved along a cycle of tied cells
+        raise TiesException("Tie occurred")
+    if sparse:
+        representatives = {(int(i), int(j)): int(s) for i, j, s in zip(rows, cols, seats) if s > 0}
+    else:
+        representatives = np.zeros((len(district_seats), len(party_seats)), dtype=int)
+        representatives[rows, cols] = seats
+        representatives = representatives.tolist()
+    if return_divisors:
+        return representatives, district_divisors, party_divisors
+    return representatives
+
+
+def _cells(votes, shape):
+    """Row indices, column indices and vote counts of all cells with positive votes."""
+    if isinstance(votes, dict):
+        sparse = True
+        keys = list(votes)
+        rows = np.array([i for i, _ in keys], dtype=int)
+        cols = np.array([j for _, j in keys], dtype=int)
+        values = np.array([votes[key] for key in keys])
+    elif hasattr(votes, "tocoo"):
+        # scipy.sparse matrices
+        sparse = True
+        coo = votes.tocoo()
+        rows, cols, values = coo.row.astype(int), coo.col.astype(int), coo.data
+    else:
+        sparse = False
+        votes = np.asarray(votes)
+        if votes.shape != shape:
+            raise ValueError("votes has to be a (districts x parties) matrix")
+        rows, cols = np.nonzero(votes)
+        values = votes[rows, cols]
+    if len(rows) > 0 and (rows.max() >= shape[0] or cols.max() >= shape[1]):
+        raise ValueError("votes has to be a (districts x parties) matrix")
+    positive = values > 0
+    return rows[positive], cols[positive], values[positive], sparse
+
+
+def _rounded(quotients, rule):
+    """The number of divisors d_j that are smaller than each quotient (votes / divisor)."""
+    if rule == "dhondt":
+        return np.maximum(np.ceil(quotients) - 1, 0).astype(int)
+    rounded = np.maximum(np.ceil((quotients - 1) / 2), 0).astype(int)
+    if rule == "modified_saintelague":
+        # the first divisor is 1.4 instead of 1
+        rounded = np.where(quotients > 1.4, np.maximum(rounded, 1), 0)
+    return rounded
+
+
+def _fit(weights, groups, targets, rule):
+    """Applies the divisor method to each group of cells (a row or a column).
+
+    Returns the seats of each cell and a divisor for each group (which reproduces these seats
+    when the weights of the group are divided by it).
+    """
+    size = len(targets)
+    largest = np.zeros(size)
+    np.maximum.at(largest, groups, weights)
+    if np.any((largest == 0) & (targets > 0)):
+        raise ValueError("seats assigned to a district or party without votes")
+    largest = np.where(largest > 0, largest, 1.0)
+
+    # bisection for a divisor with exactly targets[g] seats: count(lower) >= targets[g]
+    # and count(upper) <= targets[g]
+    upper = largest / _divisor_values(rule, np.zeros(size, dtype=int))
+    lower = largest / _divisor_values(rule, targets)
+    open_groups = np.ones(size, dtype=bool)
+    for _ in range(200):
+        middle = np.sqrt(lower * upper)
+        counts = np.bincount(groups, _rounded(weights / middle[groups], rule), size)
+        lower = np.where(open_groups & (counts >= targets), middle, lower)
+        upper = np.where(open_groups & (counts <= targets), middle, upper)
+        open_groups &= counts != targets
+        open_groups &= upper > lower * (1 + 1e-15)
+        if not np.any(open_groups):
+            break
+
+    # if no divisor matches exactly, the remaining seats go to the largest next weights
+    seats = _rounded(weights / upper[groups], rule)
+    missing = targets - np.bincount(groups, seats, size)
+    following = weights / _divisor_values(rule, seats)
+    order = np.lexsort((np.arange(len(weights)), -following, groups))
+    starts = np.cumsum(np.bincount(groups, minlength=size)) - np.bincount(groups, minlength=size)
+    rank = np.empty(len(weights), dtype=int)
+    rank[order] = np.arange(len(weights)) - starts[groups[order]]
+    awarded = rank < missing[groups]
+    seats = seats + awarded
+
+    # a divisor strictly between the next weights and the weights of the last awarded seats
+    following = weights / _divisor_values(rule, seats)
+    last = np.where(seats > 0, weights / _divisor_values(rule, np.maximum(seats - 1, 0)), np.inf)
+    low = np.zeros(size)
+    np.maximum.at(low, groups, following)
+    high = np.full(size, np.inf)
+    np.minimum.at(high, groups, last)
+    finite = np.isfinite(high)
+    divisors = np.where(low > 0, 2 * low, 1.0)
+    divisors[finite] = np.sqrt(low[finite] * high[finite])
+    return seats, divisors
+
+
+def _tied_cells(quotients, seats, rule):
+    """Cells whose quotient lies on the upper (may gain a seat) or lower (may lose a seat)
+    boundary of its rounding interval d_(seats - 1) <= quotient <= d_seats."""
+    increase = quotients >= _divisor_values(rule, seats) * (1 - _TIE_TOLERANCE)
+    decrease = (seats > 0) & (
+        quotients <= _divisor_values(rule, np.maximum(seats - 1, 0)) * (1 + _TIE_TOLERANCE)
+    )
+    return increase, decrease
+
+
+def _tie_and_transfer(
+    rows, cols, quotients, seats, flaws, district_divisors, party_divisors, rule
+):
+    """Removes the flaws (excess seats) of the districts without changing the party totals.
+
+    Modifies quotients, seats, flaws and the divisors in place. A seat is moved along a path
+    that starts in a district with too few seats and alternates between cells that may gain
+    and cells that may lose a seat (in the same party) until it reaches a district with too
+    many seats. If there is no such path, the quotients of all reachable districts are scaled
+    up (and those of the reached parties down) until a new tied cell extends the reachable
+    part.
+    """
+    district_count = len(flaws)
+    party_count = int(cols.max(initial=-1)) + 1
+    cells = np.arange(len(seats))
+    while np.any(flaws):
+        increase, decrease = _tied_cells(quotients, seats, rule)
+        # breadth-first search from all districts with too few seats
+        district_parent = np.full(district_count, -1)
+        party_parent = np.full(party_count, -1)
+        district_labeled = flaws < 0
+        party_labeled = np.zeros(party_count, dtype=bool)
+        district_frontier = district_labeled.copy()
+        party_frontier = party_labeled.copy()
+        end = None
+        while end is None:
+            while end is None and (np.any(district_frontier) or np.any(party_frontier)):
+                selected = cells[increase & district_frontier[rows] & ~party_labeled[cols]]
+                party_parent[cols[selected]] = selected
+                party_frontier[cols[selected]] = True
+                party_labeled |= party_frontier
+                selected = cells[decrease & party_frontier[cols] & ~district_labeled[rows]]
+                district_parent[rows[selected]] = selected
+                district_frontier = np.zeros(district_count, dtype=bool)
+                district_frontier[rows[selected]] = True
+                district_labeled |= district_frontier
+                party_frontier = np.zeros(party_count, dtype=bool)
+                reached = np.nonzero(district_frontier & (flaws > 0))[0]
+                if len(reached) > 0:
+                    end = reached[0]
+            if end is None:
+                # the labeled part (and its tied cells) stays unchanged, so the search
+                # continues from there after rescaling
+                factor = _rescale(
+                    rows, cols, quotients, seats, district_labeled, party_labeled, rule
+                )
+                district_divisors[district_labeled] /= factor
+                party_divisors[party_labeled] *= factor
+                increase, decrease = _tied_cells(quotients, seats, rule)
+                district_frontier = district_labeled.copy()
+                party_frontier = party_labeled.copy()
+
+        flaws[end] -= 1
+        district = end
+        while district_parent[district] >= 0:
+            cell = district_parent[district]
+            seats[cell] -= 1
+            cell = party_parent[cols[cell]]
+            seats[cell] += 1
+            district = rows[cell]
+        flaws[district] += 1
+
+
+def _rescale(rows, cols, quotients, seats, district_labeled, party_labeled, rule):
+    """Scales the quotients of labeled districts up and those of labeled parties down (cells
+    of labeled districts and labeled parties stay unchanged) until another cell is tied.
+
+    Returns the scaling factor."""
+    grow = district_labeled[rows] & ~party_labeled[cols]
+    shrink = ~district_labeled[rows] & party_labeled[cols]
+    limited = shrink & (seats > 0)
+    factor = min(
+        np.min(_divisor_values(rule, seats[grow]) / quotients[grow], initial=np.inf),
+        np.min(quotients[limited] / _divisor_values(rule, seats[limited] - 1), initial=np.inf),
+    )
+    if not np.isfinite(factor):
+        raise ValueError("no biproportional apportionment exists")
+    quotients[grow] *= factor
+    quotients[shrink] /= factor
+    return factor
+
+
+def _has_cycle(sources, targets, forward, backward):
+    """Whether the bipartite graph with edges sources -> targets (for forward cells) and
+    targets -> sources (for backward cells) contains a directed cycle."""
+    tails = np.concatenate([sources[forward], targets[backward]])
+    heads = np.concatenate([targets[forward], sources[backward]])
+    size = int(max(tails.max(initial=-1), heads.max(initial=-1))) + 1
+    active = np.ones(len(tails), dtype=bool)
+    while True:
+        # edges from nodes without incoming edges or to nodes without outgoing edges
+        # are not on a cycle
+        incoming = np.bincount(heads[active], minlength=size)
+        outgoing = np.bincount(tails[active], minlength=size)
+        removed = active & ((incoming[tails] == 0) | (outgoing[heads] == 0))
+        if not np.any(removed):
+            return bool(np.any(active))
+        active &= ~removed
@@ -0,0 +1,239 @@
+"""
+Memoizing cache for repeated apportionments (in memory or in an sqlite database)
+"""
+
+from collections import OrderedDict, namedtuple
+import hashlib
+import json
+import sqlite3
+import string
+import threading
+
+from apportionment.methods import ApportionmentResult, Tie, apply_threshold, compute
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "size", "maxsize"])
+
+
+class ApportionmentCache:
+    """A cache around compute() with least-recently-used eviction.
+
+    Entries are keyed by a hash of the method, the votes, the number of seats and the other
+    parameters that influence the result (fractions, threshold, tiesallowed, and dtype, which
+    determines whether an OverflowError is raised). By default, at most
+    `maxsize` entries are kept in memory; with a `path`, they are stored in an sqlite database
+    that persists across processes. The cache can be shared between threads.
+
+    Cached results are stored as immutable values: every call returns a new list (or
+    ApportionmentResult), so callers may modify results freely. Verbose calls and calls that
+    raise an exception (e.g., TiesException) are not cached.
+    """
+
+    def __init__(self, maxsize=1024, path=None):
+        if maxsize < 1:
+            raise ValueError("maxsize has to be positive")
+        self.maxsize = maxsize
+        if path is None:
+            self._storage = _MemoryStorage()
+        else:
+            self._storage = _SqliteStorage(path)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def compute(
+        self,
+        method,
+        votes,
+        seats,
+        fractions=False,
+        parties=string.ascii_letters,
+        threshold=None,
+        tiesallowed=True,
+        verbose=False,
+        as_result=False,
+        dtype=None,
+    ):
+        """Like methods.compute(), but returns a cached result if there is one."""
+        if verbose:
+            return compute(
+                method,
+                votes,
+                seats,
+                fractions,
+                parties,
+                threshold,
+                tiesallowed,
+                verbose,
+                as_result,
+                dtype,
+            )
+        key = cache_key(method, votes, seats, fractions, threshold, tiesallowed, dtype)
+        with self._lock:
+            value = self._storage.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is None:
+            result = compute(
+                method,
+                votes,
+                seats,
+                fractions,
+                parties,
+                threshold,
+                tiesallowed,
+                as_result=True,
+                dtype=dtype,
+            )
+            value = (
+                tuple(result.tolist()),
+                tuple((tuple(tie.tied), tie.contested) for tie in result.ties),
+            )
+            with self._lock:
+                self._storage.put(key, value)
+                while len(self._storage) > self.maxsize:
+                    self._storage.evict()
+                    self.evictions += 1
+        representatives, ties = value
+        if as_result:
+            return ApportionmentResult(
+                representatives,
+                [Tie(tied, contested) for tied, contested in ties],
+                method,
+                votes,
+                apply_threshold(votes, threshold),
+                fractions,
+            )
+        return list(representatives)
+
+    def info(self):
+        """Hit and miss statistics (as functools.lru_cache().cache_info())."""
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions, len(self._storage), self.maxsize
+            )
+
+    def clear(self):
+        """Removes all entries and resets the statistics."""
+        with self._lock:
+            self._storage.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            self._storage.close()
+
+
+def cache_key(method, votes, seats, fractions=False, threshold=None, tiesallowed=True, dtype=None):
+    """A hash (hex string) of the parameters that determine the result of compute()."""
+    if hasattr(votes, "tolist"):
+        # numpy arrays
+        votes = votes.tolist()
+    else:
+        votes = [v.item() if hasattr(v, "item") else v for v in votes]
+    if hasattr(seats, "item"):
+        seats = seats.item()
+    if dtype is not None:
+        # names of numpy types (e.g., numpy.int64) and dtypes
+        dtype = getattr(dtype, "__name__", str(dtype))
+    parameters = repr((method, votes, seats, bool(fractions), threshold, bool(tiesallowed), dtype))
+    return hashlib.blake2b(parameters.encode(), digest_size=16).hexdigest()
+
+
+class _MemoryStorage:
+    def __init__(self):
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+    def evict(self):
+        self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def close(self):
+        pass
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _SqliteStorage:
+    """Entries in an sqlite table; the column `used` orders them by their last use.
+
+    The number of entries is counted once when the database is opened and then kept up to date
+    (so it does not include entries that other processes add in the meantime).
+    """
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS apportionments"
+                " (key TEXT PRIMARY KEY, value TEXT NOT NULL, used INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS apportionments_used ON apportionments (used)"
+            )
+        (self._clock, self._size) = self._connection.execute(
+            "SELECT COALESCE(MAX(used), 0), COUNT(*) FROM apportionments"
+        ).fetchone()
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get(self, key):
+        row = self._connection.execute(
+            "SELECT value FROM apportionments WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._connection:
+            self._connection.execute(
+                "UPDATE apportionments SET used = ? WHERE key = ?", (self._tick(), key)
+            )
+        representatives, ties = json.loads(row[0])
+        return tuple(representatives), tuple((tuple(tied), contested) for tied, contested in ties)
+
+    def put(self, key, value):
+        with self._connection:
+            updated = self._connection.execute(
+                "UPDATE apportionments SET value = ?, used = ? WHERE key = ?",
+                (json.dumps(value), self._tick(), key),
+            ).rowcount
+            if not updated:
+                self._connection.execute(
+                    "INSERT INTO apportionments (key, value, used) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), self._tick()),
+                )
+                self._size += 1
+
+    def evict(self):
+        with self._connection:
+            self._size -= self._connection.execute(
+                "DELETE FROM apportionments WHERE key ="
+                " (SELECT key FROM apportionments ORDER BY used LIMIT 1)"
+            ).rowcount
+
+    def clear(self):
+        with self._connection:
+            self._connection.execute("DELETE FROM apportionments")
+        self._size = 0
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._size
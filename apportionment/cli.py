@@ -0,0 +1,290 @@
+"""
+Command-line interface: apportions a stream of elections from a CSV or JSONL file
+
+    apportionment elections.jsonl --method dhondt --threshold 0.04
+    apportionment results.csv --seats 183 --keep year --output-format jsonl
+
+A JSONL record is an object with a list of vote counts (field "votes") and the number of seats
+(field "seats", or --seats for all records); all other fields are copied to the output, which
+additionally contains the fields "apportionment" and "tie". A CSV row contains the vote counts
+of the parties in its columns, except for the seats column and the columns given with --keep,
+which are copied to the output. The output has the same layout with seats instead of votes and
+an additional column "tie".
+
+Records are read, apportioned and written in chunks (optionally in several processes), so
+memory does not grow with the size of the input.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+
+from apportionment.methods import METHODS, _DIVISOR_RULES, compute
+from apportionment.parallel import _bounded_map
+
+FORMATS = ["csv", "jsonl"]
+METHOD_NAMES = METHODS + ["lrm", "hamilton"] + [m for m in _DIVISOR_RULES if m not in METHODS]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="apportionment",
+        description="Apportions seats for each election of a CSV or JSONL file.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--input-format", choices=FORMATS, help="default: from file extension")
+    parser.add_argument(
+        "--output-format", choices=FORMATS, help="default: from file extension or input format"
+    )
+    parser.add_argument("-m", "--method", choices=METHOD_NAMES, default="dhondt")
+    parser.add_argument("--seats", type=int, help="number of seats of all elections")
+    parser.add_argument(
+        "--seats-column", default="seats", help="column with the number of seats (default: seats)"
+    )
+    parser.add_argument(
+        "--votes-column", default="votes", help="JSONL field with the votes (default: votes)"
+    )
+    parser.add_argument(
+        "--keep", nargs="+", default=[], help="CSV columns that are copied to the output"
+    )
+    parser.add_argument("--threshold", type=float, help="minimum share of votes (e.g. 0.04)")
+    parser.add_argument("--fractions", action="store_true", help="exact arithmetic")
+    parser.add_argument(
+        "--engine",
+        choices=["compute", "batch"],
+        default="compute",
+        help="compute() per election or compute_batch() per chunk (default: compute)",
+    )
+    parser.add_argument("--chunksize", type=int, default=10000, help="elections per chunk")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of processes (0: one per CPU)"
+    )
+    parser.add_argument(
+        "--profile", help="file for timings and counters of compute() (JSON, compute engine)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.engine == "batch" and args.fractions:
+        parser.error("--fractions is not supported by the batch engine")
+    input_format = args.input_format or _format(args.input) or "jsonl"
+    output_format = args.output_format or _format(args.output) or input_format
+
+    infile = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    outfile = (
+        sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    )
+    profile = None
+    if args.profile is not None:
+        from apportionment.profiling import Profile
+
+        profile = Profile()
+    try:
+        if input_format == "csv":
+            records = read_csv(infile, args.seats, args.seats_column, args.keep)
+        else:
+            records = read_jsonl(infile, args.seats, args.seats_column, args.votes_column)
+        results = apportion(
+            records,
+            args.method,
+            threshold=args.threshold,
+            fractions=args.fractions,
+            engine=args.engine,
+            chunksize=args.chunksize,
+            workers=args.workers or None,
+            profile=profile,
+        )
+        if output_format == "csv":
+            write_csv(outfile, results)
+        else:
+            write_jsonl(outfile, results)
+        if profile is not None:
+            with open(args.profile, "w", encoding="utf-8") as f:
+                f.write(profile.to_json(indent=1))
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    return 0
+
+
+def _format(path):
+    """The format given by the file extension (None if unknown)."""
+    extension = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl"}.get(extension)
+
+
+def read_jsonl(lines, seats=None, seats_column="seats", votes_column="votes"):
+    """Yields records (fields, parties, votes, seats) from lines of JSON objects."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        fields = json.loads(line)
+        try:
+            votes = fields.pop(votes_column)
+            if seats is None:
+                yield fields, None, votes, int(fields[seats_column])
+            else:
+                yield fields, None, votes, seats
+        except KeyError as error:
+            raise ValueError("line {}: field {} missing".format(number, error)) from None
+
+
+def read_csv(lines, seats=None, seats_column="seats", keep=()):
+    """Yields records (fields, parties, votes, seats) from CSV rows (with a header)."""
+    reader = csv.reader(lines)
+    header = next(reader)
+    kept = list(keep)
+    if seats is None:
+        if seats_column not in header:
+            raise ValueError("column " + seats_column + " missing (or use --seats)")
+        kept.append(seats_column)
+    for column in kept:
+        if column not in header:
+            raise ValueError("column " + column + " missing")
+    kept_indices = [header.index(column) for column in kept]
+    vote_indices = [i for i, column in enumerate(header) if column not in kept]
+    parties = [header[i] for i in vote_indices]
+    for number, row in enumerate(reader, start=2):
+        if not row:
+            continue
+        if len(row) != len(header):
+            raise ValueError("line {}: expected {} columns".format(number, len(header)))
+        fields = {column: row[i] for column, i in zip(kept, kept_indices)}
+        votes = [_number(row[i]) for i in vote_indices]
+        yield fields, parties, votes, int(fields[seats_column]) if seats is None else seats
+
+
+def _number(text):
+    text = text.strip()
+    if not text:
+        return 0
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def apportion(
+    records,
+    method,
+    threshold=None,
+    fractions=False,
+    engine="compute",
+    chunksize=10000,
+    workers=1,
+    profile=None,
+):
+    """Yields (fields, parties, seats, tie) for each record (fields, parties, votes, seats).
+
+    Records are processed in chunks of `chunksize`, with workers > 1 in a process pool (with
+    a bounded number of pending chunks, workers=None: one per CPU). The order is preserved.
+    With a Profile, each chunk is profiled (in its process) and the profiles are merged.
+    """
+    records = iter(records)
+    chunks = iter(lambda: list(itertools.islice(records, chunksize)), [])
+    chunks, tasks = itertools.tee(chunks)
+    profiled = profile is not None
+    tasks = (
+        (
+            method,
+            threshold,
+            fractions,
+            engine,
+            profiled,
+            [(votes, seats) for _, _, votes, seats in chunk],
+        )
+        for chunk in tasks
+    )
+    if workers == 1:
+        results = map(_apportion_chunk, tasks)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = _bounded_map(executor, _apportion_chunk, tasks, 2 * (workers or os.cpu_count()))
+    try:
+        for chunk, (chunk_results, chunk_profile) in zip(chunks, results):
+            if chunk_profile is not None:
+                profile.merge(chunk_profile)
+            for (fields, parties, _, _), (seats, tie) in zip(chunk, chunk_results):
+                yield fields, parties, seats, tie
+    finally:
+        if workers != 1:
+            executor.shutdown()
+
+
+def _apportion_chunk(task):
+    """Apportionments and tie indicators of a list of (votes, seats), and their profile."""
+    method, threshold, fractions, engine, profiled, elections = task
+    if engine == "batch":
+        return _apportion_chunk_batch(method, threshold, elections), None
+    if profiled:
+        from apportionment.profiling import Profile
+
+        with Profile() as profile:
+            return _apportion_elections(method, threshold, fractions, elections), profile
+    return _apportion_elections(method, threshold, fractions, elections), None
+
+
+def _apportion_elections(method, threshold, fractions, elections):
+    results = []
+    for votes, seats in elections:
+        result = compute(
+            method,
+            votes,
+            seats,
+            fractions=fractions,
+            threshold=threshold,
+            as_result=True,
+        )
+        results.append((result.tolist(), bool(result.ties)))
+    return results
+
+
+def _apportion_chunk_batch(method, threshold, elections):
+    import numpy as np
+    from apportionment.batch import compute_batch
+
+    results = [None] * len(elections)
+    # compute_batch() requires the same number of parties in all elections
+    groups = {}
+    for index, (votes, _) in enumerate(elections):
+        groups.setdefault(len(votes), []).append(index)
+    for indices in groups.values():
+        votes = np.array([elections[i][0] for i in indices])
+        seats = np.array([elections[i][1] for i in indices])
+        representatives, ties = compute_batch(method, votes, seats, threshold=threshold)
+        for i, row, tie in zip(indices, representatives.tolist(), ties.tolist()):
+            results[i] = (row, tie)
+    return results
+
+
+def write_jsonl(outfile, results):
+    for fields, parties, seats, tie in results:
+        record = dict(fields)
+        record["apportionment"] = seats if parties is None else dict(zip(parties, seats))
+        record["tie"] = tie
+        outfile.write(json.dumps(record) + "\n")
+
+
+def write_csv(outfile, results):
+    writer = None
+    for fields, parties, seats, tie in results:
+        if parties is None:
+            parties = [str(i + 1) for i in range(len(seats))]
+        if writer is None:
+            header = list(fields) + parties + ["tie"]
+            writer = csv.writer(outfile)
+            writer.writerow(header)
+        elif len(fields) + len(parties) + 1 != len(header):
+            raise ValueError("all elections need the same number of parties for CSV output")
+        writer.writerow(list(fields.values()) + seats + [int(tie)])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
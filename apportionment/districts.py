@@ -0,0 +1,261 @@
+"""
+Tiered apportionment over a hierarchy of districts (e.g., regional, state and federal tiers)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+from apportionment.batch import compute_batch
+from apportionment.parallel import _bounded_map
+from apportionment.thresholds import DistrictSeats, as_rule
+
+TIER_VOTES = ["full", "residual"]
+
+
+class Tier:
+    """The districts of one level of a tiered apportionment.
+
+    `seats[d]` is the number of seats of district d, including the seats of its subdistricts
+    (None: the sum of the seats of its subdistricts; required for the lowest tier). `parents[d]`
+    is the district of the next higher tier that contains district d (omitted for the top tier).
+
+    `method` is a method of compute() or "hare": each party receives one seat per full Hare
+    quota (the votes of the district divided by its seats; with quota="parent", of the district
+    of the next higher tier) and the remaining seats are left to higher tiers.
+
+    Above the lowest tier, `votes` determines how the subdistricts are taken into account:
+    with "full" (compensatory) votes, the seats of a party are computed from all its votes in
+    the district and the seats it has won in the subdistricts are subtracted (a party that has
+    won more seats there keeps them and the other parties share the remaining seats); with
+    "residual" votes, the seats not awarded in the subdistricts are apportioned by the votes
+    that were not used there (votes minus seats times the Hare quota, which requires
+    method="hare" in the next lower tier). The Hare quota of such a district is its residual
+    votes divided by its remaining seats.
+    """
+
+    def __init__(self, seats=None, parents=None, method="dhondt", votes="full", quota="own"):
+        if votes not in TIER_VOTES:
+            raise ValueError("votes has to be one of " + ", ".join(TIER_VOTES))
+        if quota not in ["own", "parent"]:
+            raise ValueError("quota has to be own or parent")
+        self.seats = None if seats is None else np.asarray(seats, dtype=int)
+        self.parents = None if parents is None else np.asarray(parents, dtype=int)
+        self.method = method
+        self.votes = votes
+        self.quota = quota
+
+    def __repr__(self):
+        return "Tier(method={!r}, votes={!r}, quota={!r}, districts={})".format(
+            self.method,
+            self.votes,
+            self.quota,
+            None if self.seats is None else len(self.seats),
+        )
+
+
+class TieredResult:
+    """The seats of a tiered apportionment.
+
+    seats[t][d, i] is the number of seats that party i receives in district d of tier t (in
+    addition to its seats in the subdistricts of d), and ties[t][d] indicates whether a tie
+    was broken in this district. `eligible` are the parties that took part in the higher tiers.
+    """
+
+    def __init__(self, seats, ties, parents, eligible):
+        self.seats = seats
+        self.ties = ties
+        self.parents = parents
+        self.eligible = eligible
+
+    def total(self):
+        """The number of seats of each party (in all tiers)."""
+        return sum(seats.sum(axis=0) for seats in self.seats)
+
+    def district_totals(self, tier):
+        """The seats of each party in each district of the given tier (including subdistricts)."""
+        totals = self.seats[0]
+        for t in range(1, tier + 1):
+            totals = _aggregate(totals, self.parents[t - 1], len(self.seats[t])) + self.seats[t]
+        return totals
+
+
+def tiered(tiers, votes, threshold=None, exemption=None, workers=1, chunksize=1000):
+    """Apportions the seats of the tiers (lowest first) given the votes in the lowest tier.
+
+    `votes` is a (districts x parties) matrix of the districts of the lowest tier; the votes
+    of higher districts are the sums over their subdistricts. Each tier is one vectorized pass
+    over all its districts (with compute_batch()); with workers > 1, chunks of `chunksize`
+    districts are apportioned in a process pool (workers=None: one per CPU).
+
+    Above the lowest tier, only parties that pass the threshold (a share of all votes or a
+    rule of apportionment.thresholds, whose DistrictSeats are those of the lowest tier) take
+    part, and parties that have won at least `exemption` seats in the lowest tier.
+
+    For example, the Austrian National Council (regional, state and federal tiers):
+
+        tiered([Tier(regional_seats, states, "hare", quota="parent"),
+                Tier(state_seats, [0] * 9, "hare"),
+                Tier([183], method="dhondt")], votes, threshold=0.04, exemption=1)
+    """
+    tiers = list(tiers)
+    votes = np.asarray(votes)
+    if votes.ndim != 2:
+        raise ValueError("votes has to be a two-dimensional array (districts x parties)")
+    district_seats = _district_seats(tiers, len(votes))
+    if tiers[-1].method == "hare":
+        raise ValueError("the top tier has to award all remaining seats (not method hare)")
+    for lower, tier in zip(tiers, tiers[1:]):
+        if tier.votes == "residual" and lower.method != "hare":
+            raise ValueError("residual votes require method hare in the next lower tier")
+        if tier.votes == "residual" and tier.quota == "parent":
+            raise ValueError("the quota of residual votes is the district's own quota")
+
+    if votes.dtype.kind in "iu":
+        votes = votes.astype(np.int64)
+    # a process pool and the maximal number of pending chunks
+    pool = None
+    if workers != 1:
+        pool = ProcessPoolExecutor(max_workers=workers), 2 * (workers or os.cpu_count())
+    try:
+        eligible = np.ones(votes.shape[1], dtype=bool)
+        full = votes
+        below = np.zeros(votes.shape, dtype=int)
+        residual = None
+        seats = []
+        ties = []
+        for t, tier in enumerate(tiers):
+            if t > 0:
+                parents = tiers[t - 1].parents
+                n = len(district_seats[t])
+                full = _aggregate(full, parents, n)
+                below = _aggregate(below + seats[-1], parents, n)
+                if tier.votes == "residual":
+                    residual = _aggregate(residual, parents, n)
+                if t == 1:
+                    eligible = _eligible(votes, seats[0], threshold, exemption)
+            basis = residual if t > 0 and tier.votes == "residual" else full
+            if t > 0:
+                basis = np.where(eligible, basis, 0)
+            compensatory = t > 0 and tier.votes == "full"
+
+            if tier.method == "hare":
+                if tier.quota == "parent":
+                    parents = tier.parents
+                    quota_votes = _aggregate(full.sum(axis=1), parents, len(district_seats[t + 1]))
+                    quota_votes, quota_seats = quota_votes[parents], district_seats[t + 1][parents]
+                elif t > 0 and tier.votes == "residual":
+                    quota_votes = residual.sum(axis=1)
+                    quota_seats = np.maximum(district_seats[t] - below.sum(axis=1), 0)
+                else:
+                    quota_votes, quota_seats = full.sum(axis=1), district_seats[t]
+                quota_votes = np.maximum(quota_votes, 1)[:, None]
+                entitled = (basis * quota_seats[:, None]) // quota_votes
+                awarded = np.maximum(entitled - below, 0) if compensatory else entitled
+                used = below + awarded if compensatory else awarded
+                quota = quota_votes / np.maximum(quota_seats, 1)[:, None]
+                residual = np.maximum(basis - used * quota, 0)
+                awarded, tie = awarded.astype(int), np.zeros(len(basis), dtype=bool)
+            elif compensatory or t == 0:
+                awarded, tie = _compensate(
+                    tier.method, basis, district_seats[t], below, pool, chunksize
+                )
+            else:
+                available = np.maximum(district_seats[t] - below.sum(axis=1), 0)
+                awarded, tie = _apportion(tier.method, basis, available, pool, chunksize)
+            seats.append(awarded)
+            ties.append(tie)
+    finally:
+        if pool is not None:
+            pool[0].shutdown()
+    return TieredResult(seats, ties, [tier.parents for tier in tiers[:-1]], eligible)
+
+
+def _district_seats(tiers, districts):
+    """The seats of the districts of each tier (sums of the subdistricts where not given)."""
+    if not tiers:
+        raise ValueError("at least one tier is required")
+    if tiers[0].seats is None:
+        raise ValueError("the seats of the lowest tier are required")
+    district_seats = [tiers[0].seats]
+    for t, tier in enumerate(tiers):
+        if len(district_seats[t]) != districts:
+            raise ValueError("tier {}: expected {} districts".format(t, districts))
+        if t + 1 == len(tiers):
+            break
+        if tier.parents is None or len(tier.parents) != districts:
+            raise ValueError("tier {}: parents required for each district".format(t))
+        following = tiers[t + 1]
+        parents = int(tier.parents.max(initial=-1)) + 1
+        if following.seats is None:
+            district_seats.append(
+                np.bincount(tier.parents, district_seats[t], parents).astype(int)
+            )
+        elif parents > len(following.seats):
+            raise ValueError("tier {}: parent district {} does not exist".format(t, parents - 1))
+        else:
+            district_seats.append(following.seats)
+        districts = len(district_seats[t + 1])
+    return district_seats
+
+
+def _aggregate(values, parents, districts):
+    """Row sums of values for each parent district."""
+    totals = np.zeros((districts,) + values.shape[1:], dtype=values.dtype)
+    np.add.at(totals, parents, values)
+    return totals
+
+
+def _eligible(votes, seats, threshold, exemption):
+    """Parties that pass the threshold (on all votes) or the exemption (seats in the lowest
+    tier)."""
+    if threshold is None:
+        return np.ones(votes.shape[1], dtype=bool)
+    rule = as_rule(threshold)
+    if exemption is not None:
+        rule = rule | DistrictSeats(exemption)
+    return rule.mask(votes.sum(axis=0), seats=seats.sum(axis=0))
+
+
+def _compensate(method, votes, seats, below, pool, chunksize):
+    """Seats computed from all votes minus the seats won in subdistricts (`below`).
+
+    Parties with more seats in the subdistricts keep them and are excluded (their seats are
+    subtracted from the district's seats) until no such party is left.
+    """
+    awarded = np.zeros(votes.shape, dtype=int)
+    ties = np.zeros(len(votes), dtype=bool)
+    excluded = np.zeros(votes.shape, dtype=bool)
+    rows = np.arange(len(votes))
+    while len(rows) > 0:
+        available = seats[rows] - np.where(excluded[rows], below[rows], 0).sum(axis=1)
+        entitled, ties[rows] = _apportion(
+            method,
+            np.where(excluded[rows], 0, votes[rows]),
+            np.maximum(available, 0),
+            pool,
+            chunksize,
+        )
+        awarded[rows] = np.where(excluded[rows], 0, entitled - below[rows])
+        overhang = (entitled < below[rows]) & ~excluded[rows]
+        excluded[rows] |= overhang
+        rows = rows[overhang.any(axis=1)]
+    return awarded, ties
+
+
+def _apportion(method, votes, seats, pool, chunksize):
+    """compute_batch() for all rows, in chunks in the process pool if there is one."""
+    if pool is None or len(votes) <= chunksize:
+        return compute_batch(method, votes, seats)
+    tasks = (
+        (method, votes[start : start + chunksize], seats[start : start + chunksize])
+        for start in range(0, len(votes), chunksize)
+    )
+    results = list(_bounded_map(pool[0], _apportion_chunk, tasks, pool[1]))
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+def _apportion_chunk(task):
+    method, votes, seats = task
+    return compute_batch(method, votes, seats)
@@ -0,0 +1,190 @@
+"""
+Incremental apportionment for changing vote counts (e.g., during live counting)
+"""
+
+import bisect
+import heapq
+import numpy as np
+
+from apportionment.methods import (
+    _DIVISOR_RULES,
+    _divisor_order,
+    _divisor_weights,
+    _integer_votes,
+    _as_python,
+    _weights_list,
+    apply_threshold,
+    compute,
+)
+from apportionment.thresholds import Share, ThresholdRule, threshold_mask
+
+
+class Apportioner:
+    """Keeps an apportionment up to date while vote counts change.
+
+    The result is always identical to
+    compute(method, votes, seats, fractions=fractions, threshold=threshold).
+
+    For divisor methods, the seats are the `seats` largest weights votes[i] / d_j (ties broken
+    in favor of parties with smaller index). The last awarded weight and the next weight of
+    each party are kept in two heaps, so an update only touches the parties whose
+    (thresholded) vote count changes and the seats that move between parties: O(log(parties))
+    per moved seat. Parties that cross the threshold are found in a sorted list of vote counts
+    (for threshold rules other than a single share of the votes, all parties are checked).
+
+    The largest remainder method and the quota method (as well as Adams, Dean and
+    Huntington-Hill with fewer seats than parties, and all methods while no party has votes)
+    are recomputed after each update.
+    """
+
+    def __init__(self, method, votes, seats, fractions=False, threshold=None):
+        if method not in ["quota", "lrm", "hamilton", "largest_remainder"] + list(_DIVISOR_RULES):
+            raise NotImplementedError("apportionment method " + method + " not known")
+        self.method = method
+        self.seats = seats
+        self.fractions = fractions
+        self.threshold = threshold
+        # the threshold as a share of the votes (None for other rules)
+        self._share = threshold
+        if isinstance(threshold, Share) and threshold.fraction.ndim == 0:
+            self._share = float(threshold.fraction)
+        elif isinstance(threshold, ThresholdRule):
+            self._share = None
+        self._votes = [_as_python(v) for v in votes]
+        self._total = sum(self._votes)
+        self._sorted = sorted((v, i) for i, v in enumerate(self._votes))
+        self._effective = list(apply_threshold(self._votes, threshold))
+        self._positive = sum(1 for v in self._effective if v > 0)
+        self._rule = _DIVISOR_RULES.get(method)
+        self._rebuild()
+
+    @property
+    def votes(self):
+        return list(self._votes)
+
+    @property
+    def result(self):
+        """The current apportionment (as returned by compute())."""
+        if self._counts is None:
+            return list(self._representatives)
+        return [b + c for b, c in zip(self._base, self._counts)]
+
+    def update(self, party, delta_votes):
+        """Adds delta_votes to the vote count of party (an index) and returns the new result."""
+        delta_votes = _as_python(delta_votes)
+        old = self._votes[party]
+        self._votes[party] = old + delta_votes
+        self._sorted.pop(bisect.bisect_left(self._sorted, (old, party)))
+        bisect.insort(self._sorted, (self._votes[party], party))
+        if isinstance(self._total, int) and isinstance(delta_votes, int):
+            self._total += delta_votes
+        else:
+            self._total = sum(self._votes)
+
+        changed = {party}
+        passed = None
+        if self.threshold is not None and self._share is None:
+            changed = range(len(self._votes))
+            passed = threshold_mask(self._votes, self.threshold).tolist()
+        elif self.threshold is not None:
+            # only parties between the old and the new bar can cross it
+            old_bar = (self._total - delta_votes) * self._share
+            new_bar = self._total * self._share
+            first = bisect.bisect_left(self._sorted, (min(old_bar, new_bar),))
+            last = bisect.bisect_right(self._sorted, (max(old_bar, new_bar), len(self._votes)))
+            changed.update(i for _, i in self._sorted[first:last])
+        min_votes = self._total * self._share if self._share is not None else None
+
+        moved = []
+        for i in changed:
+            vote = self._votes[i]
+            if passed is not None:
+                effective = vote if passed[i] else 0
+            else:
+                effective = 0 if min_votes is not None and vote < min_votes else vote
+            if effective != self._effective[i]:
+                moved.append((i, self._effective[i]))
+                self._positive += (effective > 0) - (self._effective[i] > 0)
+                self._effective[i] = effective
+
+        if self._counts is None or self._positive == 0:
+            self._rebuild()
+        elif self._rule in ["huntington", "adams", "dean"] and any(
+            (self._effective[i] > 0) != (old > 0) for i, old in moved
+        ):
+            # the number of seats that are awarded without divisors has changed
+            self._rebuild()
+        else:
+            for i, _ in moved:
+                self._push(i)
+            self._exchange()
+            if len(self._awarded) + len(self._next) > 4 * len(self._votes) + 64:
+                # drop outdated heap entries
+                self._awarded = [e for e in self._awarded if e[2] == self._version[-e[1]]]
+                self._next = [e for e in self._next if e[2] == self._version[e[1]]]
+                heapq.heapify(self._awarded)
+                heapq.heapify(self._next)
+        return self.result
+
+    def _rebuild(self):
+        parties = len(self._votes)
+        zero_divisor = self._rule in ["huntington", "adams", "dean"]
+        # without votes, compute() awards one (tied) seat per party and not all seats
+        if self._rule is None or (zero_divisor and self.seats < parties) or self._positive == 0:
+            self._counts = None
+            self._representatives = compute(
+                self.method, self._effective, self.seats, fractions=self.fractions
+            )
+            return
+        if zero_divisor:
+            self._base = [1 if v > 0 else 0 for v in self._effective]
+        else:
+            self._base = [0] * parties
+        k = self.seats - sum(self._base)
+        self._counts = [0] * parties
+        if k > 0:
+            order = _divisor_order(np.array(self._effective), k, self._rule, self.fractions)
+            for i in order.tolist():
+                self._counts[i] += 1
+        # heaps of the last awarded weight and of the next weight of each party;
+        # outdated entries are recognized by their version number
+        self._version = [0] * parties
+        self._awarded = []
+        self._next = []
+        for i in range(parties):
+            self._push(i)
+
+    def _weight(self, i, j):
+        if self.fractions:
+            votes = _integer_votes([self._effective[i]])
+        else:
+            votes = np.array([self._effective[i]])
+        weights = _divisor_weights(votes, np.array([j]), self._rule, self.fractions)
+        return _weights_list(weights, self.fractions)[0]
+
+    def _push(self, i):
+        self._version[i] += 1
+        if self._counts[i] > 0:
+            weight = self._weight(i, self._counts[i] - 1)
+            heapq.heappush(self._awarded, (weight, -i, self._version[i]))
+        if self._counts[i] < self.seats:
+            weight = self._weight(i, self._counts[i])
+            heapq.heappush(self._next, (-weight, i, self._version[i]))
+
+    def _top(self, heap):
+        while heap and heap[0][2] != self._version[abs(heap[0][1])]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _exchange(self):
+        # move seats until every awarded weight precedes every other weight
+        # (in the order of weights, with ties broken in favor of smaller indices)
+        while True:
+            worst = self._top(self._awarded)
+            best = self._top(self._next)
+            if worst is None or best is None or (-best[0], -best[1]) <= worst[:2]:
+                return
+            self._counts[best[1]] += 1
+            self._counts[-worst[1]] -= 1
+            self._push(best[1])
+            self._push(-worst[1])
@@ -2,10 +2,29 @@
 Apportionment methods
 """
 
+import array
 from fractions import Fraction
+import heapq
 import math
-import numpy as np
 import string
+import time
+
+
+class _LazyNumpy:
+    """Stands in for the numpy module until it is first used.
+
+    Importing numpy takes longer than most small apportionments, which are computed in pure
+    Python (see _FAST_PATH_MAX_PARTIES). On first use, the real module replaces this object.
+    """
+
+    def __getattr__(self, name):
+        import numpy
+
+        globals()["np"] = numpy
+        return getattr(numpy, name)
+
+
+np = _LazyNumpy()
 
 METHODS = [
     "quota",
@@ -19,10 +38,234 @@ METHODS = [
 ]
 
 
+# names of the divisor methods and the divisor rule they use
+_DIVISOR_RULES = {
+    "dhondt": "dhondt",
+    "jefferson": "dhondt",
+    "greatestdivisors": "dhondt",
+    "saintelague": "saintelague",
+    "webster": "saintelague",
+    "majorfractions": "saintelague",
+    "modified_saintelague": "modified_saintelague",
+    "huntington": "huntington",
+    "hill": "huntington",
+    "equalproportions": "huntington",
+    "adams": "adams",
+    "smallestdivisor": "adams",
+    "dean": "dean",
+    "harmonicmean": "dean",
+}
+
+# up to this size, largest_remainder() and divisor() use a pure-Python implementation
+# (without numpy); larger inputs and verbose output use the numpy implementation
+_FAST_PATH_MAX_PARTIES = 64
+_FAST_PATH_MAX_SEATS = 200
+# exact computations (fractions=True) use int64 arrays if all intermediate values fit
+_INT64_MAX = 2**63 - 1
+# active profiles (see apportionment.profiling); while there are none, each instrumented
+# phase only checks that this list is empty
+_profiles = []
+
+
+def _as_python(number):
+    """A Python number for a numpy scalar (sums of numpy integers can wrap around)."""
+    return number.item() if hasattr(number, "item") else number
+
+
 class TiesException(Exception):
     pass
 
 
+class Tie:
+    """Parties that are tied for the last `contested` seats of an apportionment.
+
+    `tied` contains the indices of the tied parties in the order in which ties are broken
+    (by index). The first `contested` of them receive a seat (winners), the others do not
+    (losers). A Tie is true if it had to be broken, i.e., if there are losers.
+    """
+
+    __slots__ = ("tied", "contested")
+
+    def __init__(self, tied, contested):
+        self.tied = [int(i) for i in tied]
+        self.contested = int(contested)
+
+    @property
+    def winners(self):
+        return self.tied[: self.contested]
+
+    @property
+    def losers(self):
+        return self.tied[self.contested :]
+
+    def __bool__(self):
+        return len(self.tied) > self.contested
+
+    def __repr__(self):
+        return "Tie(tied={}, contested={})".format(self.tied, self.contested)
+
+    def message(self, parties, order=None):
+        """The tiebreaking message of verbose output (with the tiebreaking order, if given)."""
+        message = ""
+        if order is not None:
+            message += "  tiebreaking in order of: " + str(order) + "\n"
+        return (
+            message
+            + "  ties broken in favor of: "
+            + ", ".join(str(parties[i]) for i in self.winners)
+            + "\n  to the disadvantage of: "
+            + ", ".join(str(parties[i]) for i in self.losers)
+        )
+
+
+class ApportionmentResult:
+    """The result of compute(..., as_result=True): the seats and diagnostics of an apportionment.
+
+    `seats` is a compact array of integers and `ties` the list of ties (Tie objects) that were
+    broken. The other diagnostics are computed from the stored votes on first access, so
+    neither the apportionment method nor the diagnostics are ever computed twice. The result
+    behaves like the list of seats returned by compute() (indexing, iteration, comparison).
+    """
+
+    __slots__ = (
+        "seats",
+        "ties",
+        "method",
+        "votes",
+        "filtered_votes",
+        "fractions",
+        "_cutoff",
+        "_quotas",
+        "_within_quota",
+        "_gallagher",
+        "_loosemore_hanby",
+    )
+
+    def __init__(self, seats, ties, method, votes, filtered_votes, fractions=False):
+        self.seats = array.array("q", seats)
+        self.ties = ties
+        self.method = method
+        self.votes = votes
+        self.filtered_votes = filtered_votes
+        self.fractions = fractions
+        self._cutoff = None
+        self._quotas = None
+        self._within_quota = None
+        self._gallagher = None
+        self._loosemore_hanby = None
+
+    @property
+    def house_size(self):
+        return sum(self.seats)
+
+    @property
+    def cutoff(self):
+        """The divisor of a divisor method (the smallest weight votes / d_j of an awarded seat)
+        or the Hare quota (total votes / seats) of the quota and largest remainder methods.
+
+        None if there is no such value (no seats, or for methods with a zero divisor only
+        parties' first seats). Exact (a Fraction) if fractions=True, except for Huntington-Hill.
+        """
+        if self._cutoff is None:
+            self._cutoff = self._compute_cutoff()
+        return self._cutoff
+
+    def _compute_cutoff(self):
+        votes = [int(v) if self.fractions else v for v in self.filtered_votes]
+        seats = self.house_size
+        if seats == 0:
+            return None
+        if self.method not in _DIVISOR_RULES:
+            if self.fractions:
+                return Fraction(sum(votes), seats)
+            return float(sum(votes)) / seats
+        rule = _DIVISOR_RULES[self.method]
+        # seats beyond the first one are awarded by divisors for methods with d_0 = 0
+        offset = 1 if rule in ["huntington", "adams", "dean"] else 0
+        keys = [
+            _divisor_key(v, s - offset - 1, rule, self.fractions)
+            for v, s in zip(votes, self.seats)
+            if s > offset
+        ]
+        if not keys:
+            return None
+        # heap keys sort the largest weight first
+        key = max(keys)
+        if not self.fractions:
+            return -key
+        if rule == "huntington":
+            return math.sqrt(Fraction(key.numerator, key.denominator))
+        return Fraction(key.numerator, key.denominator)
+
+    @property
+    def quotas(self):
+        """The (standard) quotas votes * seats / total votes of the parties."""
+        if self._quotas is None:
+            seats = self.house_size
+            if self.fractions:
+                votes = [int(v) for v in self.filtered_votes]
+                total = sum(votes)
+                self._quotas = [Fraction(v * seats, total) for v in votes]
+            else:
+                total = sum(_as_python(v) for v in self.filtered_votes)
+                self._quotas = [float(v) * seats / total for v in self.filtered_votes]
+        return self._quotas
+
+    @property
+    def within_quota(self):
+        """Whether every party receives its lower or upper quota (see within_quota())."""
+        if self._within_quota is None:
+            self._within_quota = within_quota(self.filtered_votes, self.tolist())
+        return self._within_quota
+
+    def _differences(self):
+        # differences between vote and seat shares (in percent) of the unfiltered votes
+        total = sum(_as_python(v) for v in self.votes)
+        seats = self.house_size
+        return [
+            100 * (float(v) / total - float(s) / seats) for v, s in zip(self.votes, self.seats)
+        ]
+
+    @property
+    def gallagher(self):
+        """The Gallagher (least squares) index of disproportionality (in percent)."""
+        if self._gallagher is None:
+            self._gallagher = math.sqrt(sum(d * d for d in self._differences()) / 2)
+        return self._gallagher
+
+    @property
+    def loosemore_hanby(self):
+        """The Loosemore-Hanby index of disproportionality (in percent)."""
+        if self._loosemore_hanby is None:
+            self._loosemore_hanby = sum(abs(d) for d in self._differences()) / 2
+        return self._loosemore_hanby
+
+    def tolist(self):
+        return self.seats.tolist()
+
+    def __len__(self):
+        return len(self.seats)
+
+    def __iter__(self):
+        return iter(self.seats)
+
+    def __getitem__(self, index):
+        return self.seats[index]
+
+    def __eq__(self, other):
+        if isinstance(other, ApportionmentResult):
+            other = other.seats
+        try:
+            return self.tolist() == list(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "ApportionmentResult(seats={}, method={!r})".format(self.tolist(), self.method)
+
+
 def compute(
     method,
     votes,
@@ -32,47 +275,212 @@ def compute(
     threshold=None,
     tiesallowed=True,
     verbose=False,
+    as_result=False,
+    dtype=None,
+):
+    """Apportions `seats` seats with the given method.
+
+    Returns the list of seats or, with as_result=True, an ApportionmentResult (which also
+    provides the ties, the divisor or quota, and disproportionality indices).
+
+    With fractions=True, the largest remainder method and divisor methods compute with integer
+    arrays of the given dtype: "int64", "uint64" or "object" (Python integers, arbitrary
+    precision). An OverflowError is raised up front if intermediate values do not fit. The
+    default (None) is the cheapest exact choice: int64 if possible, else Python integers. Small
+    inputs and the quota method always use Python integers.
+    """
+    if _profiles:
+        for profile in _profiles:
+            profile.begin(method, votes, seats, fractions)
+        start = time.perf_counter()
+        try:
+            return _compute(
+                method,
+                votes,
+                seats,
+                fractions,
+                parties,
+                threshold,
+                tiesallowed,
+                verbose,
+                as_result,
+                dtype,
+            )
+        finally:
+            seconds = time.perf_counter() - start
+            for profile in _profiles:
+                profile.end(seconds)
+    return _compute(
+        method, votes, seats, fractions, parties, threshold, tiesallowed, verbose, as_result, dtype
+    )
+
+
+def _compute(
+    method, votes, seats, fractions, parties, threshold, tiesallowed, verbose, as_result, dtype
 ):
+    if _profiles:
+        start = time.perf_counter()
     filtered_votes = apply_threshold(votes, threshold)
+    if _profiles:
+        _profile_time("threshold", start)
     if method == "quota":
-        return quota(filtered_votes, seats, fractions, parties, tiesallowed, verbose)
+        representatives, ties = _quota(
+            filtered_votes, seats, fractions, parties, tiesallowed, verbose
+        )
     elif method in ["lrm", "hamilton", "largest_remainder"]:
-        return largest_remainder(filtered_votes, seats, fractions, parties, tiesallowed, verbose)
-    elif method in [
-        "dhondt",
-        "jefferson",
-        "saintelague",
-        "webster",
-        "modified_saintelague",
-        "huntington",
-        "hill",
-        "adams",
-        "dean",
-        "smallestdivisor",
-        "harmonicmean",
-        "equalproportions",
-        "majorfractions",
-        "greatestdivisors",
-    ]:
-        return divisor(filtered_votes, seats, method, fractions, parties, tiesallowed, verbose)
+        representatives, ties = _largest_remainder(
+            filtered_votes, seats, fractions, parties, tiesallowed, verbose, dtype
+        )
+    elif method in _DIVISOR_RULES:
+        representatives, ties = _divisor(
+            filtered_votes, seats, method, fractions, parties, tiesallowed, verbose, dtype
+        )
     else:
         raise NotImplementedError("apportionment method " + method + " not known")
+    if as_result:
+        return ApportionmentResult(representatives, ties, method, votes, filtered_votes, fractions)
+    return representatives
+
+
+def _profile_time(phase, start):
+    """Adds the time since `start` to the phase of all active profiles; returns the time."""
+    now = time.perf_counter()
+    for profile in _profiles:
+        profile.add_time(phase, now - start)
+    return now
+
+
+def _profile_count(counter, value=1):
+    for profile in _profiles:
+        profile.count(counter, value)
+
+
+def _profile_ties(tie):
+    _profile_count("ties")
+    _profile_count("tied parties", len(tie.tied))
+
+
+def _profile_fast_path(result, start):
+    """Records a (representatives, ties) result of the pure-Python implementation."""
+    _profile_time("fast path", start)
+    _profile_count("fast path calls")
+    for tie in result[1]:
+        _profile_ties(tie)
+    return result
+
+
+def compute_labeled(method, votes, seats, field="votes", **options):
+    """compute() for vote counts with party identifiers; the result is aligned to the input.
+
+    `votes` can be
+    - a mapping {party: votes}: returns a dict {party: seats} (in the same order),
+    - a pandas Series indexed by party: returns a Series with the same index,
+    - a numpy structured array with a field `field` (the vote counts): returns a structured
+      array with the other fields and a field "seats".
+    The identifiers are used as party labels in verbose output. Other keyword arguments are
+    passed to compute().
+    """
+    if hasattr(votes, "keys") and hasattr(votes, "values") and not hasattr(votes, "index"):
+        parties = list(votes.keys())
+        representatives = compute(method, list(votes.values()), seats, parties=parties, **options)
+        return dict(zip(parties, representatives))
+    if hasattr(votes, "index") and hasattr(votes, "to_numpy"):
+        # pandas Series (constructed without importing pandas)
+        representatives = compute(method, votes.to_numpy(), seats, parties=votes.index, **options)
+        return type(votes)(list(representatives), index=votes.index, name="seats")
+    names = getattr(getattr(votes, "dtype", None), "names", None)
+    if names is not None:
+        if field not in names:
+            raise ValueError("structured array has no field " + field)
+        others = [name for name in names if name != field]
+        parties = votes[others[0]] if others else string.ascii_letters
+        representatives = compute(method, votes[field], seats, parties=parties, **options)
+        result = np.zeros(
+            len(votes), dtype=[(name, votes.dtype[name]) for name in others] + [("seats", int)]
+        )
+        for name in others:
+            result[name] = votes[name]
+        result["seats"] = representatives
+        return result
+    raise TypeError("votes has to be a mapping, a pandas Series or a structured array")
 
 
 def apply_threshold(votes, threshold):
-    """Sets vote counts to 0 if threshold is not met."""
-    if threshold is not None:
-        v = []
-        combined_votes = sum(votes)
-        min_votes = combined_votes * threshold
-        for vote in votes:
-            if vote < min_votes:
-                v.append(0)
-            else:
-                v.append(vote)
-        return v
-    else:
+    """Sets vote counts to 0 if threshold is not met.
+
+    `threshold` is a share of all votes (e.g., 0.04) or a rule of apportionment.thresholds.
+    Numpy arrays are filtered in one vectorized operation; lists remain lists.
+    """
+    if threshold is None:
         return votes
+    if hasattr(threshold, "mask"):
+        passed = threshold.mask(votes)
+    elif isinstance(votes, list):
+        min_votes = sum(votes) * threshold
+        return [0 if vote < min_votes else vote for vote in votes]
+    else:
+        votes = np.asarray(votes)
+        passed = votes >= votes.sum() * threshold
+    if isinstance(votes, list):
+        return [vote if p else 0 for vote, p in zip(votes, passed.tolist())]
+    return np.where(passed, votes, 0)
+
+
+def _integer_votes(votes, bound=None, dtype=None):
+    """Vote counts as an integer array (for exact computations).
+
+    `bound(largest)` is the largest intermediate value of the computation if the largest
+    vote count is `largest`. The array has the cheapest dtype that represents all these values
+    exactly: int64 if possible, otherwise an object array of Python integers (also if bound is
+    None). An explicit dtype ("int64", "uint64" or "object") raises an OverflowError if the
+    values do not fit.
+    """
+    values = [int(p) for p in np.asarray(votes).tolist()]
+    largest = max(map(abs, values), default=0)
+    if bound is not None:
+        largest = max(largest, bound(largest))
+    if dtype is None:
+        if bound is None or largest > _INT64_MAX:
+            dtype = "object"
+        else:
+            dtype = "int64"
+    elif dtype not in ["int64", "uint64", "object"]:
+        raise ValueError("dtype has to be int64, uint64, object or None")
+    elif dtype != "object":
+        if largest > int(np.iinfo(dtype).max) or (
+            dtype == "uint64" and min(values, default=0) < 0
+        ):
+            raise OverflowError("intermediate values exceed the range of " + dtype)
+    if _profiles:
+        _profile_count(dtype + " arrays")
+    return np.array(values, dtype=dtype)
+
+
+class _ExtendedLabels:
+    """Party labels followed by the party indices (for parties without a label)."""
+
+    __slots__ = ("labels", "length")
+
+    def __init__(self, labels, length):
+        self.labels = labels
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < len(self.labels):
+            return self.labels[index]
+        return index
+
+
+def _labels(parties, length):
+    """The party labels (any sequence or array), extended to `length` labels if necessary."""
+    if len(parties) >= length:
+        return parties
+    return _ExtendedLabels(parties, length)
 
 
 def __print_results(representatives, parties):
@@ -84,37 +492,62 @@ def __print_results(representatives, parties):
 # verifies whether a given assignment of representatives
 # is within quota
 def within_quota(votes, representatives, parties=string.ascii_letters, verbose=False):
-    n = sum(votes)
-    seats = sum(representatives)
-    within = True
-    for i in range(len(votes)):
-        upperquota = int(math.ceil(float(votes[i]) * seats / n))
-        if representatives[i] > upperquota:
-            if verbose:
-                print(
-                    "upper quota of party",
-                    parties[i],
-                    "violated: quota is",
-                    float(votes[i]) * seats / n,
-                    "but has",
-                    representatives[i],
-                    "representatives",
-                )
-            within = False
-        lowerquota = int(math.floor(float(votes[i]) * seats / n))
-        if representatives[i] < lowerquota:
-            if verbose:
-                print(
-                    "lower quota of party",
-                    parties[i],
-                    "violated: quota is",
-                    float(votes[i]) * seats / n,
-                    "but has only",
-                    representatives[i],
-                    "representatives",
-                )
-            within = False
-    return within
+    """Whether every party receives its lower or upper quota (compared exactly)."""
+    upper, lower = _quota_violations([votes], [representatives])
+    if verbose:
+        parties = _labels(parties, len(votes))
+        n = sum(votes)
+        seats = sum(representatives)
+        for i in np.nonzero(upper[0] | lower[0])[0].tolist():
+            print(
+                ("upper" if upper[0, i] else "lower") + " quota of party",
+                parties[i],
+                "violated: quota is",
+                float(votes[i]) * seats / n,
+                "but has" if upper[0, i] else "but has only",
+                representatives[i],
+                "representatives",
+            )
+    return not (upper.any() or lower.any())
+
+
+def _quota_violations(votes, representatives):
+    """Exact upper and lower quota violations of the apportionments in the rows of a matrix.
+
+    With the quota q = votes * seats / total, the upper quota is violated if representatives >
+    ceil(q), i.e., if (representatives - 1) * total >= votes * seats, and the lower quota if
+    (representatives + 1) * total <= votes * seats. These products are compared as int64 if
+    they fit and as Python integers otherwise; non-integral vote counts are converted to
+    Fractions. Rows without votes have no quotas (and no violations).
+    """
+    representatives = np.asarray(representatives, dtype=np.int64)
+    votes = np.broadcast_to(np.asarray(votes), representatives.shape)
+    if votes.dtype.kind == "f" and (
+        not np.all(np.floor(votes) == votes) or np.abs(votes).max(initial=0) >= 2**62
+    ):
+        votes = np.array([Fraction(v) for v in votes.ravel().tolist()], dtype=object)
+        votes = votes.reshape(representatives.shape)
+        representatives = representatives.astype(object)
+    else:
+        votes = votes.astype(np.int64) if votes.dtype.kind == "f" else votes
+        # (bounds of votes * seats and (representatives + 1) * total)
+        largest = int(np.abs(votes).max(initial=0))
+        seats = int(np.abs(representatives).sum(axis=1).max(initial=0))
+        total = largest * representatives.shape[1]
+        if (
+            max(largest * seats, (int(np.abs(representatives).max(initial=0)) + 1) * total)
+            > _INT64_MAX
+        ):
+            votes, representatives = votes.astype(object), representatives.astype(object)
+        else:
+            votes = votes.astype(np.int64)
+    seats = representatives.sum(axis=1, keepdims=True)
+    total = votes.sum(axis=1, keepdims=True)
+    scaled = votes * seats
+    counted = total != 0
+    upper = ((representatives - 1) * total >= scaled) & counted
+    lower = ((representatives + 1) * total <= scaled) & counted
+    return upper, lower
 
 
 # Largest remainder method (Hamilton method)
@@ -125,51 +558,76 @@ def largest_remainder(
     parties=string.ascii_letters,
     tiesallowed=True,
     verbose=False,
+    dtype=None,
 ):
+    return _largest_remainder(votes, seats, fractions, parties, tiesallowed, verbose, dtype)[0]
+
+
+def _largest_remainder(votes, seats, fractions, parties, tiesallowed, verbose, dtype=None):
+    """largest_remainder(), returning the apportionment and a list of (broken) ties."""
     # votes = np.array(votes)
     if verbose:
+        parties = _labels(parties, len(votes))
         print("\nLargest remainder method with Hare quota (Hamilton)")
+    if _use_fast_path(votes, seats, fractions, verbose) and (
+        fractions or all(isinstance(v, int) for v in votes)
+    ):
+        # (float vote counts are summed by numpy, which may differ in the last bit)
+        if not _profiles:
+            return _largest_remainder_small(votes, seats, fractions, tiesallowed)
+        start = time.perf_counter()
+        return _profile_fast_path(
+            _largest_remainder_small(votes, seats, fractions, tiesallowed), start
+        )
+    if _profiles:
+        start = time.perf_counter()
     if fractions:
-        q = Fraction(int(sum(votes)), seats)
-        quotas = [Fraction(int(p), q) for p in votes]
-        representatives = np.array([int(qu.numerator // qu.denominator) for qu in quotas])
+        # exact quotas votes * seats / total, as integers with the common denominator total
+        # (intermediate values: votes * seats and the total)
+        # (the total is at most largest * len(votes))
+        votes = _integer_votes(votes, lambda largest: largest * max(seats, len(votes)), dtype)
+        total = int(votes.sum())
+        total = _check_total(total, seats)
+        quotas = votes * seats
+        representatives = (quotas // total).astype(int)
+        remainders = quotas % total
     else:
+        # (floating-point products cannot overflow, unlike those of int32 or int64 arrays)
         votes = np.array(votes)
-        quotas = (votes * seats) / np.sum(votes)
+        # (sums of int32 arrays would wrap around)
+        total = votes.sum(dtype=np.int64) if votes.dtype.kind == "i" else np.sum(votes)
+        total = _check_total(total, seats)
+        quotas = (votes.astype(float) * seats) / total
         representatives = np.int_(np.trunc(quotas))
-
-    ties = False
-    if np.sum(representatives) < seats:
         remainders = quotas - representatives
-        cutoff = remainders[np.argsort(remainders)[np.sum(representatives) - seats]]
-        tiebreaking_message = (
-            "  tiebreaking in order of: "
-            + str(parties[: len(votes)])
-            + "\n  ties broken in favor of: "
-        )
-        for i in range(len(votes)):
-            reps_sum = np.sum(representatives)
-            if reps_sum == seats and remainders[i] >= cutoff:
-                if not ties:
-                    tiebreaking_message = tiebreaking_message[:-2]
-                    tiebreaking_message += "\n  to the disadvantage of: "
-                    ties = True
-                tiebreaking_message += parties[i] + ", "
-            elif reps_sum < seats and remainders[i] > cutoff:
-                representatives[i] += 1
-            elif reps_sum < seats and remainders[i] == cutoff:
-                tiebreaking_message += parties[i] + ", "
-                representatives[i] += 1
-        if ties and verbose:
-            print(tiebreaking_message[:-2])
+    if _profiles:
+        start = _profile_time("quotas", start)
 
-    if ties and not tiesallowed:
+    tie = None
+    available = seats - np.sum(representatives)
+    if available > 0:
+        # all remainders larger than the available-th largest one receive a seat,
+        # the remaining seats go to the parties with exactly this remainder
+        cutoff = np.sort(remainders)[-available]
+        above = np.asarray(remainders > cutoff, dtype=bool)
+        representatives += above
+        tie = Tie(np.nonzero(remainders == cutoff)[0], available - np.count_nonzero(above))
+        representatives[tie.winners] += 1
+        if tie and verbose:
+            print(tie.message(parties, order=parties[: len(votes)]))
+    if _profiles:
+        _profile_time("remainders", start)
+        _profile_count("sorted weights", len(remainders))
+        if tie:
+            _profile_ties(tie)
+
+    if tie and not tiesallowed:
         raise TiesException("Tie occurred")
 
     if verbose:
         __print_results(representatives, parties)
 
-    return representatives.tolist()
+    return representatives.tolist(), [tie] if tie else []
 
 
 # Divisor methods
@@ -181,128 +639,643 @@ def divisor(
     parties=string.ascii_letters,
     tiesallowed=True,
     verbose=False,
+    dtype=None,
 ):
+    return _divisor(votes, seats, method, fractions, parties, tiesallowed, verbose, dtype)[0]
+
+
+def _divisor(votes, seats, method, fractions, parties, tiesallowed, verbose, dtype=None):
+    """divisor(), returning the apportionment and a list of (broken) ties."""
+    if method in _DIVISOR_RULES and _use_fast_path(votes, seats, fractions, verbose):
+        if not _profiles:
+            return _divisor_small(votes, seats, _DIVISOR_RULES[method], fractions, tiesallowed)
+        start = time.perf_counter()
+        return _profile_fast_path(
+            _divisor_small(votes, seats, _DIVISOR_RULES[method], fractions, tiesallowed), start
+        )
+    if _profiles:
+        start = time.perf_counter()
     votes = np.array(votes)
     representatives = np.zeros(len(votes), dtype=int)
+    ties = []
+    if verbose:
+        parties = _labels(parties, len(votes))
     if method in ["dhondt", "jefferson", "greatestdivisors"]:
         if verbose:
             print("\nD'Hondt (Jefferson) method")
-        divisors = np.arange(seats) + 1
+        rule = "dhondt"
     elif method in ["saintelague", "webster", "majorfractions"]:
         if verbose:
             print("\nSainte Lague (Webster) method")
-        divisors = 2 * np.arange(seats) + 1
+        rule = "saintelague"
     elif method in ["modified_saintelague"]:
         if verbose:
             print("\nModified Sainte Lague (Webster) method")
-        divisors = np.insert(2 * np.arange(1.0, seats) + 1, 0, 1.4)
+        rule = "modified_saintelague"
     elif method in ["huntington", "hill", "equalproportions"]:
         if verbose:
             print("\nHuntington-Hill method")
         if seats < len(votes):
-            representatives = __divzero_fewerseatsthanparties(
+            representatives, ties = __divzero_fewerseatsthanparties(
                 votes, seats, parties, tiesallowed, verbose
             )
         else:
             representatives = np.where(votes > 0, 1, 0)
-            divisors = np.arange(seats)
-            divisors = np.sqrt((divisors + 1) * (divisors + 2))
+        rule = "huntington"
     elif method in ["adams", "smallestdivisor"]:
         if verbose:
             print("\nAdams method")
         if seats < len(votes):
-            representatives = __divzero_fewerseatsthanparties(
+            representatives, ties = __divzero_fewerseatsthanparties(
                 votes, seats, parties, tiesallowed, verbose
             )
         else:
             representatives = np.where(votes > 0, 1, 0)
-            divisors = np.arange(seats) + 1
+        rule = "adams"
     elif method in ["dean", "harmonicmean"]:
         if verbose:
             print("\nDean method")
         if seats < len(votes):
-            representatives = __divzero_fewerseatsthanparties(
+            representatives, ties = __divzero_fewerseatsthanparties(
                 votes, seats, parties, tiesallowed, verbose
             )
         else:
-            representatives = np.array([1 if p > 0 else 0 for p in votes])
-            if fractions:
-                divisors = np.array(
-                    [Fraction(2 * (i + 1) * (i + 2), 2 * (i + 1) + 1) for i in range(seats)]
-                )
-            else:
-                divisors = np.arange(seats)
-                divisors = (2 * (divisors + 1) * (divisors + 2)) / (2 * (divisors + 1) + 1)
+            representatives = np.where(votes > 0, 1, 0)
+        rule = "dean"
     else:
         raise NotImplementedError("divisor method " + method + " not known")
+    if _profiles:
+        start = _profile_time("setup", start)
     # assigning representatives
     if seats > np.sum(representatives):
-        if fractions and method not in ["huntington", "hill", "modified_saintelague"]:
-            weights = np.array([[Fraction(int(p), d) for d in divisors.tolist()] for p in votes])
-            flatweights = sorted([w for l in weights for w in l])
-        else:
-            weights = np.array([p / divisors for p in votes])
-            flatweights = np.sort(weights, axis=None)
-        minweight = flatweights[-seats + np.sum(representatives)]
-
-        representatives += np.count_nonzero(weights > minweight, axis=1)
+        minweight, counts, tied = _divisor_cutoff(
+            votes, seats - np.sum(representatives), seats, rule, fractions, dtype
+        )
+        representatives += counts
+    if _profiles:
+        start = _profile_time("cutoff", start)
 
-    ties = False
-    # dealing with ties
+    # dealing with ties: the remaining seats go to the parties whose next weight is minweight
     if seats > np.sum(representatives):
-        tiebreaking_message = (
-            "  tiebreaking in order of: "
-            + str(parties[: len(votes)])
-            + "\n  ties broken in favor of: "
-        )
-        for i in range(len(votes)):
-            if np.sum(representatives) == seats and minweight in weights[i]:
-                if not ties:
-                    if not tiesallowed:
-                        raise TiesException("Tie occurred")
-                    tiebreaking_message = tiebreaking_message[:-2]
-                    tiebreaking_message += "\n  to the disadvantage of: "
-                    ties = True
-                tiebreaking_message += parties[i] + ", "
-            if np.sum(representatives) < seats and minweight in weights[i]:
-                tiebreaking_message += parties[i] + ", "
+        tie = Tie(np.nonzero(tied)[0], seats - np.sum(representatives))
+        representatives[tie.winners] += 1
+        if tie and not tiesallowed:
+            raise TiesException("Tie occurred")
+        if tie and verbose:
+            print(tie.message(parties, order=parties[: len(votes)]))
+        if tie:
+            ties = [tie]
+    if _profiles:
+        _profile_time("ties", start)
+        for tie in ties:
+            _profile_ties(tie)
+
+    if verbose:
+        __print_results(representatives, parties)
+
+    return representatives.tolist(), ties
+
+
+def _use_fast_path(votes, seats, fractions, verbose):
+    """Whether to use the pure-Python implementation (small inputs, some positive votes)."""
+    return (
+        not verbose
+        and 0 < len(votes) <= _FAST_PATH_MAX_PARTIES
+        and seats <= _FAST_PATH_MAX_SEATS
+        and any((int(v) if fractions else v) > 0 for v in votes)
+    )
+
+
+def _check_total(total, seats):
+    """The total as the denominator of the quotas; a ValueError if seats are apportioned
+    without votes (the quotas are undefined)."""
+    if total == 0:
+        if seats > 0:
+            raise ValueError("the largest remainder method requires at least one vote")
+        # (without seats, all quotas are 0)
+        return 1
+    return total
+
+
+def _largest_remainder_small(votes, seats, fractions, tiesallowed):
+    """Pure-Python largest_remainder() (without verbose output)."""
+    # (numpy integers of the votes would wrap around)
+    total = sum(int(v) for v in votes) if fractions else sum(votes)
+    total = _check_total(total, seats)
+    if fractions:
+        quotas = [int(v) * seats for v in votes]
+        representatives = [q // total for q in quotas]
+        remainders = [q % total for q in quotas]
+    else:
+        quotas = [v * seats / total for v in votes]
+        representatives = [int(q) for q in quotas]
+        remainders = [q - r for q, r in zip(quotas, representatives)]
+
+    ties = []
+    available = seats - sum(representatives)
+    if available > 0:
+        cutoff = sorted(remainders)[-available]
+        tied = []
+        for i, remainder in enumerate(remainders):
+            if remainder > cutoff:
                 representatives[i] += 1
-        if ties and verbose:
-            print(tiebreaking_message[:-2])
+                available -= 1
+            elif remainder == cutoff:
+                tied.append(i)
+        for i in tied[:available]:
+            representatives[i] += 1
+        if len(tied) > available:
+            ties = [Tie(tied, available)]
 
     if ties and not tiesallowed:
         raise TiesException("Tie occurred")
+    return representatives, ties
 
-    if verbose:
-        __print_results(representatives, parties)
 
-    return representatives.tolist()
+def _divisor_small(votes, seats, rule, fractions, tiesallowed):
+    """Pure-Python divisor() (without verbose output): awards seats one by one from a heap."""
+    if rule in ["huntington", "adams", "dean"]:
+        if seats < len(votes):
+            return _divzero_small(votes, seats, tiesallowed)
+        representatives = [1 if v > 0 else 0 for v in votes]
+    else:
+        representatives = [0] * len(votes)
+    if fractions:
+        votes = [int(v) for v in votes]
+
+    k = seats - sum(representatives)
+    ties = []
+    if k > 0:
+        if _profiles:
+            _profile_count("heap steps", int(k))
+        counts = [0] * len(votes)
+        heap = [(_divisor_key(v, 0, rule, fractions), i) for i, v in enumerate(votes)]
+        heapq.heapify(heap)
+        for _ in range(k):
+            key, i = heap[0]
+            counts[i] += 1
+            if counts[i] < seats:
+                heapq.heapreplace(heap, (_divisor_key(votes[i], counts[i], rule, fractions), i))
+            else:
+                heapq.heappop(heap)
+        if len(heap) > 0 and heap[0][0] == key:
+            # winners: last awarded seat at the cutoff weight, losers: next seat at the cutoff
+            winners = [
+                i
+                for i in range(len(votes))
+                if counts[i] > 0 and _divisor_key(votes[i], counts[i] - 1, rule, fractions) == key
+            ]
+            losers = [
+                i
+                for i in range(len(votes))
+                if counts[i] < seats and _divisor_key(votes[i], counts[i], rule, fractions) == key
+            ]
+            ties = [Tie(winners + losers, len(winners))]
+        representatives = [r + c for r, c in zip(representatives, counts)]
+
+    if ties and not tiesallowed:
+        raise TiesException("Tie occurred")
+    return representatives, ties
+
+
+def _divzero_small(votes, seats, tiesallowed):
+    """Pure-Python __divzero_fewerseatsthanparties() (without verbose output)."""
+    representatives = [0] * len(votes)
+    if seats == 0:
+        return representatives, []
+    mincount = sorted(votes)[-seats]
+    tied = []
+    for i, v in enumerate(votes):
+        if v > mincount:
+            representatives[i] = 1
+            seats -= 1
+        elif v == mincount:
+            tied.append(i)
+    for i in tied[:seats]:
+        representatives[i] = 1
+    ties = [Tie(tied, seats)] if len(tied) > seats else []
+    if ties and not tiesallowed:
+        raise TiesException("Tie occurred")
+    return representatives, ties
+
+
+# Divisors d_j (j = 0, 1, 2, ...) of the divisor methods are approximately a * (j + b).
+# This approximation is only used to find a good starting point for _divisor_cutoff().
+_DIVISOR_SHAPE = {
+    "dhondt": (1, 1),
+    "saintelague": (2, 0.5),
+    "modified_saintelague": (2, 0.5),
+    "huntington": (1, 1.5),
+    "adams": (1, 1),
+    "dean": (1, 1.5),
+}
+
+
+def _divisor_values(rule, j):
+    """The divisors d_j of a divisor method for an array j of seat indices."""
+    if rule in ["dhondt", "adams"]:
+        return j + 1
+    elif rule == "saintelague":
+        return 2 * j + 1
+    elif rule == "modified_saintelague":
+        return np.where(j == 0, 1.4, 2.0 * j + 1)
+    elif rule == "huntington":
+        return np.sqrt((j + 1) * (j + 2))
+    elif rule == "dean":
+        return (2 * (j + 1) * (j + 2)) / (2 * (j + 1) + 1)
+    raise NotImplementedError("divisor method " + rule + " not known")
+
+
+class _DescendingRatio:
+    """An exact weight numerator / denominator that sorts before all smaller weights.
+
+    Used as heap key instead of Fraction (which is slower to create and to compare).
+    """
+
+    __slots__ = ("numerator", "denominator")
+
+    def __init__(self, numerator, denominator):
+        self.numerator = numerator
+        self.denominator = denominator
+
+    def __lt__(self, other):
+        return self.numerator * other.denominator > other.numerator * self.denominator
+
+    def __eq__(self, other):
+        return self.numerator * other.denominator == other.numerator * self.denominator
+
+
+def _divisor_key(vote, j, rule, fractions):
+    """Heap key of the weight vote / d_j of a single party (the largest weight comes first).
+
+    The weight is -vote / d_j (a float) or, with fractions=True, a _DescendingRatio. Computes
+    the same values as _divisor_values() and _divisor_weights().
+    """
+    if rule in ["dhondt", "adams"]:
+        numerator, denominator = vote, j + 1
+    elif rule == "saintelague":
+        numerator, denominator = vote, 2 * j + 1
+    elif rule == "modified_saintelague":
+        if not fractions:
+            return -vote / (1.4 if j == 0 else 2.0 * j + 1)
+        numerator, denominator = (5 * vote, 7) if j == 0 else (vote, 2 * j + 1)
+    elif rule == "huntington":
+        if not fractions:
+            return -vote / math.sqrt((j + 1) * (j + 2))
+        numerator, denominator = vote * vote, (j + 1) * (j + 2)
+    elif rule == "dean":
+        if not fractions:
+            return -vote / ((2 * (j + 1) * (j + 2)) / (2 * (j + 1) + 1))
+        numerator, denominator = vote * (2 * j + 3), 2 * (j + 1) * (j + 2)
+    else:
+        raise NotImplementedError("divisor method " + rule + " not known")
+    if fractions:
+        return _DescendingRatio(numerator, denominator)
+    return -numerator / denominator
+
+
+def _divisor_weights(votes, j, rule, fractions):
+    """The weights votes[i] / d_j[i] for parallel arrays of vote counts and seat indices.
+
+    With fractions=True, `votes` has to be an integer array (see _exact_votes()) and the weights
+    are returned as a pair (numerators, denominators) of arrays of the same dtype. For
+    Huntington-Hill, these represent the squared weights (which are ordered in the same way).
+    """
+    if not fractions:
+        return votes / _divisor_values(rule, j)
+    j = j.astype(votes.dtype)
+    if rule in ["dhondt", "adams"]:
+        return votes, j + 1
+    elif rule == "saintelague":
+        return votes, 2 * j + 1
+    elif rule == "modified_saintelague":
+        # the first divisor is 1.4 = 7/5
+        return np.where(j == 0, 5 * votes, votes), np.where(j == 0, 7, 2 * j + 1)
+    elif rule == "huntington":
+        return votes * votes, (j + 1) * (j + 2)
+    elif rule == "dean":
+        return votes * (2 * j + 3), 2 * (j + 1) * (j + 2)
+    raise NotImplementedError("divisor method " + rule + " not known")
+
+
+def _exact_votes(votes, rule, length, dtype=None):
+    """Vote counts as an integer array for exact weights with divisor indices j < length.
+
+    The bound covers the cross products of _weights_greater() for weights of this range.
+    """
+    n = length + 1
+    numerator, denominator = {
+        "dhondt": (lambda largest: largest, n),
+        "adams": (lambda largest: largest, n),
+        "saintelague": (lambda largest: largest, 2 * n),
+        "modified_saintelague": (lambda largest: 5 * largest, 2 * n + 7),
+        "huntington": (lambda largest: largest * largest, n * (n + 1)),
+        "dean": (lambda largest: largest * (2 * n + 1), 2 * n * (n + 1)),
+    }[rule]
+    return _integer_votes(votes, lambda largest: numerator(largest) * denominator, dtype)
+
+
+def _cross_products(weights, x):
+    """numerators * x.denominator and x.numerator * denominators (exact).
+
+    Thresholds x that are not weights of the same range (e.g., estimated divisors) may have
+    larger numerators or denominators; these products are computed with Python integers.
+    """
+    numerators, denominators = weights
+    if numerators.dtype != object and len(numerators) > 0:
+        limit = int(np.iinfo(numerators.dtype).max)
+        if (
+            int(numerators.max()) * x.denominator > limit
+            or x.numerator * int(denominators.max()) > limit
+        ):
+            numerators, denominators = numerators.astype(object), denominators.astype(object)
+    return numerators * x.denominator, x.numerator * denominators
+
+
+def _weights_greater(weights, x, fractions):
+    """Elementwise weights > x (with fractions=True, x is a Fraction)."""
+    if not fractions:
+        return weights > x
+    left, right = _cross_products(weights, x)
+    return left > right
+
+
+def _weights_equal(weights, x, fractions):
+    """Elementwise weights == x (with fractions=True, x is a Fraction)."""
+    if not fractions:
+        return weights == x
+    left, right = _cross_products(weights, x)
+    return left == right
+
+
+def _weights_list(weights, fractions):
+    """The weights as a list of floats (or Fractions)."""
+    if not fractions:
+        return weights.tolist()
+    numerators, denominators = weights
+    if _profiles:
+        _profile_count("Fraction objects", len(numerators))
+    return [Fraction(n, d) for n, d in zip(numerators.tolist(), denominators.tolist())]
+
+
+def _count_above(votes, x, length, rule, fractions, guess):
+    """Counts for each party the weights votes[i] / d_j (j < length) that are larger than x.
+
+    `guess` is an estimate of this count; the cost depends on how far off it is.
+    """
+    counts = np.clip(guess, 0, length).astype(int)
+    active = np.nonzero(counts < length)[0]
+    while len(active) > 0:
+        if _profiles:
+            _profile_count("compared weights", len(active))
+        weights = _divisor_weights(votes[active], counts[active], rule, fractions)
+        active = active[_weights_greater(weights, x, fractions)]
+        counts[active] += 1
+        active = active[counts[active] < length]
+    active = np.nonzero(counts > 0)[0]
+    while len(active) > 0:
+        if _profiles:
+            _profile_count("compared weights", len(active))
+        weights = _divisor_weights(votes[active], counts[active] - 1, rule, fractions)
+        active = active[~_weights_greater(weights, x, fractions)]
+        counts[active] -= 1
+        active = active[counts[active] > 0]
+    return counts
+
+
+def _divisor_cutoff(votes, k, length, rule, fractions, dtype=None):
+    """Finds the k-th largest weight votes[i] / d_j (with j < length) of a divisor method.
+
+    Instead of sorting the full (parties x length) weight matrix, a divisor estimated from
+    votes/seats is corrected a few times and only weights close to the cutoff are inspected.
+    Requires O(len(votes)) memory and (typically) O(len(votes) * log(len(votes))) time.
+
+    With fractions=True, weights are compared exactly by integer cross-multiplication; the
+    cutoff weight is then returned as a Fraction (squared for Huntington-Hill).
+
+    Returns the cutoff weight (minweight), the number of weights per party that are strictly
+    larger than minweight and a boolean array of parties that have a weight equal to minweight.
+    """
+    a, b = _DIVISOR_SHAPE[rule]
+    float_votes = votes.astype(float)
+    if fractions:
+        votes = _exact_votes(votes, rule, length, dtype)
+    total = float(np.sum(float_votes))
+    positive = int(np.count_nonzero(votes > 0))
+    if positive == 0:
+        counts = np.zeros(len(votes), dtype=int)
+        minweight = _weights_list(
+            _divisor_weights(votes[:1], counts[:1], rule, fractions), fractions
+        )[0]
+        return minweight, counts, np.ones(len(votes), dtype=bool)
+
+    def estimate(x):
+        return np.ceil(np.clip(float_votes / (a * x) - b, -1, length))
+
+    def count(x):
+        if fractions:
+            # (a nearby fraction with a small denominator is as good an estimate)
+            threshold = Fraction(x).limit_denominator(max(1 << 20, int((1 << 20) / x)))
+            if rule == "huntington":
+                threshold = threshold**2
+        else:
+            threshold = x
+        if _profiles:
+            _profile_count("divisor estimates")
+        return _count_above(votes, threshold, length, rule, fractions, estimate(x))
+
+    # jump start: the standard divisor (votes/seats), corrected for the rounding offset
+    offset = positive * (b - 0.5)
+    x = total / (a * (k + offset))
+    counts = count(x)
+    for _ in range(8):
+        m = int(np.sum(counts))
+        if abs(m - k) <= positive:
+            break
+        x = x * max(m + offset, 0.5) / (k + offset)
+        counts = count(x)
+
+    # remaining corrections, one seat at a time
+    m = int(np.sum(counts))
+    if _profiles:
+        _profile_count("heap steps", int(abs(m - k)))
+    if m >= k:
+        candidates = np.nonzero(counts > 0)[0]
+        weights = _divisor_weights(votes[candidates], counts[candidates] - 1, rule, fractions)
+        heap = list(zip(_weights_list(weights, fractions), candidates.tolist()))
+        heapq.heapify(heap)
+        for _ in range(m - k):
+            _, i = heapq.heappop(heap)
+            counts[i] -= 1
+            if counts[i] > 0:
+                weight = _divisor_weights(votes[i : i + 1], counts[i : i + 1] - 1, rule, fractions)
+                heapq.heappush(heap, (_weights_list(weight, fractions)[0], i))
+        minweight = heap[0][0]
+    else:
+        candidates = np.nonzero(counts < length)[0]
+        weights = _divisor_weights(votes[candidates], counts[candidates], rule, fractions)
+        heap = [(-w, i) for w, i in zip(_weights_list(weights, fractions), candidates.tolist())]
+        heapq.heapify(heap)
+        for _ in range(k - m):
+            negweight, i = heapq.heappop(heap)
+            counts[i] += 1
+            if counts[i] < length:
+                weight = _divisor_weights(votes[i : i + 1], counts[i : i + 1], rule, fractions)
+                heapq.heappush(heap, (-_weights_list(weight, fractions)[0], i))
+        minweight = -negweight
+
+    counts = _count_above(votes, minweight, length, rule, fractions, counts)
+    tied = np.zeros(len(votes), dtype=bool)
+    candidates = np.nonzero(counts < length)[0]
+    weights = _divisor_weights(votes[candidates], counts[candidates], rule, fractions)
+    tied[candidates] = _weights_equal(weights, minweight, fractions)
+    return minweight, counts, tied
+
+
+def _divisor_order(votes, k, rule, fractions, dtype=None):
+    """The order in which a divisor method awards k seats (an array of party indices).
+
+    Seats that parties receive without divisors (Adams, Dean, Huntington-Hill) are not
+    included. The first h entries are the seats that divisor() awards for a house of size h,
+    with ties broken in the same way (in favor of parties with smaller index).
+    """
+    votes = np.asarray(votes)
+    minweight, counts, tied = _divisor_cutoff(votes, k, k, rule, fractions, dtype)
+    counts[np.nonzero(tied)[0][: k - np.sum(counts)]] += 1
+    awarded = np.repeat(np.arange(len(votes)), counts)
+    j = np.arange(len(awarded)) - np.repeat(np.cumsum(counts) - counts, counts)
+    if fractions:
+        weights = _divisor_weights(
+            _exact_votes(votes, rule, k, dtype)[awarded], j, rule, fractions
+        )
+        keys = _weights_list(weights, fractions)
+        order = sorted(range(len(awarded)), key=lambda t: (-keys[t], awarded[t]))
+    else:
+        order = np.lexsort((awarded, -_divisor_weights(votes[awarded], j, rule, fractions)))
+    return awarded[order]
+
+
+def divisor_interval(votes, representatives, method, fractions=False):
+    """The interval (d_min, d_max) of all divisors D that yield the given apportionment.
+
+    A divisor D yields an apportionment if each party receives exactly the seats whose weights
+    votes / d_j are at least D, i.e., if D lies between the largest weight of a seat that is
+    not awarded (d_min) and the smallest weight of an awarded seat (d_max). Weights use the
+    divisors d_j of divisor() (e.g., 1, 3, 5, ... for Sainte-Lague, where the customary divisor
+    is 2 * D). If d_min == d_max, the apportionment is one of several tied apportionments; d_max
+    is inf if only first seats of methods with d_0 = 0 (Adams, Dean, Huntington-Hill) are awarded.
+
+    Returns None if no divisor yields the apportionment; this verifies a claimed result in
+    O(len(votes)). With fractions=True, the bounds are exact (Fractions).
+    """
+    rule = _DIVISOR_RULES.get(method)
+    if rule is None:
+        raise NotImplementedError("divisor method " + str(method) + " not known")
+    if fractions and rule == "huntington":
+        raise NotImplementedError(
+            "exact divisor bounds not supported for the Huntington-Hill method (irrational)"
+        )
+    if len(votes) != len(representatives):
+        raise ValueError("votes and representatives have different lengths")
+    # seats beyond the first one are awarded by divisors for methods with d_0 = 0
+    offset = 1 if rule in ["huntington", "adams", "dean"] else 0
+    # heap keys: the smallest key belongs to the largest weight
+    lower = upper = None
+    for vote, seats in zip(votes, representatives):
+        vote, seats = int(vote) if fractions else vote, int(seats)
+        if vote <= 0:
+            if seats > 0:
+                return None
+            continue
+        if seats < offset:
+            # the first seat has an infinite weight
+            return None
+        key = _divisor_key(vote, seats - offset, rule, fractions)
+        if lower is None or key < lower:
+            lower = key
+        if seats > offset:
+            key = _divisor_key(vote, seats - offset - 1, rule, fractions)
+            if upper is None or upper < key:
+                upper = key
+
+    def weight(key, default):
+        if key is None:
+            return default
+        if fractions:
+            return Fraction(key.numerator, key.denominator)
+        return -key
+
+    d_min, d_max = weight(lower, 0), weight(upper, math.inf)
+    if d_min > d_max:
+        return None
+    return d_min, d_max
+
+
+def award_sequence(method, votes, seats=None, fractions=False, threshold=None):
+    """Yields (seat, party, weight) for the seats 1, 2, ... in the order in which a divisor
+    method awards them.
+
+    For every house size h, the first h seats are the apportionment compute(method, votes, h)
+    with the same tiebreaking (equal weights in favor of the party with smaller index), with
+    one exception: for Adams, Dean and Huntington-Hill with parties without votes and fewer
+    seats than parties but more than parties with votes, compute() awards the remaining seats
+    to parties without votes (one seat each for the h strongest parties), which the sequence
+    does not (these apportionments are not house-monotone).
+
+    The weight of a seat is votes / d_j; first seats of methods with d_0 = 0 (Adams, Dean,
+    Huntington-Hill) have weight inf and are awarded in order of votes. With fractions=True,
+    weights are Fractions (floats for Huntington-Hill, whose weights are irrational).
+
+    Seats are generated lazily from a heap in O(log(len(votes))) each; with seats=None, the
+    sequence does not end (if some party has votes).
+    """
+    rule = _DIVISOR_RULES.get(method)
+    if rule is None:
+        raise NotImplementedError("award sequence only available for divisor methods")
+    votes = apply_threshold(votes, threshold)
+    votes = [int(v) if fractions else v for v in votes]
+    if seats is None:
+        seats = math.inf
+    seat = 0
+    if rule in ["huntington", "adams", "dean"]:
+        for i in sorted((i for i, v in enumerate(votes) if v > 0), key=lambda i: -votes[i]):
+            if seat >= seats:
+                return
+            seat += 1
+            yield seat, i, math.inf
+
+    heap = [(_divisor_key(v, 0, rule, fractions), i) for i, v in enumerate(votes) if v > 0]
+    heapq.heapify(heap)
+    counts = [0] * len(votes)
+    while heap and seat < seats:
+        key, i = heap[0]
+        counts[i] += 1
+        heapq.heapreplace(heap, (_divisor_key(votes[i], counts[i], rule, fractions), i))
+        seat += 1
+        if not fractions:
+            yield seat, i, -key
+        elif rule == "huntington":
+            yield seat, i, math.sqrt(Fraction(key.numerator, key.denominator))
+        else:
+            yield seat, i, Fraction(key.numerator, key.denominator)
 
 
 # required for methods with 0 divisors (Adams, Huntington-Hill)
 def __divzero_fewerseatsthanparties(votes, seats, parties, tiesallowed, verbose):
-    representatives = np.zeros(len(votes), dtype=int)
     if verbose:
         print("  fewer seats than parties; " + str(seats) + " strongest parties receive one seat")
-    tiebreaking_message = "  ties broken in favor of: "
-    ties = False
+    representatives = np.zeros(len(votes), dtype=int)
+    if seats == 0:
+        return representatives, []
     mincount = np.sort(votes)[-seats]
-    for i in range(len(votes)):
-        if np.sum(representatives) < seats and votes[i] >= mincount:
-            if votes[i] == mincount:
-                tiebreaking_message += parties[i] + ", "
-            representatives[i] = 1
-        elif np.sum(representatives) == seats and votes[i] >= mincount:
-            if not ties:
-                tiebreaking_message = tiebreaking_message[:-2]
-                tiebreaking_message += "\n  to the disadvantage of: "
-                ties = True
-            tiebreaking_message += parties[i] + ", "
-    if ties and not tiesallowed:
+    representatives[votes > mincount] = 1
+    tie = Tie(np.nonzero(votes == mincount)[0], seats - np.sum(representatives))
+    representatives[tie.winners] = 1
+    if tie and not tiesallowed:
         raise TiesException("Tie occurred")
-    if ties and verbose:
-        print(tiebreaking_message[:-2])
-    return representatives
+    if tie and verbose:
+        print(tie.message(parties))
+    return representatives, [tie] if tie else []
 
 
 def quota(
@@ -320,46 +1293,127 @@ def quota(
 
     Warning: tiesallowed is not supported here (difficult to implement)
     """
+    return _quota(votes, seats, fractions, parties, tiesallowed, verbose)[0]
+
+
+def _quota(votes, seats, fractions, parties, tiesallowed, verbose):
+    """quota(), returning the apportionment and a list of (broken) ties."""
     if not tiesallowed:
         raise NotImplementedError("parameter tiesallowed not supported for Quota method")
     if verbose:
+        parties = _labels(parties, len(votes))
         print("\nQuota method")
 
-    votes = np.array(votes)
-    representatives = np.zeros(len(votes), dtype=int)
+    if _profiles:
+        start = time.perf_counter()
+    order, ties = _quota_order(votes, seats, fractions, parties, verbose)
+    if _profiles:
+        _profile_time("rounds", start)
+        _profile_count("rounds", int(seats))
+        for tie in ties:
+            _profile_ties(tie)
+    representatives = [0] * len(votes)
+    for i in order:
+        representatives[i] += 1
+    if verbose:
+        __print_results(representatives, parties)
 
-    while np.sum(representatives) < seats:
-        if fractions:
-            quotas = [
-                Fraction(int(votes[i]), int(representatives[i]) + 1) for i in range(len(votes))
-            ]
-        else:
-            quotas = votes / (representatives + 1)
-        # check if upper quota is violated
-        upperquota = votes * (np.sum(representatives) + 1) / np.sum(votes)
-        upperquota = np.trunc(np.ceil(upperquota))
-        quotas = np.where(representatives >= upperquota, 0, quotas)
-        maxquotas = np.nonzero(quotas == quotas.max())[0]
+    return representatives, ties
 
-        nextrep = maxquotas[0]
 
-        # print tiebreaking information
-        if verbose and len(maxquotas) > 1:
-            print(
-                "tiebreaking necessary in round "
-                + str(np.sum(representatives) + 1)
-                + ":"
-                + "  tiebreaking in order of: "
-                + str(parties[: len(votes)])
-                + "\n  ties broken in favor of: "
-                + str(parties[nextrep])
-                + "\n  to the disadvantage of: "
-                + ", ".join(parties[i] for i in maxquotas[1:])
-            )
+def _quota_order(votes, seats, fractions, parties, verbose):
+    """The order in which the quota method awards seats (a list of party indices) and the
+    ties broken on the way (one per round with a tie).
 
-        representatives[nextrep] += 1
+    Each seat costs O(log(len(votes))): parties that may receive the next seat are kept in a
+    heap ordered by priority, parties at their upper quota in a heap ordered by the round in
+    which their upper quota grows again.
+    """
+    if fractions:
+        votes = [int(v) for v in votes]
+    elif not all(isinstance(v, (int, float)) for v in votes):
+        # numpy arrays and scalars
+        votes = np.array(votes).tolist()
+    total = sum(votes)
+    if total == 0:
+        # without votes, all parties are tied in every round (as in compute_batch())
+        tie = Tie(list(range(len(votes))), 1)
+        if verbose and tie:
+            for house in range(seats):
+                print(
+                    "tiebreaking necessary in round "
+                    + str(house + 1)
+                    + ":"
+                    + tie.message(parties, order=parties[: len(votes)])
+                )
+        return [0] * seats, [tie] * seats if tie else []
+    representatives = [0] * len(votes)
+    if fractions:
 
-    if verbose:
-        __print_results(representatives, parties)
+        def priority(i):
+            if _profiles:
+                _profile_count("Fraction objects")
+            return Fraction(votes[i], representatives[i] + 1)
+
+        def within_upperquota(i, house):
+            # exact check of representatives[i] < ceil(votes[i] * (house + 1) / total)
+            return representatives[i] * total < votes[i] * (house + 1)
+
+    else:
+
+        def priority(i):
+            return float(votes[i]) / float(representatives[i] + 1)
+
+        def within_upperquota(i, house):
+            upperquota = math.ceil(float(votes[i] * (house + 1)) / float(total))
+            return representatives[i] < upperquota
+
+    def next_round(i, house):
+        # first round (>= house) in which party i does not violate its upper quota;
+        # the estimate from votes[i] * (house + 1) > representatives[i] * total is verified
+        house = max(house, int(representatives[i] * total // votes[i]) - 1)
+        while not within_upperquota(i, house):
+            house += 1
+        return house
+
+    # parties that may receive the next seat (ordered by priority) and parties that
+    # currently violate their upper quota (ordered by the round in which this changes)
+    eligible = [(-priority(i), i) for i in range(len(votes)) if votes[i] > 0]
+    heapq.heapify(eligible)
+    blocked = []
+    order = []
+    ties = []
+
+    for house in range(seats):
+        while blocked and blocked[0][0] <= house:
+            _, i = heapq.heappop(blocked)
+            heapq.heappush(eligible, (-priority(i), i))
+
+        maxquota, nextrep = eligible[0]
+
+        # tiebreaking (the second-largest priority is at position 1 or 2)
+        if len(eligible) > 1 and min(eligible[1:3])[0] == maxquota:
+            tied = []
+            while eligible and eligible[0][0] == maxquota:
+                tied.append(heapq.heappop(eligible))
+            for entry in tied:
+                heapq.heappush(eligible, entry)
+            tie = Tie([i for _, i in tied], 1)
+            ties.append(tie)
+            if verbose:
+                print(
+                    "tiebreaking necessary in round "
+                    + str(house + 1)
+                    + ":"
+                    + tie.message(parties, order=parties[: len(votes)])
+                )
+
+        representatives[nextrep] += 1
+        order.append(nextrep)
+        if within_upperquota(nextrep, house + 1):
+            heapq.heapreplace(eligible, (-priority(nextrep), nextrep))
+        else:
+            heapq.heappop(eligible)
+            heapq.heappush(blocked, (next_round(nextrep, house + 1), nextrep))
 
-    return representatives.tolist()
+    return order, ties
@@ -0,0 +1,14 @@
+"""
+Helpers for process pools (without numpy, so that importing them stays cheap)
+"""
+
+
+def _bounded_map(executor, function, tasks, limit):
+    """Like executor.map() (in order), but with at most `limit` pending tasks."""
+    pending = []
+    for task in tasks:
+        pending.append(executor.submit(function, task))
+        if len(pending) >= limit:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
@@ -0,0 +1,165 @@
+"""
+Opt-in profiling of compute(): timings per phase and counters of the work done
+
+    with Profile() as profile:
+        for votes, seats in elections:
+            compute("dhondt", votes, seats)
+    print(profile.table())
+
+Phases are "threshold" (apply_threshold()), "fast path" (pure-Python implementation for
+small inputs), "setup" (arrays and the first seats of Adams, Dean and Huntington-Hill),
+"cutoff" (finding the weight of the last seat) and "ties" of divisor methods, "quotas" and
+"remainders" of the largest remainder method, and "rounds" of the quota method. Counters are,
+e.g., the number of weights compared and sorted, divisor estimates, heap steps, ties, tied
+parties, Fraction objects created, and the dtype of exact integer arrays. Without an active
+profile, compute() only checks that there is none.
+"""
+
+import heapq
+import itertools
+import json
+import threading
+
+import apportionment.methods as methods
+
+
+class Profile:
+    """Timings and counters of all compute() calls while the profile is active.
+
+    `phases` maps phase names to seconds and `counters` maps counter names to totals. The
+    `slowest` calls are kept as records (dicts with method, parties, seats, fractions,
+    seconds, phases and counters), e.g., to find the inputs that are slow in a nightly job;
+    `callback` is called with the record of every call. Profiles of several processes can be
+    combined with merge().
+
+    Profiles are active in all threads (compute() calls of other threads are included); each
+    thread keeps its own record of the current call.
+    """
+
+    def __init__(self, slowest=10, callback=None):
+        self.calls = 0
+        self.seconds = 0.0
+        self.phases = {}
+        self.counters = {}
+        self.slowest = slowest
+        self.callback = callback
+        # (seconds, number, record) of the slowest calls (a heap); the unique numbers break
+        # ties between equal times (records are not comparable)
+        self._slowest = []
+        self._numbers = itertools.count()
+        # nesting depth and record of the current call of each thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        methods._profiles.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        methods._profiles.remove(self)
+        return False
+
+    def begin(self, method, votes, seats, fractions):
+        """Starts the record of a compute() call (nested calls are part of the outer call)."""
+        local = self._local
+        local.depth = getattr(local, "depth", 0) + 1
+        if local.depth == 1:
+            local.record = dict(
+                method=method,
+                parties=len(votes),
+                seats=int(seats),
+                fractions=bool(fractions),
+                seconds=None,
+                phases={},
+                counters={},
+            )
+
+    def end(self, seconds):
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:
+            return
+        record, local.record = local.record, None
+        record["seconds"] = seconds
+        with self._lock:
+            self.calls += 1
+            self.seconds += seconds
+            if self.slowest:
+                entry = (seconds, next(self._numbers), record)
+                if len(self._slowest) < self.slowest:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heappushpop(self._slowest, entry)
+        if self.callback is not None:
+            self.callback(record)
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        record = getattr(self._local, "record", None)
+        if record is not None:
+            record["phases"][phase] = record["phases"].get(phase, 0.0) + seconds
+
+    def count(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+        record = getattr(self._local, "record", None)
+        if record is not None:
+            record["counters"][counter] = record["counters"].get(counter, 0) + value
+
+    def slowest_calls(self):
+        """The records of the slowest calls (slowest first)."""
+        return [record for _, _, record in sorted(self._slowest, key=lambda e: -e[0])]
+
+    def merge(self, other):
+        """Adds the timings, counters and slowest calls of another profile."""
+        self.calls += other.calls
+        self.seconds += other.seconds
+        for phase, seconds in other.phases.items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        for counter, value in other.counters.items():
+            self.counters[counter] = self.counters.get(counter, 0) + value
+        for seconds, _, record in other._slowest:
+            self._slowest.append((seconds, next(self._numbers), record))
+        self._slowest = heapq.nlargest(self.slowest, self._slowest, key=lambda e: e[0])
+        heapq.heapify(self._slowest)
+        return self
+
+    def summary(self):
+        return dict(
+            calls=self.calls,
+            seconds=self.seconds,
+            phases=dict(self.phases),
+            counters=dict(self.counters),
+            slowest=self.slowest_calls(),
+        )
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.summary(), **kwargs)
+
+    def table(self):
+        """The phases (with their share of the total time) and the counters as a table."""
+        lines = ["{} calls, {:.4f} seconds".format(self.calls, self.seconds), ""]
+        lines.append("{:<24s} {:>10s} {:>7s}".format("phase", "seconds", "share"))
+        for phase, seconds in sorted(self.phases.items(), key=lambda item: -item[1]):
+            share = seconds / self.seconds if self.seconds > 0 else 0.0
+            lines.append("{:<24s} {:>10.4f} {:>6.1%}".format(phase, seconds, share))
+        lines.append("")
+        lines.append("{:<24s} {:>10s}".format("counter", "total"))
+        for counter, value in sorted(self.counters.items()):
+            lines.append("{:<24s} {:>10d}".format(counter, value))
+        return "\n".join(lines)
+
+    def __getstate__(self):
+        # picklable (e.g., returned from worker processes); the callback and the state of
+        # current calls are not kept
+        state = dict(self.__dict__)
+        state["callback"] = None
+        del state["_local"], state["_lock"], state["_numbers"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._numbers = itertools.count(max((e[1] for e in self._slowest), default=-1) + 1)
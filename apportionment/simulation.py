@@ -0,0 +1,135 @@
+"""
+Monte Carlo simulation of seat distributions (e.g., from polls)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+
+from apportionment.batch import compute_batch
+from apportionment.parallel import _bounded_map
+
+
+class MultinomialSampler:
+    """Vote counts of `voters` voters, each voting according to the (poll) shares."""
+
+    def __init__(self, shares, voters):
+        self.shares = np.asarray(shares, dtype=float) / np.sum(shares)
+        self.voters = voters
+
+    def __call__(self, rng, size):
+        return rng.multinomial(self.voters, self.shares, size=size)
+
+
+class DirichletSampler:
+    """Vote shares drawn from a Dirichlet distribution around the (poll) shares.
+
+    Larger concentrations give less variation; the shares are scaled to `voters` votes.
+    """
+
+    def __init__(self, shares, concentration, voters):
+        shares = np.asarray(shares, dtype=float) / np.sum(shares)
+        self.alpha = shares * concentration
+        self.voters = voters
+
+    def __call__(self, rng, size):
+        return np.rint(rng.dirichlet(self.alpha, size=size) * self.voters).astype(int)
+
+
+class SimulationResult:
+    """Aggregated seat distributions of a simulation.
+
+    histogram[i, s] is the number of scenarios in which party i received s seats.
+    """
+
+    def __init__(self, histogram, ties):
+        self.histogram = histogram
+        self.ties = ties
+
+    @property
+    def scenarios(self):
+        return int(self.histogram[0].sum())
+
+    @property
+    def seats(self):
+        return self.histogram.shape[1] - 1
+
+    def mean(self):
+        """The expected number of seats of each party."""
+        return self.histogram @ np.arange(self.seats + 1) / self.scenarios
+
+    def majority_probability(self, majority=None):
+        """The probability that a party wins at least `majority` seats (default: more than
+        half)."""
+        if majority is None:
+            majority = self.seats // 2 + 1
+        return self.histogram[:, majority:].sum(axis=1) / self.scenarios
+
+    def confidence_interval(self, level=0.95):
+        """Lower and upper bounds (per party) of the central interval with probability level."""
+        cdf = np.cumsum(self.histogram, axis=1) / self.scenarios
+        lower = np.argmax(cdf >= (1 - level) / 2, axis=1)
+        upper = np.argmax(cdf >= 1 - (1 - level) / 2 - 1e-12, axis=1)
+        return lower, upper
+
+    def tie_probability(self):
+        return self.ties / self.scenarios
+
+
+def simulate(
+    method,
+    sampler,
+    seats,
+    scenarios,
+    threshold=None,
+    chunksize=10000,
+    workers=1,
+    seed=None,
+):
+    """Apportions `scenarios` vote vectors drawn by sampler(rng, size) and aggregates the seats.
+
+    Scenarios are processed in chunks with compute_batch(). Chunk c always uses the random
+    generator spawned as child c of SeedSequence(seed), so results are reproducible for a given
+    seed and chunksize regardless of the number of workers. With workers > 1, chunks are
+    distributed over a process pool (workers=None: one per CPU; the sampler has to be
+    picklable). Tasks and seeds are generated lazily and only aggregated histograms are kept,
+    so memory does not grow with the number of scenarios.
+    """
+    if scenarios < 1:
+        raise ValueError("at least one scenario is required")
+    root = np.random.SeedSequence(seed)
+    # (spawning one child at a time yields the same children as spawning all at once)
+    tasks = (
+        (method, sampler, seats, threshold, min(chunksize, scenarios - start), root.spawn(1)[0])
+        for start in range(0, scenarios, chunksize)
+    )
+    histogram = None
+    ties = 0
+    if workers == 1:
+        results = map(_simulate_chunk, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = _bounded_map(executor, _simulate_chunk, tasks, 2 * (workers or os.cpu_count()))
+    try:
+        for chunk_histogram, chunk_ties in results:
+            if histogram is None:
+                histogram = chunk_histogram
+            else:
+                histogram += chunk_histogram
+            ties += chunk_ties
+    finally:
+        if workers != 1:
+            executor.shutdown()
+    return SimulationResult(histogram, ties)
+
+
+def _simulate_chunk(task):
+    method, sampler, seats, threshold, size, seedsequence = task
+    votes = np.asarray(sampler(np.random.default_rng(seedsequence), size))
+    representatives, ties = compute_batch(method, votes, seats, threshold=threshold)
+    parties = votes.shape[1]
+    histogram = np.bincount(
+        (np.arange(parties) * (seats + 1) + representatives).ravel(),
+        minlength=parties * (seats + 1),
+    )
+    return histogram.reshape(parties, seats + 1), int(np.count_nonzero(ties))
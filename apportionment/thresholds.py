@@ -0,0 +1,121 @@
+"""
+Electoral thresholds as declarative rules, evaluated as boolean masks
+
+    rule = Share(0.04) | DistrictSeats(1)             # Austria: 4% or a regional seat
+    rule = Share([0.05, 0.05, 0.10, 0.05])            # higher threshold for an alliance
+    rule = Share(0.05) & Votes(10000)
+
+A rule can be passed as `threshold` to compute(), compute_batch(), simulate(), tiered(),
+Apportioner and Election (of apportionment.verification).
+Rules are evaluated vectorized: for a vote vector (parties) or a matrix of scenarios
+(scenarios x parties), mask() returns which parties pass the threshold without copying votes.
+"""
+
+import numpy as np
+
+
+class ThresholdRule:
+    """Base class of threshold rules; rules are combined with | (either) and & (both)."""
+
+    def mask(self, votes, seats=None):
+        """Whether each party passes the threshold (a boolean array of the shape of votes).
+
+        `seats` are the district seats won by each party (same shape or broadcastable), for
+        rules that depend on them.
+        """
+        raise NotImplementedError
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+
+class Share(ThresholdRule):
+    """At least this share of all votes (a number, or one number per party)."""
+
+    def __init__(self, fraction):
+        self.fraction = np.asarray(fraction, dtype=float)
+
+    def mask(self, votes, seats=None):
+        votes = np.asarray(votes)
+        return votes >= votes.sum(axis=-1, keepdims=True) * self.fraction
+
+    def __repr__(self):
+        return "Share({!r})".format(self.fraction.tolist())
+
+
+class Votes(ThresholdRule):
+    """At least this number of votes (a number, or one number per party)."""
+
+    def __init__(self, minimum):
+        self.minimum = np.asarray(minimum)
+
+    def mask(self, votes, seats=None):
+        return np.asarray(votes) >= self.minimum
+
+    def __repr__(self):
+        return "Votes({!r})".format(self.minimum.tolist())
+
+
+class DistrictSeats(ThresholdRule):
+    """At least `minimum` district seats, e.g., as an exemption from a vote threshold.
+
+    The district seats are given as `won` (per party, or per scenario and party) or, if
+    omitted, when the rule is evaluated (e.g., by tiered(), from its lowest tier).
+    """
+
+    def __init__(self, minimum=1, won=None):
+        self.minimum = minimum
+        self.won = None if won is None else np.asarray(won)
+
+    def mask(self, votes, seats=None):
+        won = self.won if seats is None else np.asarray(seats)
+        if won is None:
+            raise ValueError("district seats are required for DistrictSeats")
+        return np.broadcast_to(won >= self.minimum, np.shape(votes))
+
+    def __repr__(self):
+        won = None if self.won is None else self.won.tolist()
+        return "DistrictSeats({!r}, won={!r})".format(self.minimum, won)
+
+
+class AnyOf(ThresholdRule):
+    """Parties that pass any of the rules."""
+
+    def __init__(self, *rules):
+        self.rules = [as_rule(rule) for rule in rules]
+
+    def mask(self, votes, seats=None):
+        return np.logical_or.reduce([rule.mask(votes, seats) for rule in self.rules])
+
+    def __repr__(self):
+        return " | ".join("(" + repr(rule) + ")" for rule in self.rules)
+
+
+class AllOf(ThresholdRule):
+    """Parties that pass all of the rules."""
+
+    def __init__(self, *rules):
+        self.rules = [as_rule(rule) for rule in rules]
+
+    def mask(self, votes, seats=None):
+        return np.logical_and.reduce([rule.mask(votes, seats) for rule in self.rules])
+
+    def __repr__(self):
+        return " & ".join("(" + repr(rule) + ")" for rule in self.rules)
+
+
+def as_rule(threshold):
+    """A rule for a threshold given as a share of the votes (e.g., 0.04) or as a rule."""
+    if isinstance(threshold, ThresholdRule):
+        return threshold
+    return Share(threshold)
+
+
+def threshold_mask(votes, threshold, seats=None):
+    """Whether each party passes the threshold (None: all parties)."""
+    if threshold is None:
+        return np.ones(np.shape(votes), dtype=bool)
+    return as_rule(threshold).mask(votes, seats)
@@ -0,0 +1,142 @@
+"""
+All apportionments that result from the different ways of breaking ties
+"""
+
+from fractions import Fraction
+import itertools
+import math
+
+from apportionment.methods import _DIVISOR_RULES, apply_threshold, compute
+
+
+class TiedApportionments:
+    """The apportionments `forced` plus one seat each for any `contested` of the `tied` parties.
+
+    For divisor methods and the largest remainder method, all tie-resolved apportionments have
+    this form. The apportionments are generated lazily when iterating (in lexicographic order of
+    the chosen parties; the first one is the result of compute()), and their number is
+    available without generating them.
+    """
+
+    __slots__ = ("forced", "tied", "contested")
+
+    def __init__(self, forced, tied, contested):
+        self.forced = list(forced)
+        self.tied = list(tied)
+        self.contested = contested
+
+    def __len__(self):
+        n, k = len(self.tied), self.contested
+        return math.factorial(n) // (math.factorial(k) * math.factorial(n - k))
+
+    def __iter__(self):
+        for chosen in itertools.combinations(self.tied, self.contested):
+            representatives = list(self.forced)
+            for i in chosen:
+                representatives[i] += 1
+            yield representatives
+
+    def __contains__(self, representatives):
+        representatives = list(representatives)
+        if len(representatives) != len(self.forced):
+            return False
+        tied = set(self.tied)
+        extra = 0
+        for i, (seats, forced) in enumerate(zip(representatives, self.forced)):
+            if seats == forced + 1 and i in tied:
+                extra += 1
+            elif seats != forced:
+                return False
+        return extra == self.contested
+
+    def __repr__(self):
+        return "TiedApportionments(forced={}, tied={}, contested={})".format(
+            self.forced, self.tied, self.contested
+        )
+
+
+def all_apportionments(method, votes, seats, fractions=False, threshold=None):
+    """All apportionments that the method yields under some way of breaking ties.
+
+    For divisor methods and the largest remainder method, a TiedApportionments object is
+    returned (forced seats plus "choose k of the tied parties"), computed with a single call of
+    compute(). Ties of the quota method can be nested (a tie in one round determines which
+    parties are tied in later rounds), so a generator is returned that walks the tree of tie
+    decisions; states with the same seats are visited only once. In both cases, the first
+    apportionment is the one returned by compute().
+    """
+    if method == "quota":
+        return _quota_apportionments(apply_threshold(votes, threshold), seats, fractions)
+    if method not in ["lrm", "hamilton", "largest_remainder"] + list(_DIVISOR_RULES):
+        raise NotImplementedError("apportionment method " + method + " not known")
+    result = compute(
+        method, votes, seats, fractions=fractions, threshold=threshold, as_result=True
+    )
+    if not result.ties:
+        return TiedApportionments(result.tolist(), [], 0)
+    (tie,) = result.ties
+    forced = result.tolist()
+    for i in tie.winners:
+        forced[i] -= 1
+    return TiedApportionments(forced, tie.tied, tie.contested)
+
+
+def _quota_apportionments(votes, seats, fractions):
+    """Generator of all apportionments of the quota method (depth-first over tie decisions)."""
+    if fractions:
+        votes = [int(v) for v in votes]
+    total = sum(votes)
+
+    if fractions:
+
+        def priority(vote, representatives):
+            return Fraction(vote, representatives + 1)
+
+        def within_upperquota(vote, representatives, house):
+            return representatives * total < vote * (house + 1)
+
+    else:
+
+        def priority(vote, representatives):
+            return float(vote) / float(representatives + 1)
+
+        def within_upperquota(vote, representatives, house):
+            return representatives < math.ceil(float(vote * (house + 1)) / float(total))
+
+    start = (0,) * len(votes)
+    visited = {start}
+    # iterators over the successors of the states on the current path (in index order)
+    stack = []
+    state = start
+    while True:
+        house = sum(state)
+        if house == seats:
+            yield list(state)
+        else:
+            if total == 0:
+                # without votes, all parties are tied in every round (as in compute())
+                eligible = list(range(len(votes)))
+            else:
+                eligible = [
+                    i
+                    for i, vote in enumerate(votes)
+                    if vote > 0 and within_upperquota(vote, state[i], house)
+                ]
+            best = max(priority(votes[i], state[i]) for i in eligible)
+            successors = [
+                state[:i] + (state[i] + 1,) + state[i + 1 :]
+                for i in eligible
+                if priority(votes[i], state[i]) == best
+            ]
+            stack.append(iter(successors))
+        state = None
+        while stack and state is None:
+            for successor in stack[-1]:
+                if successor not in visited:
+                    visited.add(successor)
+                    state = successor
+                    break
+            else:
+                stack.pop()
+        if state is None:
+            return
@@ -0,0 +1,377 @@
+"""
+Verification of apportionment methods against official (historical) results
+
+    python -m apportionment.verification examples/knesset.txt \
+        --columns name parties votes official threshold --methods dhondt saintelague
+
+A dataset is a list of Election objects, e.g., loaded with load_dataset(). verify() applies
+each method to each election, optionally in a process pool; the vote counts are then packed
+into a single shared memory block that all workers read, so only index ranges are sent to the
+workers. The VerificationReport lists mismatches, ties and timings as a table or as JSON.
+"""
+
+import argparse
+import ast
+from concurrent.futures import ProcessPoolExecutor
+import json
+import sys
+import time
+
+import numpy as np
+
+from apportionment.methods import compute
+from apportionment.thresholds import ThresholdRule, threshold_mask
+
+
+class Election:
+    """Votes, number of seats, official result (seats per party) and threshold of an election."""
+
+    __slots__ = ("name", "votes", "seats", "official", "threshold", "parties")
+
+    def __init__(self, name, votes, official, seats=None, threshold=None, parties=None):
+        if len(official) != len(votes):
+            raise ValueError("election " + str(name) + ": official result has a wrong length")
+        self.name = name
+        self.votes = votes
+        self.official = official
+        self.seats = sum(official) if seats is None else seats
+        self.threshold = threshold
+        self.parties = parties
+
+
+def parse_line(line, combine=True):
+    """Evaluates a line of a dataset: literals, lists/tuples and sums of numbers only.
+
+    A safe replacement of eval() for the files in examples/, which contain expressions such
+    as [885163+345985, 543458+432118] (coalitions). With combine=False, sums are returned as
+    lists of their terms (the parties of a coalition). Comments are ignored.
+    """
+
+    def convert(node):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if sys.version_info < (3, 8):
+            # (literals are parsed as Num, Str and NameConstant nodes before Python 3.8)
+            if isinstance(node, ast.Num):
+                return node.n
+            if isinstance(node, ast.Str):
+                return node.s
+            if isinstance(node, ast.NameConstant):
+                return node.value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [convert(element) for element in node.elts]
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            if not combine:
+                return terms(node.left) + terms(node.right)
+            return convert(node.left) + convert(node.right)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -convert(node.operand)
+        raise ValueError("unsupported expression in " + repr(line))
+
+    def terms(node):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            return terms(node.left) + terms(node.right)
+        return [convert(node)]
+
+    return convert(ast.parse(line.strip(), mode="eval").body)
+
+
+def load_dataset(path, columns=("name", "parties", "votes", "official"), **defaults):
+    """Loads the elections of a file with one election per line.
+
+    Each line of a .jsonl file is a JSON object; each line of other files is a list or tuple
+    of literals (see parse_line()) whose entries are named by `columns`. Names are Election
+    attributes; entries named None are ignored. `defaults` (e.g. threshold=0.04) apply to all
+    elections that do not specify a value.
+    """
+    elections = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                fields = json.loads(line)
+            else:
+                values = parse_line(line)
+                if len(values) != len(columns):
+                    raise ValueError("line {}: expected {} entries".format(number, len(columns)))
+                fields = {c: value for c, value in zip(columns, values) if c is not None}
+            fields = dict(defaults, **fields)
+            fields.setdefault("name", number)
+            elections.append(Election(**fields))
+    return elections
+
+
+class VerificationResult:
+    """The result of one method for one election."""
+
+    __slots__ = ("election", "method", "seats", "tie", "seconds", "error")
+
+    def __init__(self, election, method, seats, tie, seconds, error=None):
+        self.election = election
+        self.method = method
+        self.seats = seats
+        self.tie = tie
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def matches(self):
+        return self.error is None and list(self.seats) == list(self.election.official)
+
+    def asdict(self):
+        return dict(
+            election=self.election.name,
+            method=self.method,
+            matches=self.matches,
+            tie=self.tie,
+            seconds=self.seconds,
+            seats=self.seats,
+            official=list(self.election.official),
+            error=self.error,
+        )
+
+
+class VerificationReport:
+    """The results of verify() (in the order of elections and methods)."""
+
+    def __init__(self, results, methods):
+        self.results = results
+        self.methods = list(methods)
+
+    def mismatches(self, method=None):
+        return [r for r in self.results if not r.matches and method in (None, r.method)]
+
+    def ties(self, method=None):
+        return [r for r in self.results if r.tie and method in (None, r.method)]
+
+    def summary(self):
+        """Number of elections, matches, mismatches, ties, errors and seconds per method."""
+        summary = {}
+        for method in self.methods:
+            results = [r for r in self.results if r.method == method]
+            summary[method] = dict(
+                elections=len(results),
+                matches=sum(r.matches for r in results),
+                mismatches=sum(not r.matches for r in results),
+                ties=sum(bool(r.tie) for r in results),
+                errors=sum(r.error is not None for r in results),
+                seconds=sum(r.seconds for r in results),
+            )
+        return summary
+
+    def table(self):
+        """The summary and the mismatches as a table (a string)."""
+        lines = [
+            "{:<22s} {:>9s} {:>8s} {:>10s} {:>6s} {:>6s} {:>10s}".format(
+                "method", "elections", "matches", "mismatches", "ties", "errors", "seconds"
+            )
+        ]
+        for method, row in self.summary().items():
+            lines.append(
+                "{:<22s} {elections:>9d} {matches:>8d} {mismatches:>10d} {ties:>6d}"
+                " {errors:>6d} {seconds:>10.4f}".format(method, **row)
+            )
+        mismatches = self.mismatches()
+        if mismatches:
+            lines.append("")
+            lines.append("mismatches:")
+        for r in mismatches:
+            lines.append(
+                "  {} {}: {} (official: {}){}".format(
+                    r.method,
+                    r.election.name,
+                    r.error or r.seats,
+                    list(r.election.official),
+                    ", tie" if r.tie else "",
+                )
+            )
+        return "\n".join(lines)
+
+    def to_json(self, **kwargs):
+        return json.dumps(
+            dict(summary=self.summary(), results=[r.asdict() for r in self.results]), **kwargs
+        )
+
+
+def verify(elections, methods=("dhondt",), fractions=False, workers=1, chunksize=100):
+    """Applies each method to each election and compares the results with the official ones.
+
+    With workers > 1 (workers=None: one per CPU), chunks of `chunksize` elections are
+    verified in a process pool. The dataset is stored once in shared memory, which the
+    workers attach to when they start (Python 3.8+; the elections are verified in a single
+    process otherwise).
+    """
+    elections = list(elections)
+    arrays = _pack(elections)
+    tasks = [
+        (method, fractions, start, min(start + chunksize, len(elections)))
+        for method in methods
+        for start in range(0, len(elections), chunksize)
+    ]
+    if workers == 1 or _shared_memory() is None:
+        outcomes = [_verify_range(task, arrays) for task in tasks]
+    else:
+        shared = _SharedArrays.create(arrays)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_attach, initargs=(shared.layout,)
+            ) as executor:
+                outcomes = list(executor.map(_verify_range, tasks))
+        finally:
+            shared.close()
+            shared.unlink()
+
+    results = []
+    for (method, _, start, _), outcome in zip(tasks, outcomes):
+        for index, (seats, tie, seconds, error) in enumerate(outcome, start=start):
+            results.append(
+                VerificationResult(elections[index], method, seats, tie, seconds, error)
+            )
+    return VerificationReport(results, methods)
+
+
+def _pack(elections):
+    """The numeric data of all elections as flat arrays.
+
+    Threshold rules (of apportionment.thresholds) are applied to the votes here, since only
+    shares of the votes are stored as thresholds.
+    """
+    votes = []
+    thresholds = []
+    for e in elections:
+        if isinstance(e.threshold, ThresholdRule):
+            passed = threshold_mask(e.votes, e.threshold).tolist()
+            votes += [v if p else 0 for v, p in zip(e.votes, passed)]
+            thresholds.append(np.nan)
+        else:
+            votes += e.votes
+            thresholds.append(np.nan if e.threshold is None else e.threshold)
+    integral = all(float(v).is_integer() for v in votes)
+    return dict(
+        votes=np.array(votes, dtype=np.int64 if integral else np.float64),
+        offsets=np.cumsum([0] + [len(election.votes) for election in elections], dtype=np.int64),
+        seats=np.array([election.seats for election in elections], dtype=np.int64),
+        thresholds=np.array(thresholds, dtype=np.float64),
+    )
+
+
+def _shared_memory():
+    """The module multiprocessing.shared_memory (None before Python 3.8)."""
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        return None
+    return shared_memory
+
+
+class _SharedArrays:
+    """Numpy arrays in a single shared memory block (described by a picklable layout)."""
+
+    def __init__(self, memory, layout):
+        self.memory = memory
+        self.layout = layout
+        self.arrays = {
+            name: np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+            for name, (dtype, shape, offset) in layout[1].items()
+        }
+
+    @classmethod
+    def create(cls, arrays):
+        entries = {}
+        size = 0
+        for name, array in arrays.items():
+            entries[name] = (array.dtype.str, array.shape, size)
+            size += -(-array.nbytes // 8) * 8
+        memory = _shared_memory().SharedMemory(create=True, size=max(size, 1))
+        shared = cls(memory, (memory.name, entries))
+        for name, array in arrays.items():
+            shared.arrays[name][...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, layout):
+        # worker processes share the resource tracker of the parent process, which removes
+        # the block if the parent does not unlink it
+        memory = _shared_memory().SharedMemory(name=layout[0])
+        return cls(memory, layout)
+
+    def close(self):
+        self.arrays = None
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+# the dataset of a worker process (see _attach())
+_worker_arrays = None
+
+
+def _attach(layout):
+    global _worker_arrays
+    _worker_arrays = _SharedArrays.attach(layout)
+
+
+def _verify_range(task, arrays=None):
+    """(seats, tie, seconds, error) of the elections start, ..., stop - 1 for one method."""
+    method, fractions, start, stop = task
+    if arrays is None:
+        arrays = _worker_arrays.arrays
+    outcome = []
+    for e in range(start, stop):
+        votes = arrays["votes"][arrays["offsets"][e] : arrays["offsets"][e + 1]].tolist()
+        threshold = float(arrays["thresholds"][e])
+        begin = time.perf_counter()
+        try:
+            result = compute(
+                method,
+                votes,
+                int(arrays["seats"][e]),
+                fractions=fractions,
+                threshold=None if np.isnan(threshold) else threshold,
+                as_result=True,
+            )
+        except Exception as error:  # reported per election
+            outcome.append((None, False, time.perf_counter() - begin, repr(error)))
+        else:
+            outcome.append((result.tolist(), bool(result.ties), time.perf_counter() - begin, None))
+    return outcome
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Verifies apportionment methods against official results."
+    )
+    parser.add_argument("dataset", nargs="+", help="files with one election per line")
+    parser.add_argument(
+        "--columns",
+        nargs="+",
+        default=["name", "parties", "votes", "official"],
+        help="names of the entries of each line (Election attributes, None: ignored)",
+    )
+    parser.add_argument("--threshold", type=float, help="default threshold")
+    parser.add_argument("--methods", nargs="+", default=["dhondt"])
+    parser.add_argument("--fractions", action="store_true")
+    parser.add_argument("--workers", type=int, default=1, help="0: one per CPU")
+    parser.add_argument("--chunksize", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    columns = [None if column == "None" else column for column in args.columns]
+    elections = []
+    for path in args.dataset:
+        elections += load_dataset(path, columns, threshold=args.threshold)
+    report = verify(
+        elections,
+        args.methods,
+        fractions=args.fractions,
+        workers=args.workers or None,
+        chunksize=args.chunksize,
+    )
+    print(report.to_json(indent=1) if args.json else report.table())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
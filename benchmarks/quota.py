@@ -0,0 +1,43 @@
+# Compares the heap-based quota method with the previous implementation,
+# which recomputed all priorities and upper quotas once per seat.
+
+import timeit
+import numpy as np
+import apportionment.methods as app
+
+
+def quota_per_seat(votes, seats):
+    """The previous O(seats * parties) implementation of the quota method (floats only)."""
+    votes = np.array(votes)
+    representatives = np.zeros(len(votes), dtype=int)
+    while np.sum(representatives) < seats:
+        quotas = votes / (representatives + 1)
+        upperquota = votes * (np.sum(representatives) + 1) / np.sum(votes)
+        upperquota = np.trunc(np.ceil(upperquota))
+        quotas = np.where(representatives >= upperquota, 0, quotas)
+        maxquotas = np.nonzero(quotas == quotas.max())[0]
+        representatives[maxquotas[0]] += 1
+    return representatives.tolist()
+
+
+def measure(function, repeat=3):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    votes = rng.integers(1000, 1000000, size=50).tolist()
+    parties = [str(i) for i in range(len(votes))]
+
+    print("{:>8s} {:>12s} {:>12s} {:>8s}".format("seats", "per seat", "heap", "speedup"))
+    for seats in [10, 100, 1000, 10000, 100000]:
+        assert app.quota(votes, seats, parties=parties) == quota_per_seat(votes, seats)
+        before = measure(lambda: quota_per_seat(votes, seats), repeat=1)
+        after = measure(lambda: app.quota(votes, seats, parties=parties))
+        print(
+            "{:>8d} {:>10.2f}ms {:>10.2f}ms {:>7.1f}x".format(
+                seats, before * 1000, after * 1000, before / after
+            )
+        )
@@ -0,0 +1,58 @@
+# Measures the time to import apportionment.methods (in a fresh interpreter) and the latency
+# of single compute() calls for typical small inputs (5-20 parties, 100-200 seats).
+
+import subprocess
+import sys
+import timeit
+import apportionment.methods as app
+
+IMPORT_TIME = """
+import sys, time
+start = time.perf_counter()
+import apportionment.methods
+print(time.perf_counter() - start, "numpy" in sys.modules)
+"""
+
+
+def import_time(repeat=5):
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_TIME], stdout=subprocess.PIPE, check=True
+        ).stdout.split()
+        results.append((float(output[0]), output[1] == b"True"))
+    return min(results)
+
+
+def measure(function, repeat=5):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+if __name__ == "__main__":
+    seconds, numpy_imported = import_time()
+    print(
+        "import apportionment.methods: {:.1f}ms (numpy imported: {})".format(
+            seconds * 1000, numpy_imported
+        )
+    )
+
+    votes = [1305956, 903151, 650114, 532193, 319024, 185014, 64331, 42102, 21577, 8013]
+    print(
+        "{:>22s} {:>8s} {:>8s} {:>12s} {:>12s}".format("", "parties", "seats", "python", "numpy")
+    )
+    # (the quota method is always computed in pure Python)
+    for method in [m for m in app.METHODS if m != "quota"]:
+        for parties, seats in [(5, 100), (10, 150), (20, 200)]:
+            v = (votes * 2)[:parties]
+            fast = measure(lambda: app.compute(method, v, seats))
+            limit = app._FAST_PATH_MAX_PARTIES
+            app._FAST_PATH_MAX_PARTIES = 0
+            slow = measure(lambda: app.compute(method, v, seats))
+            app._FAST_PATH_MAX_PARTIES = limit
+            print(
+                "{:>22s} {:>8d} {:>8d} {:>10.1f}us {:>10.1f}us".format(
+                    method, parties, seats, fast * 1e6, slow * 1e6
+                )
+            )
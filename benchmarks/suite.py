@@ -0,0 +1,163 @@
+# Benchmark suite: times compute() for every method name (including aliases) in float and
+# fractions mode, over a grid of party and seat counts and on the elections in examples/.
+#
+#   python benchmarks/suite.py --quick --output results.json
+#   python benchmarks/suite.py --quick --compare results.json   (fails on regressions)
+#
+# Results are written as JSON, one entry per case, so runs can be compared with a baseline.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+import numpy as np
+import apportionment.methods as app
+from apportionment.verification import parse_line
+
+ALIASES = ["lrm", "hamilton"] + [m for m in app._DIVISOR_RULES if m not in app.METHODS]
+PARTIES = [2, 10, 100, 1000, 10000]
+SEATS = [1, 10, 1000, 100000, 1000000]
+QUICK_PARTIES = [2, 10, 100]
+QUICK_SEATS = [1, 100, 1000]
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+
+
+def datasets():
+    """Yields (name, votes, seats, threshold) for the elections in examples/."""
+    with open(os.path.join(EXAMPLES, "knesset.txt"), encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                knesset_nr, _, votes, officialresult, threshold = parse_line(line)
+                yield "knesset-" + str(knesset_nr), votes, sum(officialresult), threshold
+    with open(os.path.join(EXAMPLES, "nr_wahlen.txt"), encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                year, _, votes, _ = parse_line(line)
+                yield "nr_wahlen-" + str(year), votes, 183, 0.04
+
+
+def cases(methods, parties_grid, seats_grid, modes):
+    """Yields benchmark cases as (name, description, votes, seats, threshold)."""
+    rng = np.random.default_rng(0)
+    profiles = {p: rng.integers(1, 1000000, size=p).tolist() for p in parties_grid}
+    for method in methods:
+        for fractions in modes:
+            mode = "fractions" if fractions else "float"
+            for parties in parties_grid:
+                for seats in seats_grid:
+                    description = dict(
+                        method=method, fractions=fractions, parties=parties, seats=seats
+                    )
+                    name = "{}-{}-p{}-s{}".format(method, mode, parties, seats)
+                    yield name, description, profiles[parties], seats, None
+            for dataset, votes, seats, threshold in datasets():
+                description = dict(method=method, fractions=fractions, dataset=dataset)
+                name = "{}-{}-{}".format(method, mode, dataset)
+                yield name, description, votes, seats, threshold
+
+
+def measure(function, repeat=5):
+    """The best time per call in seconds (the minimum of `repeat` measurements)."""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    # the calibration run of autorange() counts as the first measurement
+    times = [elapsed] + timer.repeat(repeat=max(repeat - 1, 0), number=number)
+    return min(times) / number
+
+
+def run(methods, parties_grid, seats_grid, modes, repeat=5, verbose=True):
+    results = []
+    for name, description, votes, seats, threshold in cases(
+        methods, parties_grid, seats_grid, modes
+    ):
+        labels = [str(i) for i in range(len(votes))]
+        seconds = measure(
+            lambda: app.compute(
+                description["method"],
+                votes,
+                seats,
+                fractions=description["fractions"],
+                parties=labels,
+                threshold=threshold,
+            ),
+            repeat=repeat,
+        )
+        results.append(dict(name=name, seconds=seconds, **description))
+        if verbose:
+            print("{:<55s} {:>12.3f}ms".format(name, seconds * 1000), flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance, min_seconds=0):
+    """Prints the ratio to the baseline for each case and returns the names of regressions.
+
+    A case regresses if it is slower than `tolerance` times the baseline and at least
+    `min_seconds` slower in absolute terms (timings of very fast cases are mostly noise).
+    """
+    previous = {entry["name"]: entry["seconds"] for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        if entry["name"] not in previous:
+            continue
+        ratio = entry["seconds"] / previous[entry["name"]]
+        flag = ""
+        if ratio > tolerance and entry["seconds"] - previous[entry["name"]] >= min_seconds:
+            regressions.append(entry["name"])
+            flag = "  REGRESSION"
+        print("{:<55s} {:>8.2f}x{}".format(entry["name"], ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of apportionment.methods.compute()")
+    parser.add_argument("--quick", action="store_true", help="small grid (for CI)")
+    parser.add_argument("--methods", nargs="+", default=app.METHODS + ALIASES)
+    parser.add_argument("--parties", nargs="+", type=int)
+    parser.add_argument("--seats", nargs="+", type=int)
+    parser.add_argument("--mode", choices=["float", "fractions", "both"], default="both")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="measurements per case (the fastest is kept)"
+    )
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run (baseline)")
+    parser.add_argument(
+        "--tolerance", type=float, default=1.5, help="allowed slowdown relative to baseline"
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1e-4,
+        help="slowdowns of less than this many seconds per call are not regressions",
+    )
+    args = parser.parse_args(argv)
+
+    parties_grid = args.parties or (QUICK_PARTIES if args.quick else PARTIES)
+    seats_grid = args.seats or (QUICK_SEATS if args.quick else SEATS)
+    modes = {"float": [False], "fractions": [True], "both": [False, True]}[args.mode]
+    results = run(args.methods, parties_grid, seats_grid, modes, repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                dict(
+                    python=platform.python_version(),
+                    numpy=np.__version__,
+                    machine=platform.machine(),
+                    results=results,
+                ),
+                f,
+                indent=1,
+            )
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_time)
+        if regressions:
+            print(str(len(regressions)) + " regression(s)")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
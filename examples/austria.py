@@ -1,10 +1,11 @@
 import apportionment.methods as app
+from apportionment.verification import parse_line
 
 
 with open("./nr_wahlen.txt", "r") as f:
 
     for line in f:
-        year, partynames, votes, officialresult = eval(line)
+        year, partynames, votes, officialresult = parse_line(line)
         print(year)
         result = app.compute(
             "dhondt", votes, 183, parties=partynames, threshold=0.04, verbose=True
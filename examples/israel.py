@@ -1,25 +1,31 @@
-import apportionment.methods as app
+from apportionment.alliances import alliances
+from apportionment.verification import parse_line
 
 
-print("Parties with surplus-vote agreements are treated as coalitions")
+print("Parties with surplus-vote agreements are treated as alliances")
 print("See https://www.knesset.gov.il/lexicon/eng/seats_eng.htm\n")
 
 with open("knesset.txt", "r") as f:
 
     for line in f:
-        knesset_nr, partynames, votes, officialresult, threshold = eval(line)
+        knesset_nr, partynames, votes, officialresult, threshold = parse_line(line, combine=False)
         print("Knesset #" + str(knesset_nr) + ":")
-        result = app.compute(
-            "dhondt",
-            votes,
-            sum(officialresult),
-            parties=partynames,
-            threshold=threshold,
-            verbose=True,
+        # the parties of an agreement are joined by "+" (names) and given as sums (votes, seats)
+        names, groups, party_votes, party_seats = [], [], [], []
+        for agreement, (name, vote, seats) in enumerate(zip(partynames, votes, officialresult)):
+            vote = vote if isinstance(vote, list) else [vote]
+            names += name.split("+") if len(vote) > 1 else [name]
+            groups += [agreement if len(vote) > 1 else None] * len(vote)
+            party_votes += vote
+            party_seats += seats if isinstance(seats, list) else [seats]
+        result = alliances(
+            party_votes, groups, sum(party_seats), method="dhondt", threshold=threshold
         )
+        for name, seats in zip(names, result):
+            print("  " + name + ": " + str(seats))
         # actual results
         print(
             "Identical with official result: "
-            + (str(tuple(result) == tuple(officialresult)))
+            + (str(tuple(result) == tuple(party_seats)))
             + "\n\n"
         )
@@ -1,4 +1,5 @@
 import apportionment.methods as app
+from apportionment.ties import all_apportionments
 
 """
 Dominik's remark:
@@ -18,3 +19,7 @@ print("votes: ", votes)
 print(seats, "seats")
 
 result = app.compute("quota", votes, seats, verbose=True)
+
+print("all apportionments under some tiebreaking:")
+for apportionment in all_apportionments("quota", votes, seats):
+    print("  ", apportionment)
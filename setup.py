@@ -85,6 +85,7 @@ setuptools.setup(
         "Intended Audience :: Science/Research",
     ],
     packages=["apportionment"],
+    entry_points={"console_scripts": ["apportionment=apportionment.cli:main"]},
     python_requires=">=3.7",
     setup_requires=[
         "wheel",
@@ -0,0 +1,98 @@
+"""
+Unit tests for apportionment with alliances
+"""
+
+import numpy as np
+import pytest
+import apportionment.methods as app
+from apportionment.alliances import alliances
+from apportionment.verification import parse_line
+
+# Knesset #19: surplus-vote agreements, D'Hondt on both levels
+KNESSET_VOTES = [885163, 345985, 543458, 432118, 331868, 195892]
+KNESSET_VOTES += [189167, 172403, 138450, 113439, 97030, 78974]
+KNESSET_GROUPS = [0, 0, 1, 1, 2, 2, 3, 3, None, 4, 4, None]
+KNESSET_RESULT = [31, 12, 19, 15, 11, 7, 6, 6, 4, 4, 3, 2]
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+def test_knesset(fractions):
+    result, seats_of = alliances(
+        KNESSET_VOTES,
+        KNESSET_GROUPS,
+        120,
+        threshold=0.02,
+        fractions=fractions,
+        return_groups=True,
+    )
+    assert result == KNESSET_RESULT
+    assert seats_of == {0: 43, 1: 34, 2: 18, 3: 12, 4: 7}
+
+
+def test_parse_line_terms():
+    line = "[19, ['A+B', 'C'], [885163+345985, 78974], [31+12, 2], 0.02]"
+    assert parse_line(line) == [19, ["A+B", "C"], [1231148, 78974], [43, 2], 0.02]
+    assert parse_line(line, combine=False) == [
+        19,
+        ["A+B", "C"],
+        [[885163, 345985], 78974],
+        [[31, 12], 2],
+        0.02,
+    ]
+
+
+@pytest.mark.parametrize("method", app.METHODS)
+def test_without_alliances(method):
+    votes = [1305956, 903151, 650114, 532193, 319024]
+    assert alliances(votes, [None] * 5, 100, method=method) == app.compute(method, votes, 100)
+    # each party is an alliance of its own
+    assert alliances(votes, "abcde", 100, method=method) == app.compute(method, votes, 100)
+
+
+@pytest.mark.parametrize(
+    "method", ["dhondt", "saintelague", "huntington", "adams", "largest_remainder"]
+)
+def test_many_alliances(method):
+    rng = np.random.default_rng(25)
+    votes = rng.integers(1, 100000, size=600).tolist()
+    groups = rng.integers(0, 250, size=600).tolist()
+    result, seats_of = alliances(votes, groups, 1000, method=method, return_groups=True)
+    assert sum(result) == 1000
+    # compare with the upper and lower apportionments computed one by one
+    labels = sorted(set(groups))
+    sums = [sum(v for v, g in zip(votes, groups) if g == label) for label in labels]
+    upper = app.compute(method, sums, 1000)
+    assert seats_of == dict(zip(labels, upper))
+    for label, seats in zip(labels, upper):
+        members = [i for i, g in enumerate(groups) if g == label]
+        lower = app.compute(method, [votes[i] for i in members], seats)
+        assert [result[i] for i in members] == lower
+    assert alliances(votes, groups, 1000, method=method, fractions=True) == result
+
+
+def test_submethod_and_ties():
+    # Sainte-Laguë between the alliances, D'Hondt within the alliances
+    assert alliances([52, 20, 28], ["x", "x", None], 5, "saintelague", "dhondt") == [3, 1, 1]
+    # the alliance receives 2 seats, which are tied between its parties
+    assert alliances([50, 50, 50], ["x", "x", None], 3) == [1, 1, 1]
+    assert alliances([50, 50, 50], ["x", "x", None], 4, fractions=True) in [[2, 1, 1], [1, 2, 1]]
+    with pytest.raises(app.TiesException):
+        alliances([50, 50, 50], ["x", "x", None], 4, tiesallowed=False)
+    with pytest.raises(app.TiesException):
+        alliances([50, 50, 50], ["x", "x", None], 4, fractions=True, tiesallowed=False)
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+@pytest.mark.parametrize("method", ["largest_remainder", "dhondt", "adams"])
+def test_alliances_without_seats(method, fractions):
+    # the last party and, with the higher threshold, the alliance have no votes after the threshold
+    votes, groups = [100, 50, 30, 2], [None, "x", "x", None]
+    result = alliances(votes, groups, 10, method, threshold=0.05, fractions=fractions)
+    assert result[3] == 0 and sum(result) == 10
+    result = alliances(votes, groups, 10, method, threshold=0.3, fractions=fractions)
+    assert result == [10, 0, 0, 0]
+
+
+def test_groups_length():
+    with pytest.raises(ValueError):
+        alliances([10, 20, 30], [0, 0], 5)
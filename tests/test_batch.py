@@ -0,0 +1,138 @@
+"""
+Unit tests for the batch API
+"""
+
+import numpy as np
+import pytest
+import apportionment.methods as app
+from apportionment.batch import (
+    compute_batch,
+    compute_sweep,
+    apply_threshold_batch,
+    within_quota_batch,
+)
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        "quota",
+        "largest_remainder",
+        "dhondt",
+        "saintelague",
+        "modified_saintelague",
+        "huntington",
+        "adams",
+        "dean",
+        "webster",
+        "hill",
+    ],
+)
+@pytest.mark.parametrize("threshold", [None, 0.05])
+def test_batch_equals_compute(method, threshold):
+    rng = np.random.default_rng(42)
+    votes = np.concatenate(
+        [rng.integers(1, 1000, size=(30, 6)), rng.choice([0, 5, 10, 20], size=(30, 6))]
+    )
+    votes[votes.sum(axis=1) == 0, 0] = 1
+    seats = rng.integers(1, 40, size=len(votes))
+    result, ties = compute_batch(method, votes, seats, threshold=threshold)
+    for e in range(len(votes)):
+        expected = app.compute(method, votes[e].tolist(), int(seats[e]), threshold=threshold)
+        assert result[e].tolist() == expected
+        if method != "quota":
+            try:
+                app.compute(
+                    method,
+                    votes[e].tolist(),
+                    int(seats[e]),
+                    threshold=threshold,
+                    tiesallowed=False,
+                )
+                assert not ties[e]
+            except app.TiesException:
+                assert ties[e]
+
+
+@pytest.mark.parametrize("method", app.METHODS)
+def test_batch_ties(method):
+    votes = [[11, 11, 11], [12, 12, 11], [5117, 4400, 162]]
+    result, ties = compute_batch(method, votes, [4, 2, 100])
+    assert result[0].tolist() == [2, 1, 1]
+    assert result[1].tolist() == [1, 1, 0]
+    # the quota method also reports ties in intermediate rounds
+    assert ties.tolist() == [True, method == "quota", False]
+
+
+def test_batch_single_seat_number():
+    votes = [[14, 28, 7, 35], [0, 14, 28, 0]]
+    result, ties = compute_batch("dhondt", votes, 6)
+    assert result.tolist() == [[1, 2, 0, 3], [0, 2, 4, 0]]
+    assert not ties.any()
+
+
+def test_apply_threshold_batch():
+    votes = np.array([[41, 56, 3], [3, 41, 56]])
+    assert apply_threshold_batch(votes, 0.03).tolist() == votes.tolist()
+    assert apply_threshold_batch(votes, 0.031).tolist() == [[41, 56, 0], [0, 41, 56]]
+
+
+def test_batch_requires_matrix():
+    with pytest.raises(ValueError):
+        compute_batch("dhondt", [1, 2, 3], 2)
+    with pytest.raises(NotImplementedError):
+        compute_batch("unknown", [[1, 2, 3]], 2)
+
+
+def test_largest_remainder_without_votes():
+    # elections without votes receive no seats and are reported (if they have seats)
+    result, ties = compute_batch("largest_remainder", [[1, 2, 3], [0, 0, 0], [0, 0, 0]], [2, 2, 0])
+    assert result.tolist() == [[0, 1, 1], [0, 0, 0], [0, 0, 0]]
+    assert ties.tolist() == [False, True, False]
+    result, ties = compute_batch("largest_remainder", [[1, 2, 3], [3, 1, 1]], 2, threshold=0.6)
+    assert result.tolist() == [[0, 0, 0], [2, 0, 0]] and ties.tolist() == [True, False]
+    with pytest.raises(ValueError):
+        compute_sweep("largest_remainder", [0, 0, 0], 3)
+
+
+@pytest.mark.parametrize("method", app.METHODS + ["hamilton", "webster", "equalproportions"])
+@pytest.mark.parametrize("fractions", [True, False])
+@pytest.mark.parametrize(
+    "votes", [[5117, 4400, 162, 161, 160], [0, 14, 28, 0, 0], [2, 1, 1, 2, 2]]
+)
+def test_sweep_equals_compute(method, fractions, votes):
+    result = compute_sweep(method, votes, 40, fractions=fractions)
+    assert result.shape == (40, len(votes))
+    for seats in range(1, 41):
+        assert result[seats - 1].tolist() == app.compute(method, votes, seats, fractions=fractions)
+
+
+def test_sweep_alabama_paradox():
+    # the largest remainder method is not house-monotone
+    votes = [6, 6, 2]
+    result = compute_sweep("largest_remainder", votes, 11)
+    assert result[9].tolist() == [4, 4, 2]
+    assert result[10].tolist() == [5, 5, 1]
+    assert compute_sweep("dhondt", votes, 0).shape == (0, 3)
+
+
+def test_within_quota_batch():
+    rng = np.random.default_rng(3)
+    votes = rng.integers(0, 1000, size=(500, 6))
+    representatives = rng.integers(0, 8, size=(500, 6))
+    representatives[:100] = compute_batch("hamilton", votes[:100], 30)[0]
+    result = within_quota_batch(votes, representatives)
+    expected = [app.within_quota(v.tolist(), r.tolist()) for v, r in zip(votes, representatives)]
+    assert result.within.tolist() == expected
+    assert np.all(result.within[:100])
+    assert sorted(set(result.elections.tolist())) == np.nonzero(~result.within)[0].tolist()
+    for e, i, upper in zip(result.elections, result.parties, result.upper):
+        quota = votes[e, i] * representatives[e].sum() / votes[e].sum()
+        assert representatives[e, i] > np.ceil(quota) if upper else representatives[e, i] < quota
+    # one vote vector for all rows, with products that do not fit into int64
+    votes = [3 * 10**18, 2 * 10**18, 10**18]
+    result = within_quota_batch(votes, [[3, 2, 1], [3, 1, 2]])
+    assert result.within.tolist() == [True, False]
+    assert result.parties.tolist() == [1, 2] and result.upper.tolist() == [False, True]
+    with pytest.raises(ValueError):
+        within_quota_batch(votes, [3, 2, 1])
@@ -0,0 +1,69 @@
+"""
+Unit tests for biproportional apportionment
+"""
+
+import numpy as np
+import pytest
+import apportionment.methods as app
+from apportionment.biproportional import biproportional
+
+
+@pytest.mark.parametrize("method", ["dhondt", "saintelague", "modified_saintelague"])
+@pytest.mark.parametrize("shape", [(3, 4), (20, 10), (60, 80)])
+def test_divisors_reproduce_seats(method, shape):
+    rng = np.random.default_rng(shape[0])
+    density = 1 if shape[0] < 10 else 0.4
+    votes = rng.integers(1, 100000, size=shape) * (rng.random(shape) < density)
+    votes[:, 0] += 1
+    votes[0] += 1
+    district_seats = rng.integers(1, 15, size=shape[0])
+    party_seats = app.compute(
+        method,
+        votes.sum(axis=0).tolist(),
+        int(district_seats.sum()),
+        parties=[str(j) for j in range(shape[1])],
+    )
+    seats, district_divisors, party_divisors = biproportional(
+        votes, district_seats, party_seats, method=method, return_divisors=True
+    )
+    seats = np.array(seats)
+    assert seats.sum(axis=1).tolist() == district_seats.tolist()
+    assert seats.sum(axis=0).tolist() == party_seats
+    assert np.all(seats[votes == 0] == 0)
+    # d_(seats - 1) <= votes / (D_i * P_j) <= d_seats
+    rule = app._DIVISOR_RULES[method]
+    quotients = votes / np.outer(district_divisors, party_divisors)
+    assert np.all(quotients <= app._divisor_values(rule, seats) * (1 + 1e-9))
+    lower = np.where(seats > 0, app._divisor_values(rule, np.maximum(seats - 1, 0)), 0)
+    assert np.all(quotients >= lower * (1 - 1e-9))
+
+
+def test_sparse_input():
+    votes = [[5000, 0, 1200, 0], [0, 3000, 800, 400], [2500, 2500, 0, 0]]
+    result = biproportional(votes, [4, 3, 5], [5, 4, 2, 1])
+    assert np.array(result).sum(axis=0).tolist() == [5, 4, 2, 1]
+    cells = {(i, j): v for i, row in enumerate(votes) for j, v in enumerate(row) if v > 0}
+    sparse = biproportional(cells, [4, 3, 5], [5, 4, 2, 1])
+    assert sparse == {
+        (i, j): s for i, row in enumerate(result) for j, s in enumerate(row) if s > 0
+    }
+
+
+def test_ties():
+    votes = [[10, 10], [10, 10]]
+    assert np.array(biproportional(votes, [1, 1], [1, 1])).sum() == 2
+    with pytest.raises(app.TiesException):
+        biproportional(votes, [1, 1], [1, 1], tiesallowed=False)
+    assert biproportional(votes, [2, 2], [2, 2], tiesallowed=False) == [[1, 1], [1, 1]]
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        biproportional([[5, 5], [5, 5]], [2, 2], [1, 2])
+    with pytest.raises(ValueError):
+        # the second party only runs in a district without seats
+        biproportional([[5, 0], [0, 5]], [2, 0], [1, 1])
+    with pytest.raises(ValueError):
+        biproportional([[5, 5, 5]], [2, 1], [2, 1])
+    with pytest.raises(NotImplementedError):
+        biproportional([[5, 5], [5, 5]], [2, 2], [2, 2], method="huntington")
@@ -0,0 +1,123 @@
+"""
+Unit tests for the apportionment cache
+"""
+
+import threading
+import numpy as np
+import pytest
+import apportionment.methods as app
+from apportionment.cache import ApportionmentCache, cache_key
+
+
+VOTES = [1305956, 903151, 650114, 532193, 319024]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        cache = ApportionmentCache(maxsize=3)
+    else:
+        cache = ApportionmentCache(maxsize=3, path=str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_hits_and_misses(cache):
+    assert cache.compute("dhondt", VOTES, 18) == app.compute("dhondt", VOTES, 18)
+    assert cache.compute("dhondt", VOTES, 18) == app.compute("dhondt", VOTES, 18)
+    assert cache.compute("dhondt", np.array(VOTES), 18) == app.compute("dhondt", VOTES, 18)
+    assert cache.compute("dhondt", VOTES, 18, threshold=0.1) == [7, 5, 3, 3, 0]
+    # (the dtype is part of the key)
+    assert cache.compute("dhondt", VOTES, 18, threshold=0.1, dtype="int64") == [7, 5, 3, 3, 0]
+    info = cache.info()
+    assert (info.hits, info.misses, info.size, info.maxsize) == (2, 3, 3, 3)
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 0, 3)
+
+
+def test_dtype(cache):
+    votes = list(range(1, 101))
+    expected = app.compute("saintelague", votes, 300, fractions=True)
+    assert cache.compute("saintelague", votes, 300, fractions=True, dtype="object") == expected
+    votes = [10**18, 1] * 50
+    cache.compute("dhondt", votes, 300, fractions=True, dtype="object")
+    # the result of the object dtype is not returned for int64 (which raises)
+    with pytest.raises(OverflowError):
+        cache.compute("dhondt", votes, 300, fractions=True, dtype="int64")
+
+
+def test_lru_eviction(cache):
+    for seats in [1, 2, 3]:
+        cache.compute("dhondt", VOTES, seats)
+    cache.compute("dhondt", VOTES, 1)  # 2 is now least recently used
+    cache.compute("dhondt", VOTES, 4)
+    assert cache.info().evictions == 1
+    assert cache.info().size == 3
+    cache.compute("dhondt", VOTES, 1)
+    cache.compute("dhondt", VOTES, 3)
+    assert cache.info().hits == 3
+    cache.compute("dhondt", VOTES, 2)
+    assert cache.info().misses == 5
+
+
+def test_results_are_copies(cache):
+    first = cache.compute("saintelague", VOTES, 18)
+    first[0] = 100
+    assert cache.compute("saintelague", VOTES, 18) == app.compute("saintelague", VOTES, 18)
+    result = cache.compute("dhondt", [10, 10, 5], 3, as_result=True)
+    result.ties[0].tied.append(7)
+    result = cache.compute("dhondt", [10, 10, 5], 3, as_result=True)
+    assert result.tolist() == [2, 1, 0]
+    assert [(tie.winners, tie.losers) for tie in result.ties] == [([0], [1, 2])]
+    assert result.cutoff == 5
+
+
+def test_ties_not_cached(cache):
+    with pytest.raises(app.TiesException):
+        cache.compute("dhondt", [10, 10], 1, tiesallowed=False)
+    assert cache.compute("dhondt", [10, 10], 1) == [1, 0]
+    assert cache.info().size == 1
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ApportionmentCache(path=path)
+    cache.compute("huntington", VOTES, 18, fractions=True)
+    cache.close()
+    cache = ApportionmentCache(path=path)
+    assert cache.info().size == 1
+    assert cache.compute("huntington", VOTES, 18, fractions=True) == app.compute(
+        "huntington", VOTES, 18
+    )
+    assert cache.info().hits == 1
+    cache.compute("huntington", VOTES, 19, fractions=True)
+    assert cache.info().size == 2
+    cache.close()
+
+
+def test_cache_key():
+    assert cache_key("dhondt", VOTES, 18) == cache_key("dhondt", np.array(VOTES), np.int64(18))
+    assert cache_key("dhondt", VOTES, 18) != cache_key("dhondt", VOTES, 18, fractions=True)
+    assert cache_key("dhondt", VOTES, 18) != cache_key("saintelague", VOTES, 18)
+    assert (
+        cache_key("dhondt", VOTES, 18, dtype="int64")
+        == cache_key("dhondt", VOTES, 18, dtype=np.int64)
+        != cache_key("dhondt", VOTES, 18)
+    )
+
+
+def test_threads(cache):
+    def work():
+        for seats in range(20):
+            assert cache.compute("dhondt", VOTES, seats % 5) == app.compute(
+                "dhondt", VOTES, seats % 5
+            )
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    info = cache.info()
+    assert info.hits + info.misses == 80
+    assert info.size == 3
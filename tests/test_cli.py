@@ -0,0 +1,99 @@
+"""
+Unit tests for the command-line interface
+"""
+
+import json
+import pytest
+import apportionment.methods as app
+from apportionment.cli import main
+
+
+ELECTIONS = [
+    ([1305956, 903151, 650114, 532193, 319024], 18),
+    ([10, 10, 5], 3),
+    ([5117, 4400, 162, 161, 160], 100),
+]
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    path = tmp_path / "elections.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for number, (votes, seats) in enumerate(ELECTIONS):
+            f.write(json.dumps(dict(id=number, votes=votes, seats=seats)) + "\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("method", ["dhondt", "largest_remainder", "huntington", "quota"])
+@pytest.mark.parametrize(
+    "options", [[], ["--fractions"], ["--chunksize", "2"], ["--engine", "batch"]]
+)
+def test_jsonl(jsonl_file, capsys, method, options):
+    assert main([jsonl_file, "--method", method, "--threshold", "0.04"] + options) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["id"] for record in records] == [0, 1, 2]
+    for record, (votes, seats) in zip(records, ELECTIONS):
+        expected = app.compute(method, votes, seats, threshold=0.04, as_result=True)
+        assert record["apportionment"] == expected.tolist()
+        assert record["tie"] == bool(expected.ties)
+
+
+def test_csv(tmp_path):
+    path = tmp_path / "elections.csv"
+    path.write_text("year,seats,A,B,C\n2019,10,60,30,10\n2020,3,10,10,5\n")
+    output = tmp_path / "result.csv"
+    main([str(path), "--keep", "year", "--threshold", "0.2", "-o", str(output)])
+    assert output.read_text().splitlines() == [
+        "year,seats,A,B,C,tie",
+        "2019,10,7,3,0,0",
+        "2020,3,2,1,0,1",
+    ]
+    output = tmp_path / "result.jsonl"
+    main([str(path), "--seats", "4", "--keep", "year", "seats", "-o", str(output)])
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert records[0] == {
+        "year": "2019",
+        "seats": "10",
+        "apportionment": {"A": 3, "B": 1, "C": 0},
+        "tie": False,
+    }
+
+
+def test_workers(jsonl_file, capsys):
+    main([jsonl_file, "--workers", "2", "--chunksize", "1"])
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["apportionment"] for record in records] == [
+        app.compute("dhondt", votes, seats) for votes, seats in ELECTIONS
+    ]
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_profile(tmp_path, jsonl_file, capsys, workers):
+    path = tmp_path / "profile.json"
+    main([jsonl_file, "--workers", workers, "--chunksize", "2", "--profile", str(path)])
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+    assert profile["calls"] == len(ELECTIONS)
+    assert profile["counters"]["fast path calls"] == len(ELECTIONS)
+    assert len(profile["slowest"]) == len(ELECTIONS)
+
+
+def test_errors(tmp_path, jsonl_file):
+    path = tmp_path / "elections.csv"
+    path.write_text("A,B\n1,2\n")
+    with pytest.raises(ValueError):
+        main([str(path)])
+    with pytest.raises(SystemExit):
+        main([jsonl_file, "--engine", "batch", "--fractions"])
+
+
+def test_lazy_numpy_import(jsonl_file):
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; from apportionment.cli import main; "
+        "main([{!r}, '--workers', '2', '-o', {!r}]); "
+        "assert 'numpy' not in sys.modules and 'apportionment.profiling' not in sys.modules"
+    ).format(jsonl_file, jsonl_file + ".out")
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,97 @@
+"""
+Unit tests for tiered apportionment
+"""
+
+import numpy as np
+import pytest
+import apportionment.methods as app
+from apportionment.districts import Tier, tiered
+
+
+def _districts(seed, districts=40, parties=6, max_seats=12):
+    rng = np.random.default_rng(seed)
+    votes = rng.integers(0, 100000, size=(districts, parties)) * (rng.random(parties) + 0.1)
+    votes = votes.astype(int)
+    seats = rng.integers(1, max_seats, size=districts)
+    states = np.arange(districts) % 9
+    return votes, seats, states
+
+
+@pytest.mark.parametrize("method", ["dhondt", "saintelague", "hamilton", "huntington"])
+def test_single_tier(method):
+    votes, seats, _ = _districts(1)
+    result = tiered([Tier(seats, method=method)], votes)
+    for d in range(len(votes)):
+        assert result.seats[0][d].tolist() == app.compute(method, votes[d].tolist(), seats[d])
+    assert result.total().sum() == seats.sum()
+
+
+def test_compensatory_tiers():
+    # Austrian National Council: regional, state and federal tiers
+    votes, seats, states = _districts(2, max_seats=5)
+    state_seats = np.bincount(states, seats) + 3
+    tiers = [
+        Tier(seats, states, "hare", quota="parent"),
+        Tier(state_seats, [0] * 9, "hare"),
+        Tier([183], method="dhondt"),
+    ]
+    result = tiered(tiers, votes, threshold=0.04, exemption=1)
+    total = votes.sum(axis=0)
+    expected = app.compute("dhondt", total.tolist(), 183, threshold=0.04)
+    assert result.total().tolist() == expected
+    states_total = result.district_totals(1)
+    assert states_total.shape == (9, 6)
+    assert np.all(states_total.sum(axis=1) <= state_seats)
+    assert result.district_totals(2).tolist() == [expected]
+    # the regional tier uses the Hare quota of the state
+    quota = np.bincount(states, votes.sum(axis=1)) / state_seats
+    assert np.all(result.seats[0] == np.floor(votes / quota[states][:, None]))
+
+
+def test_overhang_seats_are_kept():
+    # party 0 wins many district seats with few votes overall
+    votes = np.array([[100, 1, 1], [100, 1, 1], [0, 500, 400], [0, 500, 400]])
+    tiers = [Tier([5, 5, 1, 1], [0, 0, 0, 0], method="dhondt"), Tier([14], method="dhondt")]
+    result = tiered(tiers, votes)
+    assert result.seats[0][:, 0].tolist() == [5, 5, 0, 0]
+    # the remaining 4 seats go to parties 1 and 2 (2 each), party 1 has won 2 of them already
+    assert result.seats[1].tolist() == [[0, 0, 2]]
+    assert result.total().tolist() == [10, 2, 2]
+
+
+def test_residual_votes():
+    votes, seats, states = _districts(3)
+    tiers = [Tier(seats, states, "hare"), Tier(None, [0] * 9, "hare", votes="residual")]
+    tiers.append(Tier(None, method="largest_remainder", votes="residual"))
+    result = tiered(tiers, votes)
+    assert result.total().sum() == seats.sum()
+    assert np.all(result.district_totals(1).sum(axis=1) <= np.bincount(states, seats))
+    quota = votes.sum(axis=1) / seats
+    assert np.all(result.seats[0] == np.floor(votes / quota[:, None]))
+
+
+def test_workers():
+    votes, seats, states = _districts(4, districts=500)
+    tiers = [Tier(seats, states, "saintelague"), Tier(None, method="saintelague")]
+    expected = tiered(tiers, votes, threshold=0.05)
+    result = tiered(tiers, votes, threshold=0.05, workers=2, chunksize=64)
+    for seats_expected, seats_result in zip(expected.seats, result.seats):
+        assert seats_expected.tolist() == seats_result.tolist()
+
+
+def test_invalid_tiers():
+    votes, seats, states = _districts(5)
+    with pytest.raises(ValueError):
+        tiered([Tier(None)], votes)
+    with pytest.raises(ValueError):
+        tiered([Tier(seats[:-1])], votes)
+    with pytest.raises(ValueError):
+        tiered([Tier(seats, states), Tier([10, 10])], votes)
+    with pytest.raises(ValueError):
+        tiered([Tier(seats, method="hare")], votes)
+    with pytest.raises(ValueError):
+        tiered([Tier(seats, states), Tier(None, votes="residual")], votes)
+    with pytest.raises(ValueError):
+        tiered([Tier(seats, states, "hare"), Tier(None, votes="residual", quota="parent")], votes)
+    with pytest.raises(ValueError):
+        Tier(seats, votes="remainders")
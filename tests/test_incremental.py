@@ -0,0 +1,86 @@
+"""
+Unit tests for incremental apportionment
+"""
+
+import random
+import pytest
+import apportionment.methods as app
+from apportionment.incremental import Apportioner
+from apportionment.thresholds import DistrictSeats, Share, Votes
+
+
+@pytest.mark.parametrize("method", app.METHODS)
+@pytest.mark.parametrize("fractions", [True, False])
+@pytest.mark.parametrize("threshold", [None, 0.1])
+@pytest.mark.parametrize("seats", [3, 20])
+def test_updates_equal_compute(method, fractions, threshold, seats):
+    rng = random.Random(seats)
+    votes = [0, 5, 12, 40, 7, 0]
+    apportioner = Apportioner(method, votes, seats, fractions=fractions, threshold=threshold)
+    assert apportioner.result == app.compute(
+        method, votes, seats, fractions=fractions, threshold=threshold
+    )
+    for _ in range(40):
+        party = rng.randrange(len(votes))
+        delta = rng.randint(0, 20)
+        votes[party] += delta
+        expected = app.compute(method, votes, seats, fractions=fractions, threshold=threshold)
+        assert apportioner.update(party, delta) == expected
+    assert apportioner.votes == votes
+
+
+def test_party_crosses_threshold():
+    apportioner = Apportioner("dhondt", [30, 20, 10], 6, threshold=0.2)
+    assert apportioner.result == [4, 2, 0]
+    assert apportioner.update(2, 5) == [3, 2, 1]
+    # the bar grows with the total number of votes
+    assert apportioner.update(0, 40) == [6, 0, 0]
+
+
+@pytest.mark.parametrize("method", app.METHODS[2:])
+def test_start_without_votes(method):
+    apportioner = Apportioner(method, [0, 0, 0], 10)
+    assert apportioner.result == app.compute(method, [0, 0, 0], 10)
+    assert apportioner.update(2, 100) == app.compute(method, [0, 0, 100], 10)
+    assert apportioner.update(0, 50) == app.compute(method, [50, 0, 100], 10)
+
+
+def test_all_parties_below_threshold():
+    votes = [40, 40, 20]
+    apportioner = Apportioner("dhondt", votes, 6, threshold=0.4)
+    assert apportioner.result == [3, 3, 0]
+    # no party has 40% of the votes after the first update
+    for party, delta in [(2, 10), (0, 20), (1, 30), (2, 100)]:
+        votes[party] += delta
+        expected = app.compute("dhondt", votes, 6, threshold=0.4)
+        assert apportioner.update(party, delta) == expected
+
+
+@pytest.mark.parametrize(
+    "threshold",
+    [Share(0.2), Share([0.2, 0.2, 0.3]), Share(0.2) | Votes(25), DistrictSeats(1, won=[1, 0, 0])],
+)
+def test_threshold_rules(threshold):
+    rng = random.Random(24)
+    votes = [30, 20, 10]
+    apportioner = Apportioner("dhondt", votes, 6, threshold=threshold)
+    assert apportioner.result == app.compute("dhondt", votes, 6, threshold=threshold)
+    for _ in range(30):
+        party = rng.randrange(len(votes))
+        delta = rng.randint(0, 20)
+        votes[party] += delta
+        expected = app.compute("dhondt", votes, 6, threshold=threshold)
+        assert apportioner.update(party, delta) == expected
+
+
+def test_int32_votes():
+    import numpy as np
+
+    votes = np.array([2**30, 2**30 - 5, 12345], dtype=np.int32)
+    apportioner = Apportioner("dhondt", votes, 10, threshold=0.01)
+    assert apportioner.update(2, np.int32(2**30)) == [3, 3, 4]
+
+
+def test_unknown_method():
+    with pytest.raises(NotImplementedError):
+        Apportioner("unknown", [1, 2], 3)
@@ -2,8 +2,12 @@
 Unit tests
 """
 
+from fractions import Fraction
+import math
+import numpy as np
 import pytest
 import apportionment.methods as app
+from apportionment.batch import compute_batch
 
 
 @pytest.mark.parametrize(
@@ -559,3 +563,311 @@ def test_israeli_elections(
         verbose=verbose,
     )
     assert str(tuple(result) == tuple(officialresult))
+
+
+@pytest.mark.parametrize("method", ["dhondt", "saintelague", "modified_saintelague"])
+@pytest.mark.parametrize("seats", [1, 17, 250, 3000])
+def test_divisor_against_full_weight_matrix(method, seats):
+    rng = np.random.default_rng(seats)
+    votes = rng.integers(1, 100000, size=40)
+    divisors = {
+        "dhondt": np.arange(seats) + 1,
+        "saintelague": 2 * np.arange(seats) + 1,
+        "modified_saintelague": np.insert(2 * np.arange(1.0, seats) + 1, 0, 1.4),
+    }[method]
+    weights = np.array([p / divisors for p in votes])
+    minweight = np.sort(weights, axis=None)[-seats]
+    expected = np.count_nonzero(weights >= minweight, axis=1)
+    parties = [str(i) for i in range(len(votes))]
+    assert app.compute(method, votes, seats, parties=parties) == expected.tolist()
+
+
+@pytest.mark.parametrize(
+    "method, votes, seats, expected",
+    [
+        ("huntington", [5, 30, 0], 10, [2, 8, 0]),  # 5 / sqrt(1 * 2) == 30 / sqrt(8 * 9)
+        ("modified_saintelague", [19, 95], 4, [1, 3]),  # 19 / 1.4 == 95 / 7
+    ],
+)
+def test_exact_ties_with_irrational_or_decimal_divisors(method, votes, seats, expected):
+    assert app.compute(method, votes, seats, fractions=True) == expected
+    with pytest.raises(app.TiesException):
+        app.compute(method, votes, seats, fractions=True, tiesallowed=False)
+
+
+def test_within_quota_exact():
+    # the quotas are exactly 2 and 5 (floating-point arithmetic gives 2.0000000000000004)
+    votes = [1330509160681006058, 3326272901702515145]
+    assert app.within_quota(votes, [2, 5])
+    assert not app.within_quota(votes, [3, 4])
+    assert not app.within_quota(votes, [1, 6])
+    assert app.within_quota([0.5, 1.5, 2], [1, 1, 2])
+    assert not app.within_quota([0.5, 1.5, 2], [0, 3, 1])
+    assert app.within_quota([0, 0], [0, 0])
+    result = app.compute("dhondt", votes, 7, as_result=True)
+    assert result.within_quota
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+def test_quota_house_monotone_and_within_quota(fractions):
+    votes = [5117, 4400, 162, 161, 160]
+    previous = [0] * len(votes)
+    for seats in range(1, 120):
+        result = app.compute("quota", votes, seats, fractions=fractions)
+        assert sum(result) == seats
+        assert all(r >= p for r, p in zip(result, previous))
+        assert app.within_quota(votes, result)
+        previous = result
+
+
+def test_quota_tiebreaking_message(capsys):
+    assert app.compute("quota", [720, 720, 120, 120], 8, verbose=True) == [4, 3, 1, 0]
+    output = capsys.readouterr().out
+    assert "tiebreaking necessary in round 1:" in output
+    assert "ties broken in favor of: a\n  to the disadvantage of: b\n" in output
+
+
+@pytest.mark.parametrize("method", app.METHODS + ["webster", "hill"])
+@pytest.mark.parametrize("fractions", [True, False])
+def test_fast_path_equals_numpy(method, fractions, monkeypatch):
+    rng = np.random.default_rng(3)
+    profiles = [rng.integers(0, 1000, size=7).tolist() for _ in range(20)]
+    profiles += [rng.choice([0, 5, 10, 20, 30], size=5).tolist() for _ in range(20)]
+    profiles += [[0.5, 2.25, 1.0], [0, 0, 0, 1], [11, 11, 11]]
+    for votes in profiles:
+        for seats in [0, 1, 3, 4, 17, 60]:
+            results = []
+            for limit in [app._FAST_PATH_MAX_PARTIES, 0]:
+                monkeypatch.setattr(app, "_FAST_PATH_MAX_PARTIES", limit)
+                for tiesallowed in [True, False] if method != "quota" else [True]:
+                    try:
+                        results.append(
+                            app.compute(
+                                method, votes, seats, fractions=fractions, tiesallowed=tiesallowed
+                            )
+                        )
+                    except app.TiesException:
+                        results.append("ties")
+            assert results[: len(results) // 2] == results[len(results) // 2 :]
+
+
+def test_lazy_numpy_import():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; import apportionment.methods as app; "
+        "assert app.compute('dhondt', [5, 3, 2], 7) == [4, 2, 1]; "
+        "assert 'numpy' not in sys.modules; "
+        "app.compute('dhondt', [5, 3, 2], 7, verbose=True); "
+        "assert 'numpy' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+def test_ties_never_skip_larger_remainders(fractions, capsys):
+    # remainders 6/11, 6/11 and 10/11 for two remaining seats
+    votes = [0, 10, 10, 0, 0, 2]
+    result = app.compute("largest_remainder", votes, 10, fractions=fractions, verbose=True)
+    assert result == [0, 5, 4, 0, 0, 1]
+    assert "ties broken in favor of: b\n  to the disadvantage of: c\n" in capsys.readouterr().out
+    # fewer seats than parties: the strongest party is never tied
+    for method in ["huntington", "adams", "dean"]:
+        assert app.compute(method, [5, 5, 9], 2, fractions=fractions) == [1, 0, 1]
+        assert app.compute(method, [5, 5, 9], 0, fractions=fractions, tiesallowed=False) == [0] * 3
+
+
+def test_tie_object():
+    tie = app.Tie([1, 3, 4], 2)
+    assert tie and tie.winners == [1, 3] and tie.losers == [4]
+    assert not app.Tie([2], 1)
+    assert tie.message("abcde", order="abcde") == (
+        "  tiebreaking in order of: abcde\n"
+        "  ties broken in favor of: b, d\n"
+        "  to the disadvantage of: e"
+    )
+
+
+@pytest.mark.parametrize(
+    "method", ["dhondt", "saintelague", "modified_saintelague", "adams", "dean"]
+)
+@pytest.mark.parametrize("fractions", [True, False])
+def test_divisor_interval(method, fractions):
+    votes = [1305956, 903151, 650114, 532193, 319024]
+    result = app.compute(method, votes, 18, fractions=fractions, as_result=True)
+    d_min, d_max = app.divisor_interval(votes, result.tolist(), method, fractions=fractions)
+    assert d_min < d_max == result.cutoff
+    if fractions:
+        assert isinstance(d_min, Fraction) and isinstance(d_max, Fraction)
+    # every divisor inside the interval yields the apportionment
+    rule = app._DIVISOR_RULES[method]
+    divisor = (d_min + d_max) / 2
+    offset = 1 if method in ["adams", "dean"] else 0
+    for vote, seats in zip(votes, result):
+        weights = vote / app._divisor_values(rule, np.arange(40))
+        assert offset + np.count_nonzero(weights > divisor) == seats
+    # other apportionments are rejected
+    assert app.divisor_interval(votes, [8, 4, 3, 2, 1], method, fractions=fractions) is None
+    assert app.divisor_interval(votes, [7, 5, 3, 2, 0], method, fractions=fractions) is None
+
+
+def test_divisor_interval_special_cases():
+    # tied apportionments have a single divisor
+    assert app.divisor_interval([10, 10, 5], [2, 1, 0], "dhondt", fractions=True) == (5, 5)
+    assert app.divisor_interval([10, 10, 5], [1, 1, 1], "dhondt") == (5, 5)
+    assert app.divisor_interval([10, 10, 5], [0, 0, 0], "dhondt") == (10, math.inf)
+    assert app.divisor_interval([10, 10, 5], [1, 1, 1], "adams") == (10, math.inf)
+    assert app.divisor_interval([10, 10, 5], [1, 1, 0], "adams") is None
+    assert app.divisor_interval([10, 0], [1, 1], "dhondt") is None
+    low, high = app.divisor_interval([7, 3], [3, 2], "huntington")
+    assert low == pytest.approx(7 / math.sqrt(12)) and high == pytest.approx(3 / math.sqrt(2))
+    with pytest.raises(NotImplementedError):
+        app.divisor_interval([7, 3], [3, 2], "huntington", fractions=True)
+    with pytest.raises(NotImplementedError):
+        app.divisor_interval([7, 3], [3, 2], "quota")
+
+
+@pytest.mark.parametrize(
+    "method", ["dhondt", "saintelague", "modified_saintelague", "huntington", "adams", "dean"]
+)
+@pytest.mark.parametrize("fractions", [True, False])
+def test_award_sequence(method, fractions):
+    votes = [10, 10, 5, 1, 22]
+    sequence = list(app.award_sequence(method, votes, 30, fractions=fractions))
+    assert [seat for seat, _, _ in sequence] == list(range(1, 31))
+    representatives = [0] * len(votes)
+    for seat, party, weight in sequence[:-1]:
+        representatives[party] += 1
+        result = app.compute(method, votes, seat, fractions=fractions, as_result=True)
+        assert representatives == result.tolist()
+        # ties of compute() are equal weights of the last awarded and the next seat
+        if weight < math.inf:
+            assert bool(result.ties) == (weight == sequence[seat][2])
+    weights = [weight for _, _, weight in sequence]
+    assert weights == sorted(weights, reverse=True)
+
+
+@pytest.mark.parametrize("method", ["huntington", "adams", "dean"])
+@pytest.mark.parametrize("fractions", [True, False])
+def test_award_sequence_parties_without_votes(method, fractions):
+    votes = [3, 5, 0, 0]
+    representatives = [0] * len(votes)
+    for seat, party, _ in app.award_sequence(method, votes, 10, fractions=fractions):
+        representatives[party] += 1
+        result = app.compute(method, votes, seat, fractions=fractions)
+        if seat == 3:
+            # compute() gives the third seat to a party without votes
+            assert (representatives, result) == ([1, 2, 0, 0], [1, 1, 1, 0])
+        else:
+            assert representatives == result
+
+
+def test_award_sequence_is_lazy():
+    sequence = app.award_sequence("dhondt", [3, 2], threshold=0.5)
+    assert [next(sequence) for _ in range(3)] == [(1, 0, 3), (2, 0, 1.5), (3, 0, 1)]
+    assert list(app.award_sequence("adams", [3, 5, 0], 3, fractions=True)) == [
+        (1, 1, math.inf),
+        (2, 0, math.inf),
+        (3, 1, Fraction(5)),
+    ]
+    with pytest.raises(NotImplementedError):
+        next(app.award_sequence("quota", [3, 2], 1))
+
+
+def test_many_parties_verbose(capsys):
+    votes = list(range(1, 101))
+    for method in app.METHODS:
+        result = app.compute(method, votes, 60, verbose=True)
+        assert sum(result) == 60
+    output = capsys.readouterr().out
+    assert "  Z: " in output and "  99: " in output
+    parties = np.array(["party" + str(i) for i in range(100)])
+    app.compute("dhondt", [1] * 100, 50, parties=parties, verbose=True)
+    assert "to the disadvantage of: party50, party51" in capsys.readouterr().out
+
+
+def test_compute_labeled():
+    votes = {"OEVP": 1305956, "SPOE": 903151, "FPOE": 650114, "GRUENE": 532193, "NEOS": 319024}
+    result = app.compute_labeled("dhondt", votes, 18)
+    assert result == {"OEVP": 7, "SPOE": 5, "FPOE": 3, "GRUENE": 2, "NEOS": 1}
+    assert list(result) == list(votes)
+    assert app.compute_labeled("dhondt", votes, 18, threshold=0.1)["NEOS"] == 0
+    structured = np.array(list(votes.items()), dtype=[("party", "U10"), ("votes", np.int64)])
+    result = app.compute_labeled("saintelague", structured, 18)
+    assert result["party"].tolist() == list(votes)
+    assert result["seats"].tolist() == app.compute("saintelague", list(votes.values()), 18)
+    with pytest.raises(ValueError):
+        app.compute_labeled("dhondt", structured, 18, field="count")
+    with pytest.raises(TypeError):
+        app.compute_labeled("dhondt", [1, 2], 18)
+
+
+def test_compute_labeled_pandas():
+    pd = pytest.importorskip("pandas")
+    votes = pd.Series([50, 30, 20], index=["x", "y", "z"])
+    result = app.compute_labeled("dhondt", votes, 10)
+    assert result.index.tolist() == ["x", "y", "z"] and result.tolist() == [5, 3, 2]
+
+
+@pytest.mark.parametrize(
+    "method", ["lrm", "dhondt", "saintelague", "modified_saintelague", "huntington", "dean"]
+)
+def test_exact_dtypes(method):
+    rng = np.random.default_rng(5)
+    votes = rng.integers(0, 10**6, size=150).tolist()
+    expected = app.compute(method, votes, 1000, fractions=True, dtype="object")
+    for dtype in [None, "int64", "uint64"]:
+        assert app.compute(method, votes, 1000, fractions=True, dtype=dtype) == expected
+    # products of int32 arrays would overflow
+    votes32 = np.array(votes, dtype=np.int32)
+    assert app.compute(method, votes32, 1000, fractions=True) == expected
+    assert app.compute(method, votes32, 1000) == app.compute(method, votes, 1000)
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+@pytest.mark.parametrize("parties", [3, 100])
+def test_quota_without_votes(fractions, parties):
+    # no party passes the threshold: all parties are tied in every round
+    result = app.compute("quota", [1] * parties, 3, fractions=fractions, threshold=0.5)
+    assert result == [3] + [0] * (parties - 1)
+    assert result == compute_batch("quota", [[0] * parties], 3)[0][0].tolist()
+    result = app.compute("quota", [0] * parties, 3, fractions=fractions, as_result=True)
+    assert [tie.tied for tie in result.ties] == [list(range(parties))] * 3
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+@pytest.mark.parametrize("parties", [3, 100])
+def test_largest_remainder_without_votes(fractions, parties):
+    # no party passes the threshold: the quotas are undefined
+    with pytest.raises(ValueError):
+        app.compute("largest_remainder", [1] * parties, 3, fractions=fractions, threshold=0.5)
+    with pytest.raises(ValueError):
+        app.compute("largest_remainder", np.zeros(parties, dtype=int), 3, fractions=fractions)
+    # without seats, there is nothing to apportion
+    assert app.compute("largest_remainder", [0] * parties, 0, fractions=fractions) == [0] * parties
+
+
+@pytest.mark.parametrize("seats", [100, 1000])
+def test_int32_totals(seats):
+    # the total of these int32 votes does not fit into int32
+    votes = np.array([2**30, 2**30 - 5, 12345], dtype=np.int32)
+    expected = [seats // 2, seats // 2, 0]
+    for method in ["lrm", "quota", "dhondt"]:
+        for fractions in [True, False]:
+            assert app.compute(method, votes, seats, fractions=fractions) == expected
+        assert compute_batch(method, votes[None], [seats])[0][0].tolist() == expected
+    result = app.compute("dhondt", list(votes), seats, as_result=True)
+    assert min(result.quotas) > 0 and result.gallagher < 0.01
+
+
+def test_exact_dtypes_overflow():
+    votes = [3 * 10**18, 2 * 10**18, 10**18 + 1] * 30
+    with pytest.raises(OverflowError):
+        app.compute("dhondt", votes, 1800, fractions=True, dtype="int64")
+    with pytest.raises(OverflowError):
+        app.compute("lrm", [-1] * 100, 100, fractions=True, dtype="uint64")
+    with pytest.raises(ValueError):
+        app.compute("dhondt", votes, 1800, fractions=True, dtype="float64")
+    # Python integers are chosen automatically
+    assert app.compute("dhondt", votes, 1800, fractions=True) == [30, 20, 10] * 30
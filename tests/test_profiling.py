@@ -0,0 +1,103 @@
+"""
+Unit tests for profiling
+"""
+
+import pickle
+import pytest
+import apportionment.methods as app
+from apportionment.profiling import Profile
+
+
+def test_phases_and_counters():
+    votes = list(range(1, 101))
+    with Profile(slowest=2) as profile:
+        app.compute("dhondt", votes, 500, threshold=0.001)
+        app.compute("dhondt", [10, 10, 5], 3)
+        app.compute("largest_remainder", votes, 1000, fractions=True)
+        app.compute("quota", votes, 300)
+    assert profile.calls == 4
+    assert set(profile.phases) >= {"threshold", "setup", "cutoff", "fast path", "quotas", "rounds"}
+    assert profile.seconds >= sum(profile.phases.values()) * 0.99
+    assert profile.counters["fast path calls"] == 1
+    assert profile.counters["ties"] >= 1
+    assert profile.counters["compared weights"] >= 100
+    assert profile.counters["int64 arrays"] == 1
+    assert profile.counters["rounds"] == 300
+    slowest = profile.slowest_calls()
+    assert len(slowest) == 2 and slowest[0]["seconds"] >= slowest[1]["seconds"]
+    assert all(call["parties"] == 100 for call in slowest)
+    assert "cutoff" in profile.table() and "compared weights" in profile.table()
+    assert app._profiles == []
+
+
+def test_inactive():
+    with Profile() as profile:
+        pass
+    app.compute("dhondt", [10, 10, 5], 3)
+    assert profile.calls == 0 and profile.counters == {}
+
+
+def test_callback_and_merge():
+    records = []
+    with Profile(callback=records.append) as first:
+        for seats in range(1, 11):
+            app.compute("saintelague", [40, 30, 20], seats)
+        with pytest.raises(app.TiesException):
+            app.compute("dhondt", [10, 10], 1, tiesallowed=False)
+        app.compute("dhondt", [10, 10], 1)
+    # (calls that raise an exception are included)
+    assert [record["seats"] for record in records] == list(range(1, 11)) + [1, 1]
+    assert first.counters["ties"] == 1 and first.counters["tied parties"] == 2
+    assert first.calls == 12
+    with Profile(slowest=3) as second:
+        app.compute("huntington", list(range(1, 80)), 400, fractions=True)
+    second = pickle.loads(pickle.dumps(second))
+    first.merge(second)
+    assert first.calls == 13
+    assert first.slowest_calls()[0]["method"] == "huntington"
+    assert first.counters["Fraction objects"] == second.counters["Fraction objects"] > 0
+
+
+def test_quota_fractions():
+    with Profile() as profile:
+        app.compute("quota", [720, 720, 120, 120], 8, fractions=True)
+    # (exact priorities votes / (seats + 1) of the parties)
+    assert profile.counters["Fraction objects"] >= 8
+    with Profile() as profile:
+        app.compute("quota", [720, 720, 120, 120], 8)
+    assert "Fraction objects" not in profile.counters
+
+
+def test_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    elections = [(list(range(1, 101)), 500), ([10, 10, 5], 3)] * 50
+    with Profile(slowest=len(elections)) as profile:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda e: app.compute("dhondt", *e), elections))
+    assert profile.calls == len(elections)
+    # each record contains only the phases of its own call
+    records = profile.slowest_calls()
+    assert sorted(record["parties"] for record in records) == [3] * 50 + [100] * 50
+    for record in records:
+        assert ("fast path" in record["phases"]) == (record["parties"] == 3)
+        assert ("cutoff" in record["phases"]) == (record["parties"] == 100)
+
+
+def test_merge_equal_times():
+    # calls with equal times are ordered by unique numbers (records are not comparable)
+    def call(profile):
+        profile.begin("dhondt", [1, 2], 2, False)
+        profile.end(1.0)
+
+    first = Profile(slowest=10)
+    for _ in range(5):
+        other = Profile(slowest=10)
+        for _ in range(3):
+            call(other)
+        first.merge(pickle.loads(pickle.dumps(other)))
+        for _ in range(3):
+            call(first)
+    numbers = [number for _, number, _ in first._slowest]
+    assert len(set(numbers)) == len(numbers) == 10
+    assert first.calls == 30
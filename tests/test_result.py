@@ -0,0 +1,85 @@
+"""
+Unit tests for ApportionmentResult
+"""
+
+from fractions import Fraction
+import math
+import pytest
+import apportionment.methods as app
+
+
+VOTES = [1305956, 903151, 650114, 532193, 319024]
+
+
+@pytest.mark.parametrize("method", app.METHODS)
+@pytest.mark.parametrize("fractions", [True, False])
+def test_same_seats_as_list(method, fractions):
+    seats = app.compute(method, VOTES, 18, fractions=fractions)
+    result = app.compute(method, VOTES, 18, fractions=fractions, as_result=True)
+    assert isinstance(result, app.ApportionmentResult)
+    assert result == seats
+    assert result.tolist() == seats
+    assert list(result) == seats
+    assert len(result) == 5 and result[0] == seats[0]
+    assert result.within_quota == app.within_quota(VOTES, seats)
+
+
+def test_result_has_slots():
+    result = app.compute("dhondt", VOTES, 18, as_result=True)
+    with pytest.raises(AttributeError):
+        result.other = 1
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+def test_divisor_cutoff(fractions):
+    result = app.compute("dhondt", [10, 10, 5], 3, fractions=fractions, as_result=True)
+    assert result.tolist() == [2, 1, 0]
+    assert result.cutoff == 5
+    assert isinstance(result.cutoff, Fraction if fractions else float)
+    result = app.compute("saintelague", [7, 3], 5, fractions=fractions, as_result=True)
+    assert result.cutoff == 1
+    result = app.compute(
+        "modified_saintelague", [10, 10, 5], 3, fractions=fractions, as_result=True
+    )
+    assert result.cutoff == pytest.approx(5 / 1.4)
+    # only first seats: no divisor
+    result = app.compute("adams", [10, 10, 5], 3, fractions=fractions, as_result=True)
+    assert result.cutoff is None
+    result = app.compute("huntington", [7, 3], 5, fractions=fractions, as_result=True)
+    assert result.tolist() == [3, 2]
+    assert result.cutoff == pytest.approx(3 / math.sqrt(2))
+
+
+@pytest.mark.parametrize("method", ["quota", "largest_remainder"])
+def test_quota_cutoff(method):
+    result = app.compute(method, [10, 10, 5], 3, fractions=True, as_result=True)
+    assert result.cutoff == Fraction(25, 3)
+    assert result.quotas == [Fraction(6, 5), Fraction(6, 5), Fraction(3, 5)]
+    assert app.compute(method, [10, 10, 5], 0, as_result=True).cutoff is None
+
+
+def test_ties():
+    result = app.compute("dhondt", [10, 10, 5], 3, as_result=True)
+    assert [(tie.winners, tie.losers) for tie in result.ties] == [([0], [1, 2])]
+    result = app.compute("quota", [10, 10, 5], 3, as_result=True)
+    assert [(tie.winners, tie.losers) for tie in result.ties] == [([0], [1]), ([0], [1, 2])]
+    assert app.compute("dhondt", VOTES, 18, as_result=True).ties == []
+
+
+def test_disproportionality():
+    result = app.compute("dhondt", [50, 30, 20], 10, as_result=True)
+    assert result.tolist() == [5, 3, 2]
+    assert result.gallagher == 0 and result.loosemore_hanby == 0
+    result = app.compute("dhondt", [60, 30, 10], 3, as_result=True)
+    assert result.tolist() == [2, 1, 0]
+    differences = [60 - 200 / 3, 30 - 100 / 3, 10]
+    assert result.loosemore_hanby == pytest.approx(sum(abs(d) for d in differences) / 2)
+    assert result.gallagher == pytest.approx(math.sqrt(sum(d * d for d in differences) / 2))
+
+
+def test_threshold():
+    result = app.compute("dhondt", [60, 30, 10], 10, threshold=0.2, as_result=True)
+    assert result.tolist() == [7, 3, 0]
+    # quotas of the votes after applying the threshold, disproportionality of all votes
+    assert result.quotas == pytest.approx([60 / 9, 30 / 9, 0])
+    assert result.loosemore_hanby == pytest.approx(10)
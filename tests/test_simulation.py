@@ -0,0 +1,79 @@
+"""
+Unit tests for Monte Carlo simulations
+"""
+
+import numpy as np
+import pytest
+from apportionment.batch import compute_batch
+from apportionment.simulation import DirichletSampler, MultinomialSampler, simulate
+
+
+class FixedSampler:
+    def __init__(self, votes):
+        self.votes = votes
+
+    def __call__(self, rng, size):
+        return np.tile(self.votes, (size, 1))
+
+
+def test_fixed_votes():
+    result = simulate("dhondt", FixedSampler([14, 28, 7, 35]), 6, 250, chunksize=100)
+    assert result.scenarios == 250
+    assert result.histogram.shape == (4, 7)
+    assert result.histogram[:, [1, 2, 0, 3]].diagonal().tolist() == [250] * 4
+    assert result.mean().tolist() == [1, 2, 0, 3]
+    assert result.majority_probability().tolist() == [0, 0, 0, 0]
+    assert result.majority_probability(3).tolist() == [0, 0, 0, 1]
+    lower, upper = result.confidence_interval()
+    assert lower.tolist() == upper.tolist() == [1, 2, 0, 3]
+    assert result.tie_probability() == 0
+
+
+def test_ties_are_counted():
+    result = simulate("dhondt", FixedSampler([11, 11, 11]), 4, 10)
+    assert result.tie_probability() == 1
+
+
+@pytest.mark.parametrize(
+    "sampler",
+    [
+        MultinomialSampler([0.4, 0.35, 0.2, 0.05], 1000),
+        DirichletSampler([40, 35, 20, 5], 200, 1e6),
+    ],
+)
+def test_reproducible_regardless_of_workers(sampler):
+    kwargs = dict(seed=7, chunksize=300, threshold=0.05)
+    single = simulate("saintelague", sampler, 20, 1000, workers=1, **kwargs)
+    parallel = simulate("saintelague", sampler, 20, 1000, workers=2, **kwargs)
+    assert single.histogram.tolist() == parallel.histogram.tolist()
+    assert single.histogram.sum(axis=1).tolist() == [1000] * 4
+    lower, upper = single.confidence_interval(0.9)
+    assert np.all(lower <= single.mean()) and np.all(single.mean() <= upper)
+    assert 0 < single.majority_probability(8)[0] < 1
+    assert (
+        single.histogram.tolist()
+        != simulate("saintelague", sampler, 20, 1000, seed=8, chunksize=300).histogram.tolist()
+    )
+
+
+def test_chunk_seeds():
+    # chunk c uses child c of SeedSequence(seed)
+    sampler = MultinomialSampler([0.4, 0.35, 0.2, 0.05], 1000)
+    result = simulate("dhondt", sampler, 20, 250, chunksize=100, seed=3)
+    children = np.random.SeedSequence(3).spawn(3)
+    votes = [sampler(np.random.default_rng(c), size) for c, size in zip(children, [100, 100, 50])]
+    representatives, _ = compute_batch("dhondt", np.concatenate(votes), 20)
+    expected = [np.bincount(seats, minlength=21).tolist() for seats in representatives.T]
+    assert result.histogram.tolist() == expected
+
+
+def test_no_scenarios():
+    with pytest.raises(ValueError):
+        simulate("dhondt", FixedSampler([14, 28, 7, 35]), 6, 0)
+
+
+def test_scenarios_without_votes():
+    # no party passes the threshold: no seats, reported as ties (the run does not fail)
+    result = simulate("largest_remainder", FixedSampler([1, 1, 1]), 3, 10, threshold=0.5)
+    assert result.histogram[:, 0].tolist() == [10, 10, 10]
+    assert result.tie_probability() == 1
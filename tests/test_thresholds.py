@@ -0,0 +1,69 @@
+"""
+Unit tests for threshold rules
+"""
+
+import numpy as np
+import pytest
+import apportionment.methods as app
+from apportionment.batch import compute_batch
+from apportionment.districts import Tier, tiered
+from apportionment.simulation import MultinomialSampler, simulate
+from apportionment.thresholds import AllOf, DistrictSeats, Share, Votes, threshold_mask
+
+VOTES = [1305956, 903151, 650114, 532193, 319024, 150000]
+
+
+def test_share_equals_float_threshold():
+    for threshold in [0.04, 0.05, 0.1]:
+        assert app.apply_threshold(VOTES, Share(threshold)) == app.apply_threshold(
+            VOTES, threshold
+        )
+        assert app.compute("dhondt", VOTES, 183, threshold=Share(threshold)) == app.compute(
+            "dhondt", VOTES, 183, threshold=threshold
+        )
+    filtered = app.apply_threshold(np.array(VOTES), 0.1)
+    assert isinstance(filtered, np.ndarray)
+    assert filtered.tolist() == app.apply_threshold(VOTES, 0.1)
+
+
+def test_rules():
+    assert threshold_mask(VOTES, Votes(600000)).tolist() == [True] * 3 + [False] * 3
+    # a higher threshold for an alliance (party 3)
+    mask = threshold_mask(VOTES, Share([0.05, 0.05, 0.05, 0.2, 0.05, 0.05]))
+    assert mask.tolist() == [True, True, True, False, True, False]
+    won = [5, 3, 0, 0, 0, 1]
+    rule = Share(0.1) | DistrictSeats(1, won)
+    assert threshold_mask(VOTES, rule).tolist() == [True, True, True, True, False, True]
+    rule = AllOf(0.04, Votes(400000))
+    assert threshold_mask(VOTES, rule).tolist() == [True] * 4 + [False] * 2
+    assert threshold_mask(VOTES, Share(0.05) & Votes(10**6)).tolist() == [True] + [False] * 5
+    assert threshold_mask(VOTES, None).all()
+    assert "DistrictSeats" in repr(rule | DistrictSeats(2))
+    with pytest.raises(ValueError):
+        threshold_mask(VOTES, DistrictSeats(1))
+
+
+def test_rules_batch_and_simulation():
+    rng = np.random.default_rng(1)
+    votes = rng.integers(0, 10000, size=(200, 6))
+    won = rng.integers(0, 3, size=(200, 6))
+    rule = Share(0.1) | DistrictSeats(2, won)
+    result, _ = compute_batch("saintelague", votes, 50, threshold=rule)
+    mask = rule.mask(votes)
+    for e in range(len(votes)):
+        filtered = np.where(mask[e], votes[e], 0).tolist()
+        assert result[e].tolist() == app.compute("saintelague", filtered, 50)
+    sampler = MultinomialSampler([0.3, 0.3, 0.2, 0.15, 0.05], 100000)
+    expected = simulate("dhondt", sampler, 100, 1000, threshold=0.06, seed=1)
+    result = simulate("dhondt", sampler, 100, 1000, threshold=Share(0.06), seed=1)
+    assert np.array_equal(result.histogram, expected.histogram)
+
+
+def test_rules_in_tiers():
+    votes = np.array([[100, 1, 1, 3], [100, 1, 1, 3], [0, 500, 20, 3], [0, 500, 10, 3]])
+    tiers = [Tier([2, 2, 1, 1], [0, 0, 0, 0], "dhondt"), Tier([20], method="dhondt")]
+    result = tiered(tiers, votes, threshold=Share(0.1) | DistrictSeats(1))
+    assert result.eligible.tolist() == [True, True, False, False]
+    assert result.eligible.tolist() == tiered(tiers, votes, 0.1, exemption=1).eligible.tolist()
+    result = tiered(tiers, votes, threshold=Votes(12))
+    assert result.eligible.tolist() == [True, True, True, True]
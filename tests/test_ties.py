@@ -0,0 +1,80 @@
+"""
+Unit tests for the enumeration of tie-resolved apportionments
+"""
+
+from fractions import Fraction
+import pytest
+import apportionment.methods as app
+from apportionment.ties import TiedApportionments, all_apportionments
+
+
+def quota_brute_force(votes, seats):
+    """All apportionments of the quota method, branching on every tie in every round."""
+    total = sum(votes)
+    results = set()
+
+    def branch(state):
+        house = sum(state)
+        if house == seats:
+            results.add(tuple(state))
+            return
+        eligible = [i for i, v in enumerate(votes) if v > 0 and state[i] * total < v * (house + 1)]
+        best = max(Fraction(votes[i], state[i] + 1) for i in eligible)
+        for i in eligible:
+            if Fraction(votes[i], state[i] + 1) == best:
+                branch(state[:i] + [state[i] + 1] + state[i + 1 :])
+
+    branch([0] * len(votes))
+    return results
+
+
+def test_nested_quota_ties():
+    apportionments = list(all_apportionments("quota", [720, 720, 120, 120], 8))
+    assert apportionments[0] == app.compute("quota", [720, 720, 120, 120], 8)
+    assert sorted(apportionments) == [[3, 4, 0, 1], [3, 4, 1, 0], [4, 3, 0, 1], [4, 3, 1, 0]]
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+@pytest.mark.parametrize(
+    "votes, seats", [([6, 6, 3, 3, 1], 7), ([4, 4, 4, 2], 9), ([12, 3, 2, 2, 1], 10), ([5], 3)]
+)
+def test_quota(votes, seats, fractions):
+    apportionments = list(all_apportionments("quota", votes, seats, fractions=fractions))
+    assert apportionments[0] == app.compute("quota", votes, seats, fractions=fractions)
+    assert len(set(map(tuple, apportionments))) == len(apportionments)
+    assert set(map(tuple, apportionments)) == quota_brute_force(votes, seats)
+
+
+@pytest.mark.parametrize("fractions", [True, False])
+def test_quota_without_votes(fractions):
+    # no party passes the threshold: all parties are tied in every round
+    apportionments = list(
+        all_apportionments("quota", [1, 1, 1], 2, fractions=fractions, threshold=0.5)
+    )
+    assert apportionments[0] == app.compute("quota", [1, 1, 1], 2, threshold=0.5)
+    assert apportionments == [[2, 0, 0], [1, 1, 0], [1, 0, 1], [0, 2, 0], [0, 1, 1], [0, 0, 2]]
+
+
+@pytest.mark.parametrize("method", ["dhondt", "saintelague", "adams", "largest_remainder"])
+def test_choose_k_of_tied(method):
+    apportionments = all_apportionments(method, [3] * 20, 10)
+    assert isinstance(apportionments, TiedApportionments)
+    assert len(apportionments) == 184756
+    assert next(iter(apportionments)) == app.compute(method, [3] * 20, 10)
+    assert [1] * 5 + [0] * 5 + [1] * 5 + [0] * 5 in apportionments
+    assert [2] * 5 + [0] * 15 not in apportionments
+
+
+def test_divisor_ties():
+    apportionments = all_apportionments("dhondt", [10, 10, 5], 3)
+    assert (apportionments.forced, apportionments.tied, apportionments.contested) == (
+        [1, 1, 0],
+        [0, 1, 2],
+        1,
+    )
+    assert list(apportionments) == [[2, 1, 0], [1, 2, 0], [1, 1, 1]]
+    apportionments = all_apportionments("dhondt", [10, 10, 5], 3, threshold=0.3)
+    assert list(apportionments) == [[2, 1, 0], [1, 2, 0]]
+    assert list(all_apportionments("dhondt", [7, 3], 5)) == [[4, 1]]
+    with pytest.raises(NotImplementedError):
+        all_apportionments("unknown", [7, 3], 5)
@@ -0,0 +1,96 @@
+"""
+Unit tests for the verification of official results
+"""
+
+import json
+import os
+import pytest
+from apportionment.thresholds import DistrictSeats, Share
+import apportionment.verification as verification
+from apportionment.verification import Election, load_dataset, main, parse_line, verify
+
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+
+
+def knesset():
+    return load_dataset(
+        os.path.join(EXAMPLES, "knesset.txt"),
+        ["name", "parties", "votes", "official", "threshold"],
+    )
+
+
+def test_parse_line():
+    assert parse_line("[19, ['a', 'b'], [1+2, 3], 0.02]  # comment") == [
+        19,
+        ["a", "b"],
+        [3, 3],
+        0.02,
+    ]
+    with pytest.raises(ValueError):
+        parse_line("[__import__('os').getcwd()]")
+    with pytest.raises(ValueError):
+        parse_line("[2 * 3]")
+
+
+def test_load_dataset():
+    elections = load_dataset(os.path.join(EXAMPLES, "nr_wahlen.txt"), threshold=0.04)
+    assert len(elections) == 9
+    assert all(e.seats == 183 and e.threshold == 0.04 for e in elections)
+    assert elections[0].name == 2019
+    assert knesset()[0].votes[0] == 885163 + 345985
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_verify(workers):
+    report = verify(knesset(), ["dhondt", "saintelague"], workers=workers, chunksize=3)
+    summary = report.summary()
+    assert summary["dhondt"]["matches"] == 4
+    assert summary["saintelague"]["mismatches"] == 4
+    assert len(report.mismatches("saintelague")) == 4
+    assert report.mismatches("dhondt") == []
+    assert [r.election.name for r in report.results[:4]] == [19, 20, 21, 22]
+    assert "mismatches:" in report.table()
+    assert json.loads(report.to_json())["summary"]["dhondt"]["elections"] == 4
+
+
+def test_verify_without_shared_memory(monkeypatch):
+    # (before Python 3.8, the elections are verified in a single process)
+    monkeypatch.setattr(verification, "_shared_memory", lambda: None)
+    report = verify(knesset(), ["dhondt"], workers=2)
+    assert report.summary()["dhondt"]["matches"] == 4
+
+
+def test_ties_and_errors():
+    elections = [
+        Election("tie", [10, 10, 5], [2, 1, 0]),
+        Election("fractional", [10.5, 4.5], [1, 0], threshold=0.5),
+    ]
+    report = verify(elections, ["dhondt", "unknown"])
+    assert [r.election.name for r in report.ties()] == ["tie"]
+    assert report.summary()["dhondt"]["matches"] == 2
+    assert report.summary()["unknown"]["errors"] == 2
+    with pytest.raises(ValueError):
+        Election("wrong", [1, 2], [1])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_threshold_rules(workers):
+    votes = [1305956, 903151, 650114, 532193, 319024]
+    elections = [
+        Election("share", votes, [7, 5, 3, 3, 0], threshold=Share(0.1)),
+        Election(
+            "exemption",
+            votes,
+            [7, 5, 3, 2, 1],
+            threshold=Share(0.1) | DistrictSeats(1, won=[0, 0, 0, 0, 1]),
+        ),
+    ]
+    report = verify(elections, ["dhondt"], workers=workers)
+    assert report.summary()["dhondt"]["matches"] == 2
+
+
+def test_main(capsys):
+    main([os.path.join(EXAMPLES, "nr_wahlen.txt"), "--threshold", "0.04", "--json"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["summary"]["dhondt"]["matches"] == 9